@@ -13,8 +13,9 @@ from textual.widgets import Button, Checkbox, Footer, Header, Input, Label
 
 from queued.config import DownloadDirCache, HostCache, QueueCache, SettingsManager
 from queued.models import Host, RemoteFile, Transfer
-from queued.sftp import SFTPClient, SFTPConnectionPool, SFTPError
+from queued.sftp import SFTPClient, SFTPConnectionPool, SFTPError, close_cached_connections
 from queued.transfer import TransferManager
+from queued.verify import VerifyResult, verify_existing_file
 from queued.widgets.file_browser import FileBrowser
 from queued.widgets.status_bar import StatusBar
 from queued.widgets.transfer_list import TransferList
@@ -320,7 +321,9 @@ class FileExistsModal(NavigableModalScreen[Optional[str]]):
         self.can_verify = not self.can_continue and sftp is not None
         # Verification state
         self._verifying = False
-        self._verify_result: tuple[bool, str] | None = None
+        self._verify_result: VerifyResult | None = None
+        # Set once the modal's widgets are mounted
+        self.mounted_event = asyncio.Event()
 
     def compose(self) -> ComposeResult:
         with Container():
@@ -349,6 +352,9 @@ class FileExistsModal(NavigableModalScreen[Optional[str]]):
 
             yield Checkbox("Apply to all", id="apply-all-checkbox")
 
+    def on_mount(self) -> None:
+        self.mounted_event.set()
+
     def _format_size(self, size: int) -> str:
         """Format size in human-readable format."""
         units = ["B", "KB", "MB", "GB", "TB"]
@@ -409,26 +415,12 @@ class FileExistsModal(NavigableModalScreen[Optional[str]]):
 
     async def _do_verify(self) -> None:
         """Run verification and update UI with result."""
-        from queued.transfer import verify_file
-
-        if not self.sftp or not self.remote_path or not self.local_path:
-            self._verify_result = (False, "Missing verification parameters")
-        else:
-            self._verify_result = await verify_file(
-                self.remote_path, self.local_path, self.remote_size, self.sftp
-            )
+        self._verify_result = await verify_existing_file(
+            self.remote_path, self.local_path, self.remote_size, self.sftp
+        )
 
         self._verifying = False
-        success, message = self._verify_result
-
-        if success:
-            if "size match only" in message:
-                self._update_verify_ui(message, "warning")
-            else:
-                self._update_verify_ui(message, "success")
-        else:
-            self._update_verify_ui(message, "error")
-
+        self._update_verify_ui(self._verify_result.message, self._verify_result.status)
         self._disable_buttons(False)
 
     def _update_verify_ui(self, message: str, style: str) -> None:
@@ -919,7 +911,7 @@ class ConnectionScreen(ModalScreen[Optional[Host]]):
 
         host = Host.from_string(host_str, port=port, key_path=key_path)
         host.password = password
-        # Mark whether password should be saved (temporary attribute)
+        # Mark whether password should be saved (checked on connect, not persisted)
         host._save_password = save_password.value
         self.dismiss(host)
 
@@ -1181,9 +1173,9 @@ class QueuedApp(App):
         status_bar = self.query_one("#status-bar", StatusBar)
 
         try:
-            # Disconnect old connection (ignore errors)
+            # Disconnect old connection (ignore errors); it may be broken, so don't reuse it
             try:
-                await self.sftp.disconnect()
+                await self.sftp.disconnect(linger=False)
             except Exception:
                 pass
 
@@ -1568,8 +1560,8 @@ class QueuedApp(App):
             # Stop transfer manager and wait for tasks to complete
             await self.transfer_manager.stop()
 
-            # Persist final queue state
-            self.transfer_manager._persist_queue()
+            # Persist final queue state, including any save still pending
+            self.transfer_manager.flush_queue()
 
         if self._transfer_task:
             self._transfer_task.cancel()
@@ -1586,5 +1578,12 @@ class QueuedApp(App):
             await self.connection_pool.disconnect_all()
         elif self.sftp:
             await self.sftp.disconnect()
+        close_cached_connections()
 
         self.exit()
+
+    def on_unmount(self) -> None:
+        """Stop background loops if the app exits without going through action_quit."""
+        for task in (self._refresh_timer, self._transfer_task):
+            if task:
+                task.cancel()
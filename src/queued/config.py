@@ -12,9 +12,23 @@ logger = logging.getLogger(__name__)
 
 
 def _secure_write(path: Path, content: str) -> None:
-    """Write file with secure permissions (0600)."""
-    path.write_text(content)
-    os.chmod(path, 0o600)
+    """Write file with secure permissions (0600).
+
+    The content goes to a temporary sibling that then replaces path, so an
+    interrupted write leaves the previous file intact rather than a truncated
+    one. There's no fsync: transfer state is saved on every progress update,
+    and a power loss may still lose the latest write.
+    """
+    tmp = path.with_name(f".{path.name}.tmp")
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.chmod(tmp, 0o600)  # In case a stale tmp file was left with other permissions
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
 
 
 def get_cache_dir() -> Path:
@@ -150,7 +164,8 @@ class TransferStateCache:
 
     def _save(self) -> None:
         """Save transfer state to cache file."""
-        _secure_write(self.cache_file, json.dumps(self._state, indent=2))
+        # Written on every progress update; compact output dumps much faster than indented
+        _secure_write(self.cache_file, json.dumps(self._state, separators=(",", ":")))
 
     def save_transfer(
         self,
@@ -200,12 +215,32 @@ class TransferStateCache:
             self._save()
 
 
+# Decoded queue files shared by every QueueCache in the process, keyed by path.
+# Entries hold the file's (mtime_ns, size) so an external rewrite is noticed.
+_QUEUE_FILE_CACHE: dict[Path, tuple[tuple[int, int], dict]] = {}
+
+
+def _file_signature(path: Path) -> tuple[int, int]:
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+
 class QueueCache:
     """Persists download queue across app restarts."""
 
     def __init__(self):
         self.cache_file = get_cache_dir() / "queue.json"
 
+    def _read(self) -> dict:
+        """Decode the queue file, reusing the last decode if the file is unchanged."""
+        signature = _file_signature(self.cache_file)
+        cached = _QUEUE_FILE_CACHE.get(self.cache_file)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        data = json.loads(self.cache_file.read_text())
+        _QUEUE_FILE_CACHE[self.cache_file] = (signature, data)
+        return data
+
     def save(self, transfers: list[Transfer], queue_paused: bool = False) -> None:
         """Save queue state (exclude completed/failed transfers).
 
@@ -223,7 +258,8 @@ class QueueCache:
             "queue_paused": queue_paused,
             "transfers": [t.to_dict() for t in active],
         }
-        _secure_write(self.cache_file, json.dumps(data, indent=2))
+        _secure_write(self.cache_file, json.dumps(data, separators=(",", ":")))
+        _QUEUE_FILE_CACHE[self.cache_file] = (_file_signature(self.cache_file), data)
 
     def load(self) -> tuple[list[Transfer], bool]:
         """Load saved queue.
@@ -237,7 +273,8 @@ class QueueCache:
         if not self.cache_file.exists():
             return [], False
         try:
-            data = json.loads(self.cache_file.read_text())
+            data = self._read()
+            # Transfers are rebuilt on every load so callers never share mutable objects
             transfers = [Transfer.from_dict(t) for t in data.get("transfers", [])]
             # Convert TRANSFERRING and STOPPED to QUEUED for auto-resume
             # PAUSED stays PAUSED (user explicitly paused these)
@@ -251,6 +288,7 @@ class QueueCache:
 
     def clear(self) -> None:
         """Clear the queue cache file."""
+        _QUEUE_FILE_CACHE.pop(self.cache_file, None)
         if self.cache_file.exists():
             self.cache_file.unlink()
 
@@ -1,9 +1,14 @@
 """Data models for Queued."""
 
+import math
+import sys
+from collections import Counter
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
+from typing import Any, Final, Self, SupportsIndex
 
 
 class TransferDirection(Enum):
@@ -26,7 +31,7 @@ class TransferStatus(Enum):
     VERIFYING = "verifying"
 
 
-@dataclass
+@dataclass(slots=True)
 class Host:
     """Remote host connection info."""
 
@@ -37,6 +42,8 @@ class Host:
     password: str | None = None
     last_used: datetime | None = None
     last_directory: str | None = None
+    # Set by the connect dialog; not persisted
+    _save_password: bool = field(default=True, init=False, repr=False, compare=False)
 
     @classmethod
     def from_string(
@@ -52,8 +59,6 @@ class Host:
 
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
-        import base64
-
         d = {
             "hostname": self.hostname,
             "username": self.username,
@@ -62,27 +67,29 @@ class Host:
             "last_used": self.last_used.isoformat() if self.last_used else None,
             "last_directory": self.last_directory,
         }
-        # Store password with base64 obfuscation (not real security, just prevents casual viewing)
+        # Store password hex-encoded (not real security, just prevents casual viewing)
         if self.password:
-            d["_pw"] = base64.b64encode(self.password.encode()).decode()
+            d["_pwx"] = self.password.encode().hex()
         return d
 
     @classmethod
     def from_dict(cls, data: dict) -> Host:
         """Create from dictionary."""
-        import base64
-
         last_used = None
         if data.get("last_used"):
             last_used = datetime.fromisoformat(data["last_used"])
 
-        # Decode password if present
+        # Decode password if present; "_pw" is the older base64 form
         password = None
-        if "_pw" in data:
-            try:
+        try:
+            if "_pwx" in data:
+                password = bytes.fromhex(data["_pwx"]).decode()
+            elif "_pw" in data:
+                import base64
+
                 password = base64.b64decode(data["_pw"]).decode()
-            except Exception:
-                pass
+        except Exception:
+            pass
 
         return cls(
             hostname=data["hostname"],
@@ -104,7 +111,32 @@ class Host:
         return f"{self.username}@{self.hostname}:{self.port}"
 
 
-@dataclass
+# (limit, divisor, unit) bands for human-readable byte counts
+_SIZE_UNITS = (
+    (1024, 1, "B"),
+    (1024**2, 1024, "KB"),
+    (1024**3, 1024**2, "MB"),
+    (1024**4, 1024**3, "GB"),
+    (math.inf, 1024**4, "TB"),
+)
+_SPEED_UNITS = (
+    (1024, 1, "B/s"),
+    (1024**2, 1024, "KB/s"),
+    (1024**3, 1024**2, "MB/s"),
+    (math.inf, 1024**3, "GB/s"),
+)
+
+
+def _format_scaled(value: float, bands: tuple[tuple[float, int, str], ...]) -> str:
+    """Format value in the first band whose limit it is below."""
+    for limit, divisor, unit in bands:
+        if value < limit:
+            return f"{value / divisor:.1f} {unit}"
+    # Only NaN gets here; report it in the last band
+    return f"{value / divisor:.1f} {unit}"
+
+
+@dataclass(slots=True)
 class RemoteFile:
     """Remote file or directory info."""
 
@@ -120,18 +152,35 @@ class RemoteFile:
         """Return human-readable file size."""
         if self.is_dir:
             return "<DIR>"
-        units = ["B", "KB", "MB", "GB", "TB"]
-        size = float(self.size)
-        for unit in units[:-1]:
-            if size < 1024:
-                return f"{size:.1f} {unit}"
-            size /= 1024
-        return f"{size:.1f} {units[-1]}"
+        return _format_scaled(self.size, _SIZE_UNITS)
 
 
-@dataclass
+# Marks a Transfer display cache slot as needing recomputation
+_UNSET: Final = object()
+
+# Transfer fields and the display cache slots derived from them
+_TRANSFER_CACHES_BY_FIELD: dict[str, tuple[str, ...]] = {
+    "size": ("_progress_cache", "_eta_cache"),
+    "bytes_transferred": ("_progress_cache", "_eta_cache"),
+    "speed": ("_speed_human_cache", "_eta_cache"),
+    "status": ("_eta_cache",),
+    "_smoothed_eta_seconds": ("_eta_cache",),
+}
+
+
+def _cache_field() -> Any:
+    """Declare a Transfer display cache slot, initially unset."""
+    return field(default=_UNSET, init=False, repr=False, compare=False)
+
+
+@dataclass(slots=True)
 class Transfer:
-    """A file transfer (download or upload)."""
+    """A file transfer (download or upload).
+
+    progress, speed_human and eta are cached; assigning to a field they depend
+    on discards the stale values. Status changes are also reported to the
+    IndexedTransferList holding the transfer, which counts active transfers.
+    """
 
     id: str
     remote_path: str
@@ -147,30 +196,52 @@ class Transfer:
     completed_at: datetime | None = None
     checksum: str | None = None  # Expected checksum if known
     _smoothed_eta_seconds: float | None = field(default=None, repr=False)  # Smoothed ETA
+    _progress_cache: Any = _cache_field()
+    _speed_human_cache: Any = _cache_field()
+    _eta_cache: Any = _cache_field()
+    _owner: IndexedTransferList | None = field(default=None, init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        if name == "status":
+            # _owner is not assigned yet while __init__ sets status
+            owner = getattr(self, "_owner", None)
+            if owner is not None:
+                owner._status_changed(self.status, value)
+        # object.__setattr__ rather than super(): slots=True replaces the class
+        object.__setattr__(self, name, value)
+        for cache in _TRANSFER_CACHES_BY_FIELD.get(name, ()):
+            object.__setattr__(self, cache, _UNSET)
 
     @property
     def progress(self) -> float:
         """Return progress percentage (0-100)."""
-        if self.size == 0:
-            return 100.0
-        return (self.bytes_transferred / self.size) * 100
+        if self._progress_cache is _UNSET:
+            if self.size == 0:
+                self._progress_cache = 100.0
+            else:
+                self._progress_cache = (self.bytes_transferred / self.size) * 100
+        return self._progress_cache
 
     @property
     def speed_human(self) -> str:
         """Return human-readable transfer speed."""
-        if self.speed == 0:
-            return "0 B/s"
-        units = ["B/s", "KB/s", "MB/s", "GB/s"]
-        speed = float(self.speed)
-        for unit in units[:-1]:
-            if speed < 1024:
-                return f"{speed:.1f} {unit}"
-            speed /= 1024
-        return f"{speed:.1f} {units[-1]}"
+        if self._speed_human_cache is _UNSET:
+            self._speed_human_cache = self._format_speed()
+        return self._speed_human_cache
 
     @property
     def eta(self) -> str | None:
         """Return estimated time remaining (smoothed for stability)."""
+        if self._eta_cache is _UNSET:
+            self._eta_cache = self._format_eta()
+        return self._eta_cache
+
+    def _format_speed(self) -> str:
+        if self.speed == 0:
+            return "0 B/s"
+        return _format_scaled(self.speed, _SPEED_UNITS)
+
+    def _format_eta(self) -> str | None:
         if self.status != TransferStatus.TRANSFERRING:
             return None
 
@@ -224,7 +295,7 @@ class Transfer:
             local_path=data["local_path"],
             direction=TransferDirection(data["direction"]),
             size=data["size"],
-            host_key=data.get("host_key", ""),
+            host_key=sys.intern(data.get("host_key", "")),
             status=TransferStatus(data["status"]),
             bytes_transferred=data.get("bytes_transferred", 0),
             error=data.get("error"),
@@ -238,17 +309,177 @@ class Transfer:
         )
 
 
+def _dir_prefixes(path: str) -> Iterator[str]:
+    """Yield each prefix of path that ends with "/" (its ancestor directories)."""
+    i = path.find("/")
+    while i != -1:
+        yield path[: i + 1]
+        i = path.find("/", i + 1)
+
+
+def _discard_from(index: dict[str, list[Transfer]], key: str, transfer: Transfer) -> None:
+    """Remove transfer itself (not an equal copy) from an index bucket."""
+    bucket = index[key]
+    for i, t in enumerate(bucket):
+        if t is transfer:
+            del bucket[i]
+            break
+    if not bucket:
+        del index[key]
+
+
+class IndexedTransferList(list[Transfer]):
+    """List of transfers indexed by id, remote path and ancestor directory.
+
+    The list's own mutating methods keep the indexes current. A transfer's
+    id and remote_path must not change while it is in the list. Transfers
+    report status changes back to the list, so the number of transfers in
+    each status is kept without scanning; a transfer should only be in one
+    IndexedTransferList at a time.
+    """
+
+    def __init__(self, transfers: Iterable[Transfer] = ()) -> None:
+        super().__init__(transfers)
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self._by_id: dict[str, list[Transfer]] = {}
+        self._by_path: dict[str, list[Transfer]] = {}
+        self._by_dir: dict[str, list[Transfer]] = {}
+        self._status_counts: Counter[object] = Counter()
+        for t in self:
+            self._index(t)
+
+    def _release(self, transfers: Iterable[Transfer]) -> None:
+        """Stop tracking transfers dropped by a bulk edit that is followed by _reindex."""
+        for t in transfers:
+            if t._owner is self:
+                t._owner = None
+
+    def _index(self, transfer: Transfer) -> None:
+        transfer._owner = self
+        self._status_counts[transfer.status] += 1
+        self._by_id.setdefault(transfer.id, []).append(transfer)
+        self._by_path.setdefault(transfer.remote_path, []).append(transfer)
+        for prefix in _dir_prefixes(transfer.remote_path):
+            self._by_dir.setdefault(prefix, []).append(transfer)
+
+    def _unindex(self, transfer: Transfer) -> None:
+        self._status_counts[transfer.status] -= 1
+        _discard_from(self._by_id, transfer.id, transfer)
+        _discard_from(self._by_path, transfer.remote_path, transfer)
+        for prefix in _dir_prefixes(transfer.remote_path):
+            _discard_from(self._by_dir, prefix, transfer)
+        if not any(t is transfer for t in self._by_id.get(transfer.id, ())):
+            # Only let go if it isn't still in the list at another index, e.g. mid-swap
+            transfer._owner = None
+
+    def _status_changed(self, old: TransferStatus, new: object) -> None:
+        self._status_counts[old] -= 1
+        self._status_counts[new] += 1
+
+    @property
+    def transferring_count(self) -> int:
+        """Number of transfers whose status is TRANSFERRING."""
+        return self._status_counts[TransferStatus.TRANSFERRING]
+
+    def count_with_status(self, status: TransferStatus) -> int:
+        """Number of transfers whose status is status."""
+        return self._status_counts[status]
+
+    def with_id(self, transfer_id: str) -> list[Transfer]:
+        """Transfers with this id (normally at most one), in no particular order."""
+        return self._by_id.get(transfer_id, [])
+
+    def position_of(self, transfer: Transfer) -> int:
+        """Index of this exact transfer object, not of an equal copy."""
+        for i, t in enumerate(self):
+            if t is transfer:
+                return i
+        raise ValueError(f"{transfer!r} is not in list")
+
+    def with_remote_path(self, remote_path: str) -> list[Transfer]:
+        """Transfers whose remote_path is exactly remote_path, in no particular order."""
+        return self._by_path.get(remote_path, [])
+
+    def under_directory(self, prefix: str) -> list[Transfer]:
+        """Transfers whose remote_path starts with prefix, which must end with "/"."""
+        return self._by_dir.get(prefix, [])
+
+    def append(self, transfer: Transfer) -> None:
+        super().append(transfer)
+        self._index(transfer)
+
+    def extend(self, transfers: Iterable[Transfer]) -> None:
+        transfers = list(transfers)
+        super().extend(transfers)
+        for t in transfers:
+            self._index(t)
+
+    def __iadd__(self, transfers: Iterable[Transfer]) -> Self:
+        self.extend(transfers)
+        return self
+
+    def __imul__(self, n: SupportsIndex) -> Self:
+        copies = n.__index__()
+        if copies <= 0:
+            self.clear()
+        else:
+            self.extend(list(self) * (copies - 1))
+        return self
+
+    def insert(self, index: SupportsIndex, transfer: Transfer) -> None:
+        super().insert(index, transfer)
+        self._index(transfer)
+
+    def pop(self, index: SupportsIndex = -1) -> Transfer:
+        transfer = super().pop(index)
+        self._unindex(transfer)
+        return transfer
+
+    def remove(self, transfer: Transfer) -> None:
+        self.pop(self.index(transfer))
+
+    def clear(self) -> None:
+        self._release(self)
+        super().clear()
+        self._reindex()
+
+    def __setitem__(self, key, value) -> None:
+        if isinstance(key, slice):
+            self._release(self)
+            super().__setitem__(key, value)
+            self._reindex()
+            return
+        old = self[key]
+        super().__setitem__(key, value)
+        self._index(value)
+        self._unindex(old)
+
+    def __delitem__(self, key) -> None:
+        if isinstance(key, slice):
+            self._release(self)
+            super().__delitem__(key)
+            self._reindex()
+            return
+        self.pop(key)
+
+
 @dataclass
 class TransferQueue:
     """Queue of transfers with state management."""
 
-    transfers: list[Transfer] = field(default_factory=list)
+    transfers: IndexedTransferList = field(default_factory=IndexedTransferList)
     max_concurrent: int = 10
 
+    def __post_init__(self) -> None:
+        if not isinstance(self.transfers, IndexedTransferList):
+            self.transfers = IndexedTransferList(self.transfers)
+
     @property
     def active_count(self) -> int:
         """Count of currently active transfers."""
-        return len([t for t in self.transfers if t.status == TransferStatus.TRANSFERRING])
+        return self.transfers.transferring_count
 
     @property
     def can_start_more(self) -> bool:
@@ -264,10 +495,10 @@ class TransferQueue:
 
     def get_by_id(self, transfer_id: str) -> Transfer | None:
         """Get transfer by ID."""
-        for t in self.transfers:
-            if t.id == transfer_id:
-                return t
-        return None
+        matches = self.transfers.with_id(transfer_id)
+        if len(matches) > 1:
+            return min(matches, key=self.transfers.position_of)
+        return matches[0] if matches else None
 
     def get_by_remote_path(self, remote_path: str, host_key: str = "") -> Transfer | None:
         """Get transfer by remote file path (and optionally host).
@@ -279,11 +510,15 @@ class TransferQueue:
         Returns:
             The first matching transfer, or None if not found
         """
-        for t in self.transfers:
-            if t.remote_path == remote_path:
-                if not host_key or t.host_key == host_key:
-                    return t
-        return None
+        matches = [
+            t
+            for t in self.transfers.with_remote_path(remote_path)
+            if not host_key or t.host_key == host_key
+        ]
+        if len(matches) > 1:
+            # Index buckets are unordered; keep "first in queue" semantics
+            return min(matches, key=self.transfers.position_of)
+        return matches[0] if matches else None
 
     def is_queued(self, remote_path: str, host_key: str = "") -> bool:
         """Check if a file is in the queue (any non-completed/failed status).
@@ -300,11 +535,11 @@ class TransferQueue:
 
     def remove(self, transfer_id: str) -> bool:
         """Remove a transfer from the queue."""
-        for i, t in enumerate(self.transfers):
-            if t.id == transfer_id:
-                self.transfers.pop(i)
-                return True
-        return False
+        transfer = self.get_by_id(transfer_id)
+        if transfer is None:
+            return False
+        self.transfers.pop(self.transfers.position_of(transfer))
+        return True
 
     def move_up(self, transfer_id: str) -> bool:
         """Move a transfer up in the queue."""
@@ -333,11 +568,10 @@ class TransferQueue:
             True if any file under dir_path is queued (not completed/failed)
         """
         prefix = dir_path if dir_path.endswith("/") else dir_path + "/"
-        for t in self.transfers:
-            if t.remote_path.startswith(prefix):
-                if not host_key or t.host_key == host_key:
-                    if t.status not in (TransferStatus.COMPLETED, TransferStatus.FAILED):
-                        return True
+        for t in self.transfers.under_directory(prefix):
+            if not host_key or t.host_key == host_key:
+                if t.status not in (TransferStatus.COMPLETED, TransferStatus.FAILED):
+                    return True
         return False
 
 
@@ -3,9 +3,16 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import logging
+import mmap
+import os
+import posixpath
+import re
 import shlex
-from collections.abc import Callable
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING
@@ -19,6 +26,11 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# md5sum backslash-escapes names containing "\\", "\n" or "\r"
+_MD5SUM_ESCAPE = re.compile(r"\\(.)")
+_MD5SUM_UNESCAPED = {"n": "\n", "r": "\r"}
+_MD5_HEX = re.compile(r"[0-9a-f]{32}")
+
 
 class SFTPError(Exception):
     """SFTP operation error."""
@@ -46,41 +58,207 @@ CHUNK_SIZE = 262144  # 256KB
 # SFTP block size for asyncssh pipelining
 SFTP_BLOCK_SIZE = 262144  # 256KB
 
+# Outstanding READ/WRITE requests kept in flight by sftp.get() and sftp.put()
+SFTP_MAX_REQUESTS = 128
+
+# Unthrottled manual reads ask for this much at once; asyncssh splits a read
+# larger than its block size into parallel requests, as sftp.get() does
+PIPELINED_READ_SIZE = SFTP_BLOCK_SIZE * 16  # 4MB
+
+
+# "rwxrwxrwx" strings for every 9-bit permission mode, indexed by mode
+_PERMISSION_STRINGS = tuple(
+    "".join("rwx"[2 - (i % 3)] if mode & (1 << i) else "-" for i in range(8, -1, -1))
+    for mode in range(0o1000)
+)
+
 
 class BandwidthLimiter:
-    """Async bandwidth limiter using token bucket algorithm."""
+    """Async bandwidth limiter using token bucket algorithm.
+
+    The bucket holds up to one second of traffic, so short bursts pass without
+    waiting. A chunk larger than the available tokens puts the bucket into
+    debt, and the caller sleeps just long enough for the refill to repay it.
+    """
 
     def __init__(self, limit: int | None = None):
         """Initialize limiter with bytes per second limit (None = unlimited)."""
         self.limit = limit
-        self._last_check_time = asyncio.get_event_loop().time()
-        self._bytes_since_check = 0
+        self._tokens = float(limit or 0)
+        self._last_refill = time.monotonic()
+
+    def _refill(self) -> None:
+        """Add tokens for the time since the last refill, capped at one second's worth."""
+        now = time.monotonic()
+        self._tokens = min(float(self.limit), self._tokens + (now - self._last_refill) * self.limit)
+        self._last_refill = now
 
     async def throttle(self, bytes_transferred: int) -> None:
         """Throttle if necessary based on bytes transferred."""
         if not self.limit or self.limit <= 0:
             return
 
-        self._bytes_since_check += bytes_transferred
-        current_time = asyncio.get_event_loop().time()
-        elapsed = current_time - self._last_check_time
+        self._refill()
+        self._tokens -= bytes_transferred
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.limit)
+
+
+# How long an unused SSH connection stays open for reuse (like OpenSSH's ControlPersist)
+CONNECTION_LINGER = 300  # seconds
+
+
+@dataclass
+class _CachedConnection:
+    """An SSH connection shared by the SFTPClients of one host."""
+
+    conn: asyncssh.SSHClientConnection
+    refs: int = 1
+    close_handle: asyncio.TimerHandle | None = None
+
+    def cancel_close(self) -> None:
+        if self.close_handle:
+            self.close_handle.cancel()
+            self.close_handle = None
 
-        if elapsed > 0:
-            current_rate = self._bytes_since_check / elapsed
-            if current_rate > self.limit:
-                sleep_time = (self._bytes_since_check / self.limit) - elapsed
-                if sleep_time > 0:
-                    await asyncio.sleep(sleep_time)
-                self._bytes_since_check = 0
-                self._last_check_time = asyncio.get_event_loop().time()
+
+# (host_key, repr of the sorted asyncssh.connect() options) a connection is cached under
+_CacheKey = tuple[str, str]
+
+
+def _connection_cache_key(host_key: str, connect_kwargs: dict[str, object]) -> _CacheKey:
+    """Key a connection by host and options, so differently configured clients don't share."""
+    return host_key, repr(sorted(connect_kwargs.items()))
+
+
+class _SSHConnectionCache:
+    """Process-wide cache of SSH connections keyed by host and connect options.
+
+    A connection released by its last user is kept open for CONNECTION_LINGER
+    seconds, so reconnecting to the same host skips the TCP and SSH handshakes.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[_CacheKey, _CachedConnection] = {}
+        # Connections no longer handed out but still in use, by id(), closed
+        # when their last user releases them
+        self._detached: dict[int, _CachedConnection] = {}
+
+    async def acquire(
+        self, key: _CacheKey, **connect_kwargs: object
+    ) -> asyncssh.SSHClientConnection:
+        """Return a live cached connection for key, or open a new one."""
+        entry = self._entries.get(key)
+        if entry and not entry.conn.is_closed():
+            entry.cancel_close()
+            entry.refs += 1
+            logger.debug("Reusing SSH connection to %s", key[0])
+            return entry.conn
+
+        conn = await asyncssh.connect(**connect_kwargs)
+        # A concurrent acquire may have cached a connection meanwhile; if so,
+        # this one stays private and is closed on release
+        entry = self._entries.get(key)
+        if entry is None or entry.conn.is_closed():
+            self._drop(key)
+            self._entries[key] = _CachedConnection(conn)
+        return conn
+
+    def release(
+        self, key: _CacheKey | None, conn: asyncssh.SSHClientConnection, linger: bool = True
+    ) -> bool:
+        """Give up one use of conn.
+
+        Args:
+            key: Key the connection was acquired under
+            conn: The connection returned by acquire()
+            linger: If False, stop reusing the connection and close it as soon
+                as no other client is using it
+
+        Returns:
+            True if the connection was closed now, False if it is kept open
+        """
+        entry = self._entries.get(key) if key is not None else None
+        if entry is None or entry.conn is not conn:
+            detached = self._detached.get(id(conn))
+            if detached is not None:
+                detached.refs -= 1
+                if detached.refs > 0:
+                    return False
+                del self._detached[id(conn)]
+            conn.close()
+            return True
+        entry.refs -= 1
+        if not linger:
+            if entry.refs > 0:
+                # Other clients still use it; the next acquire dials afresh
+                del self._entries[key]
+                self._detached[id(conn)] = entry
+                return False
+            self._drop(key)
+            return True
+        if entry.refs <= 0:
+            loop = asyncio.get_running_loop()
+            entry.close_handle = loop.call_later(CONNECTION_LINGER, self._close_idle, key, conn)
+        return False
+
+    def _close_idle(self, key: _CacheKey, conn: asyncssh.SSHClientConnection) -> None:
+        entry = self._entries.get(key)
+        if entry and entry.conn is conn and entry.refs <= 0:
+            logger.debug("Closing idle SSH connection to %s", key[0])
+            self._drop(key)
+
+    def _drop(self, key: _CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            entry.cancel_close()
+            entry.conn.close()
+
+    def close_all(self) -> None:
+        """Close every cached connection, including ones still in use."""
+        for key in list(self._entries):
+            self._drop(key)
+        for entry in self._detached.values():
+            entry.conn.close()
+        self._detached.clear()
+
+
+_connection_cache = _SSHConnectionCache()
+
+
+def close_cached_connections() -> None:
+    """Close all shared SSH connections, e.g. when the app exits."""
+    _connection_cache.close_all()
+
+
+def _hash_file_prefix(hasher: hashlib._Hash, path: str, length: int) -> None:
+    """Feed up to length leading bytes of a local file into hasher.
+
+    The prefix is mapped rather than read through a bytes object per chunk.
+    """
+    with open(path, "rb", buffering=0) as f:
+        kept = min(length, os.fstat(f.fileno()).st_size)
+        if kept:
+            with mmap.mmap(f.fileno(), kept, access=mmap.ACCESS_READ) as mm:
+                hasher.update(mm)
 
 
 class SFTPClient:
     """Async SFTP client wrapper."""
 
-    def __init__(self, host: Host):
+    def __init__(self, host: Host, **connect_options: object):
+        """
+        Initialize SFTP client.
+
+        Args:
+            host: Host to connect to
+            **connect_options: Extra asyncssh.connect() options, overriding
+                the defaults (e.g. known_hosts=None for a throwaway test server)
+        """
         self.host = host
+        self._connect_options = connect_options
         self._conn: asyncssh.SSHClientConnection | None = None
+        self._cache_key: _CacheKey | None = None  # Key _conn was acquired under
         self._sftp: asyncssh.SFTPClient | None = None
         self._connected = False
 
@@ -122,8 +300,17 @@ class SFTPClient:
                 connect_kwargs["password"] = self.host.password
                 logger.debug("Using password authentication")
 
-            self._conn = await asyncssh.connect(**connect_kwargs, connect_timeout=30)
-            self._sftp = await self._conn.start_sftp_client()
+            connect_kwargs["connect_timeout"] = 30
+            connect_kwargs.update(self._connect_options)
+
+            self._cache_key = _connection_cache_key(self.host.host_key, connect_kwargs)
+            self._conn = await _connection_cache.acquire(self._cache_key, **connect_kwargs)
+            try:
+                self._sftp = await self._conn.start_sftp_client()
+            except BaseException:
+                _connection_cache.release(self._cache_key, self._conn, linger=False)
+                self._conn = None
+                raise
             self._connected = True
             logger.info("Connected to %s", self.host.host_key)
         except asyncssh.HostKeyNotVerifiable as e:
@@ -135,15 +322,20 @@ class SFTPClient:
         except OSError as e:
             raise SFTPError(f"Connection error: {e}") from e
 
-    async def disconnect(self) -> None:
-        """Close the connection."""
+    async def disconnect(self, linger: bool = True) -> None:
+        """Close the SFTP session and release the SSH connection.
+
+        Args:
+            linger: Keep the SSH connection open for a while so a reconnect to
+                this host can reuse it. Pass False when the connection may be broken.
+        """
         logger.debug("Disconnecting from %s", self.host.host_key)
         if self._sftp:
             self._sftp.exit()
             self._sftp = None
         if self._conn:
-            self._conn.close()
-            await self._conn.wait_closed()
+            if _connection_cache.release(self._cache_key, self._conn, linger=linger):
+                await self._conn.wait_closed()
             self._conn = None
         self._connected = False
         logger.info("Disconnected from %s", self.host.host_key)
@@ -185,13 +377,7 @@ class SFTPClient:
 
     def _format_permissions(self, mode: int) -> str:
         """Format permissions as rwxrwxrwx string."""
-        perms = ""
-        for i in range(8, -1, -1):
-            if mode & (1 << i):
-                perms += "rwx"[2 - (i % 3)]
-            else:
-                perms += "-"
-        return perms
+        return _PERMISSION_STRINGS[mode & 0o777]
 
     async def get_file_info(self, path: str) -> RemoteFile:
         """Get info for a single file."""
@@ -223,7 +409,8 @@ class SFTPClient:
         progress_callback: Callable[[int, int], None] | None = None,
         resume_offset: int = 0,
         bandwidth_limit: int | None = None,
-    ) -> None:
+        compute_md5: bool = False,
+    ) -> str | None:
         """
         Download a file from the remote server.
 
@@ -233,6 +420,12 @@ class SFTPClient:
             progress_callback: Callback(bytes_transferred, total_size)
             resume_offset: Byte offset to resume from
             bandwidth_limit: Max bytes per second (None = unlimited)
+            compute_md5: Hash the data as it arrives when it is read in a manual
+                loop anyway (resumed or throttled); fresh downloads keep the
+                pipelined sftp.get() and are not hashed
+
+        Returns:
+            MD5 hex digest of the local file if it was hashed, else None
         """
         if not self._sftp:
             raise SFTPError("Not connected")
@@ -245,19 +438,23 @@ class SFTPClient:
             # Ensure local directory exists
             Path(local_path).parent.mkdir(parents=True, exist_ok=True)
 
-            if resume_offset > 0:
-                # Resume: use manual reads with seeking
-                await self._download_resume(
+            if resume_offset > 0 or bandwidth_limit:
+                # Resume or throttled: use manual reads with seeking, since
+                # sftp.get() has no start offset or point at which to wait for
+                # the limiter. The data passes through here, so hashing is cheap
+                return await self._download_resume(
                     remote_path,
                     local_path,
                     total_size,
                     progress_callback,
                     resume_offset,
                     bandwidth_limit,
+                    compute_md5,
                 )
-            else:
-                # Fresh download: use sftp.get() with pipelining (50-100x faster)
-                await self._download_fast(remote_path, local_path, total_size, progress_callback)
+
+            # Fresh download: use sftp.get() with pipelining (50-100x faster)
+            await self._download_fast(remote_path, local_path, total_size, progress_callback)
+            return None
 
         except asyncssh.SFTPError as e:
             raise SFTPError(f"Download failed: {e}") from e
@@ -271,7 +468,7 @@ class SFTPClient:
         total_size: int,
         progress_callback: Callable[[int, int], None] | None = None,
     ) -> None:
-        """Fast download using sftp.get() with pipelining (128 parallel requests)."""
+        """Fast download using sftp.get() with pipelined parallel reads."""
 
         def progress_handler(srcpath: bytes, dstpath: bytes, bytes_copied: int, total: int) -> None:
             if progress_callback:
@@ -282,6 +479,7 @@ class SFTPClient:
             local_path,
             progress_handler=progress_handler if progress_callback else None,
             block_size=SFTP_BLOCK_SIZE,
+            max_requests=SFTP_MAX_REQUESTS,
         )
 
     async def _download_resume(
@@ -292,22 +490,33 @@ class SFTPClient:
         progress_callback: Callable[[int, int], None] | None = None,
         resume_offset: int = 0,
         bandwidth_limit: int | None = None,
-    ) -> None:
-        """Resume download using manual reads with seeking."""
+        compute_md5: bool = False,
+    ) -> str | None:
+        """Download using manual reads with seeking, optionally hashing the data."""
         limiter = BandwidthLimiter(bandwidth_limit)
+        # Small reads keep throttling smooth; otherwise let asyncssh parallelize
+        read_size = CHUNK_SIZE if bandwidth_limit else PIPELINED_READ_SIZE
+        md5 = hashlib.md5(usedforsecurity=False) if compute_md5 else None
+
+        if md5 and resume_offset:
+            # The hash has to cover the part downloaded before the resume, which
+            # can be most of a large file, so hash it off the event loop
+            await asyncio.to_thread(_hash_file_prefix, md5, local_path, resume_offset)
 
         async with self._sftp.open(remote_path, "rb") as remote_file:
             await remote_file.seek(resume_offset)
 
-            with open(local_path, "ab") as local_file:
+            with open(local_path, "ab" if resume_offset else "wb") as local_file:
                 bytes_transferred = resume_offset
 
                 while True:
-                    chunk = await remote_file.read(CHUNK_SIZE)
+                    chunk = await remote_file.read(read_size)
                     if not chunk:
                         break
 
                     local_file.write(chunk)
+                    if md5:
+                        md5.update(chunk)
                     bytes_transferred += len(chunk)
 
                     # Throttle if bandwidth limit is set
@@ -316,6 +525,8 @@ class SFTPClient:
                     if progress_callback:
                         progress_callback(bytes_transferred, total_size)
 
+        return md5.hexdigest() if md5 else None
+
     async def upload(
         self,
         local_path: str,
@@ -344,6 +555,11 @@ class SFTPClient:
 
             total_size = local_file_path.stat().st_size
 
+            if not bandwidth_limit:
+                # Unthrottled: use sftp.put() with pipelining, as downloads do
+                await self._upload_fast(local_path, remote_path, total_size, progress_callback)
+                return
+
             async with self._sftp.open(remote_path, "wb") as remote_file:
                 with open(local_path, "rb") as local_file:
                     bytes_transferred = 0
@@ -367,6 +583,27 @@ class SFTPClient:
         except OSError as e:
             raise SFTPError(f"Local file error: {e}") from e
 
+    async def _upload_fast(
+        self,
+        local_path: str,
+        remote_path: str,
+        total_size: int,
+        progress_callback: Callable[[int, int], None] | None = None,
+    ) -> None:
+        """Fast upload using sftp.put() with pipelined parallel writes."""
+
+        def progress_handler(srcpath: bytes, dstpath: bytes, bytes_copied: int, total: int) -> None:
+            if progress_callback:
+                progress_callback(bytes_copied, total_size)
+
+        await self._sftp.put(
+            local_path,
+            remote_path,
+            progress_handler=progress_handler if progress_callback else None,
+            block_size=SFTP_BLOCK_SIZE,
+            max_requests=SFTP_MAX_REQUESTS,
+        )
+
     async def get_pwd(self) -> str:
         """Get current working directory."""
         if not self._sftp:
@@ -386,6 +623,30 @@ class SFTPClient:
         except asyncssh.SFTPError:
             return False
 
+    async def files_exist(self, paths: Iterable[str]) -> dict[str, bool]:
+        """
+        Check whether several files exist with one readdir per parent directory.
+
+        Cheaper than file_exists() per path when many of the paths are
+        siblings. A parent that cannot be listed marks all its paths missing.
+        """
+        if not self._sftp:
+            raise SFTPError("Not connected")
+
+        by_parent: dict[str, list[str]] = {}
+        for path in paths:
+            by_parent.setdefault(posixpath.dirname(path) or ".", []).append(path)
+
+        result: dict[str, bool] = {}
+        for parent, children in by_parent.items():
+            try:
+                names = set(await self._sftp.listdir(parent))
+            except asyncssh.SFTPError:
+                names = set()
+            for path in children:
+                result[path] = posixpath.basename(path) in names
+        return result
+
     async def get_checksum(self, path: str, algorithm: str = "md5") -> str | None:
         """
         Try to get checksum using SFTP check-file extension.
@@ -402,6 +663,9 @@ class SFTPClient:
         """
         Compute MD5 hash of remote file by running md5sum via SSH.
 
+        A "<file>.md5" sidecar holding a hash is trusted instead, sparing the
+        server a read of the whole file.
+
         Returns the MD5 hash string, or None if:
         - Not connected
         - md5sum command not available on remote
@@ -411,30 +675,70 @@ class SFTPClient:
             return None
 
         try:
-            # Run md5sum command on remote server
-            # Output format: "hash  filename" or "hash *filename"
-            result = await self._conn.run(f"md5sum {shlex.quote(path)}", check=True, timeout=300)
-            # Parse the hash from output (first field)
-            output = result.stdout.strip()
-            if output:
-                return output.split()[0]
-            return None
+            # Print the sidecar's hash if it has one, else run md5sum
+            # Output format: "hash", "hash  filename" or "hash *filename"
+            cmd = (
+                f"head -n 1 {shlex.quote(path + '.md5')} 2>/dev/null"
+                f" | grep -ioE '^[0-9a-f]{{32}}' || md5sum -- {shlex.quote(path)}"
+            )
+            result = await self._conn.run(cmd, check=True, timeout=300)
+            # The hash is the first field; a leading backslash flags an escaped name
+            first_line = result.stdout.partition("\n")[0]
+            digest = first_line.partition(" ")[0].removeprefix("\\").lower()
+            return digest if _MD5_HEX.fullmatch(digest) else None
         except Exception as e:
             logger.debug("Failed to compute remote MD5 for %s: %s", path, e)
             return None
 
+    async def compute_remote_md5_many(self, paths: list[str]) -> dict[str, str]:
+        """
+        Compute MD5 hashes of several remote files with a single md5sum exec.
+
+        Returns a mapping of path to hash. Paths that could not be hashed
+        (missing, unreadable) are left out; an empty dict is returned when
+        not connected or the command cannot run at all.
+        """
+        if not self._conn or not paths:
+            return {}
+
+        wanted = set(paths)
+        cmd = "md5sum -- " + " ".join(shlex.quote(p) for p in paths)
+        try:
+            # Unhashable files only produce stderr, so don't fail the batch on them
+            result = await self._conn.run(cmd, check=False, timeout=300)
+        except Exception as e:
+            logger.debug("Failed to compute remote MD5 for %d files: %s", len(paths), e)
+            return {}
+
+        hashes: dict[str, str] = {}
+        for line in (result.stdout or "").splitlines():
+            # md5sum prefixes the line with a backslash when it escaped the name
+            escaped = line.startswith("\\")
+            digest, _, name = line.removeprefix("\\").partition(" ")
+            # Text mode separates with two spaces, binary mode with " *"
+            name = name[1:] if name[:1] in (" ", "*") else name
+            if escaped:
+                name = _MD5SUM_ESCAPE.sub(lambda m: _MD5SUM_UNESCAPED.get(m[1], m[1]), name)
+            if digest and name in wanted:
+                hashes[name] = digest
+        return hashes
+
     async def read_file(self, path: str, max_size: int = 1024 * 1024) -> bytes:
         """Read a small file (for .sfv, .md5 files)."""
         if not self._sftp:
             raise SFTPError("Not connected")
 
         try:
-            attrs = await self._sftp.stat(path)
-            if attrs.size and attrs.size > max_size:
-                raise SFTPError(f"File too large: {attrs.size} bytes")
-
             async with self._sftp.open(path, "rb") as f:
-                return await f.read()
+                # Size the read from the open handle: one round trip instead of a
+                # stat() by path plus the fstat() that read() with no size makes.
+                # Reads larger than a block are already pipelined by asyncssh.
+                attrs = await f.stat()
+                if attrs.size and attrs.size > max_size:
+                    raise SFTPError(f"File too large: {attrs.size} bytes")
+                if not attrs.size:
+                    return await f.read()  # Size unknown: read to EOF
+                return await f.read(attrs.size, 0)
         except asyncssh.SFTPError as e:
             raise SFTPError(f"Failed to read file: {e}") from e
 
@@ -451,6 +755,8 @@ class SFTPConnectionPool:
         """
 
         self._connections: dict[str, SFTPClient] = {}
+        # In-flight connects, awaited by concurrent callers for the same host
+        self._pending: dict[str, asyncio.Future[SFTPClient]] = {}
         self._host_cache = host_cache
 
     async def get_connection(self, host_key: str) -> SFTPClient:
@@ -474,14 +780,36 @@ class SFTPConnectionPool:
             # Connection was lost, remove and reconnect
             del self._connections[host_key]
 
+        # Join a connect already in progress rather than racing it
+        while pending := self._pending.get(host_key):
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # Only the caller that started that connect was cancelled; try again
+
         # Look up host from cache
         host = self._host_cache.get_by_key(host_key)
         if not host:
             raise SFTPError(f"Unknown host: {host_key}")
 
         # Create and connect new client
-        client = SFTPClient(host)
-        await client.connect()
+        fut: asyncio.Future[SFTPClient] = asyncio.get_running_loop().create_future()
+        self._pending[host_key] = fut
+        try:
+            client = SFTPClient(host)
+            await client.connect()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # Retrieved here so an unawaited future doesn't warn
+            raise
+        finally:
+            self._pending.pop(host_key, None)
+        fut.set_result(client)
         self._connections[host_key] = client
         return client
 
@@ -502,12 +830,10 @@ class SFTPConnectionPool:
 
     async def disconnect_all(self) -> None:
         """Close all connections gracefully."""
-        for client in self._connections.values():
-            try:
-                await client.disconnect()
-            except Exception:
-                pass  # Ignore errors during shutdown
+        clients = list(self._connections.values())
         self._connections.clear()
+        # Disconnect concurrently; errors are ignored during shutdown
+        await asyncio.gather(*(c.disconnect() for c in clients), return_exceptions=True)
 
     @property
     def connected_hosts(self) -> list[str]:
@@ -3,9 +3,15 @@
 import asyncio
 import hashlib
 import logging
+import mmap
+import os
 import re
+import sys
+import time
 import uuid
-from collections.abc import Callable
+import zlib
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable
 from datetime import datetime
 from pathlib import Path, PurePosixPath
 
@@ -23,6 +29,31 @@ from queued.sftp import SFTPClient, SFTPConnectionPool, SFTPError
 
 logger = logging.getLogger(__name__)
 
+# Seconds to hold back a queue save so a burst of changes is written once
+QUEUE_SAVE_DELAY = 0.1
+
+# Seconds of samples SpeedTracker averages over
+SPEED_WINDOW = 2.0
+_SPEED_WINDOW_NS = int(SPEED_WINDOW * 1_000_000_000)
+
+# Files at least this large are hashed through mmap, skipping the copy into a read buffer
+MMAP_HASH_THRESHOLD = 16 * 1024 * 1024  # 16MB
+
+# Read size for CRC32 over files below MMAP_HASH_THRESHOLD
+CRC_READ_SIZE = 1024 * 1024  # 1MB
+
+# Names that would escape or collapse onto the target directory
+_INVALID_NAMES = frozenset({"", ".", ".."})
+
+# Seconds a remote directory's checksum file names are reused between verifications
+CHECKSUM_LISTING_TTL = 5.0
+
+# Checksum files verify_file looks for beside the remote file
+_CHECKSUM_SUFFIXES = (".b2", ".sfv", ".md5")
+
+# verify_file message when only sizes could be compared
+VERIFIED_SIZE_ONLY = "Verified (size match only - no checksum available)"
+
 
 class TransferManager:
     """Manages file transfers with queue, resume, and verification support."""
@@ -51,6 +82,14 @@ class TransferManager:
         self._tasks: dict[str, asyncio.Task] = {}
         self._speed_trackers: dict[str, SpeedTracker] = {}
         self._individually_paused: set[str] = set()  # Track individual pause requests
+        self._save_handle: asyncio.TimerHandle | None = None  # Pending queue save
+        # Resolved download directories and local dirs already created, so that
+        # queueing many files doesn't repeat the same filesystem calls
+        self._resolved_dirs: dict[str, Path] = {}
+        self._created_dirs: set[Path] = set()
+        # (host_key, remote_dir) -> (listed at, .sfv/.md5 names), so verifying a
+        # batch of downloads from one directory lists it once
+        self._checksum_listings: dict[tuple[str, str], tuple[float, list[str]]] = {}
 
         # Load any persisted transfers and queue state from previous session
         transfers, queue_paused = self.queue_cache.load()
@@ -76,7 +115,8 @@ class TransferManager:
 
         Returns None if the file is already in the queue (duplicate prevention).
         """
-        host_key = host.host_key if host else ""
+        # Interned so every transfer from one host shares a single key string
+        host_key = sys.intern(host.host_key) if host else ""
 
         # Check for duplicate - don't add if already in queue
         if self.queue.is_queued(remote_file.path, host_key):
@@ -85,22 +125,26 @@ class TransferManager:
         if local_dir is None:
             local_dir = str(Path(self.settings.download_dir).expanduser())
 
-        download_base = Path(local_dir).resolve()
+        download_base = self._resolved_dirs.get(local_dir)
+        if download_base is None:
+            download_base = self._resolved_dirs[local_dir] = Path(local_dir).resolve()
 
         if base_dir:
             # Preserve directory structure relative to base_dir
             rel_path = PurePosixPath(remote_file.path).relative_to(base_dir)
             # Validate each component to prevent path traversal
             for part in rel_path.parts:
-                if part in (".", "..") or not part:
+                if part in _INVALID_NAMES:
                     raise ValueError(f"Invalid path component: {part}")
             local_path = (download_base / rel_path).resolve()
             # Create parent directories
-            local_path.parent.mkdir(parents=True, exist_ok=True)
+            if local_path.parent not in self._created_dirs:
+                local_path.parent.mkdir(parents=True, exist_ok=True)
+                self._created_dirs.add(local_path.parent)
         else:
             # Single file - just use filename
             safe_name = Path(remote_file.name).name
-            if not safe_name or safe_name in (".", ".."):
+            if safe_name in _INVALID_NAMES:
                 raise ValueError(f"Invalid filename: {remote_file.name}")
             local_path = (download_base / safe_name).resolve()
 
@@ -127,7 +171,25 @@ class TransferManager:
         return transfer
 
     def _persist_queue(self) -> None:
-        """Save queue state to disk for persistence across restarts."""
+        """Save queue state to disk for persistence across restarts.
+
+        With an event loop running the save is deferred by QUEUE_SAVE_DELAY,
+        so queueing a whole directory writes the file once rather than per file.
+        """
+        if self._save_handle is not None:
+            return  # Already scheduled; it will pick up this change too
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_queue()
+            return
+        self._save_handle = loop.call_later(QUEUE_SAVE_DELAY, self.flush_queue)
+
+    def flush_queue(self) -> None:
+        """Save queue state now, replacing any pending deferred save."""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
         self.queue_cache.save(self.queue.transfers, self._queue_paused)
 
     async def _get_sftp_for_transfer(self, transfer: Transfer) -> SFTPClient:
@@ -143,8 +205,10 @@ class TransferManager:
     def add_upload(self, local_path: str, remote_dir: str) -> Transfer:
         """Add a file to the upload queue."""
         local_file = Path(local_path)
-        if not local_file.exists():
-            raise FileNotFoundError(f"Local file not found: {local_path}")
+        try:
+            size = local_file.stat().st_size  # One stat for both the existence check and size
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Local file not found: {local_path}") from None
 
         remote_path = f"{remote_dir}/{local_file.name}"
 
@@ -153,7 +217,7 @@ class TransferManager:
             remote_path=remote_path,
             local_path=str(local_file),
             direction=TransferDirection.UPLOAD,
-            size=local_file.stat().st_size,
+            size=size,
             status=TransferStatus.QUEUED,
         )
 
@@ -238,18 +302,21 @@ class TransferManager:
                         total,
                     )
 
-            await sftp.download(
+            # Resumed/throttled downloads hash in passing; otherwise verification
+            # hashes the file only if a checksum file needs its MD5
+            local_md5 = await sftp.download(
                 transfer.remote_path,
                 transfer.local_path,
                 progress_callback=progress_callback,
                 resume_offset=resume_offset,
+                compute_md5=self.settings.verify_checksums,
             )
 
             # Verify if checksums available
             if self.settings.verify_checksums:
                 transfer.status = TransferStatus.VERIFYING
                 self._notify_status_change(transfer)
-                verified = await self._verify_checksum(transfer, sftp)
+                verified = await self._verify_checksum(transfer, sftp, local_md5)
                 if not verified:
                     transfer.status = TransferStatus.FAILED
                     transfer.error = "Checksum verification failed"
@@ -313,6 +380,9 @@ class TransferManager:
                 transfer.remote_path,
                 progress_callback=progress_callback,
             )
+            self._checksum_listings.pop(
+                (transfer.host_key, str(Path(transfer.remote_path).parent)), None
+            )
 
             transfer.status = TransferStatus.COMPLETED
             transfer.completed_at = datetime.now()
@@ -344,24 +414,29 @@ class TransferManager:
             self._speed_trackers.pop(transfer.id, None)
             self._notify_status_change(transfer)
 
-    async def _verify_checksum(self, transfer: Transfer, sftp: SFTPClient) -> bool:
-        """Verify download checksum if verification file exists."""
+    async def _verify_checksum(
+        self, transfer: Transfer, sftp: SFTPClient, local_md5: str | None = None
+    ) -> bool:
+        """Verify download checksum if verification file exists.
+
+        local_md5, when known from the download, saves re-reading the file.
+        """
         remote_dir = str(Path(transfer.remote_path).parent)
         remote_name = Path(transfer.remote_path).name
 
         # Look for .sfv or .md5 files
         try:
-            files = await sftp.list_dir(remote_dir)
-            for f in files:
-                if f.name.endswith(".sfv"):
+            names = await self._list_checksum_files(transfer.host_key, remote_dir, sftp)
+            for name in names:
+                if name.endswith(".sfv"):
                     checksum = await self._check_sfv(
-                        f"{remote_dir}/{f.name}", remote_name, transfer.local_path, sftp
+                        f"{remote_dir}/{name}", remote_name, transfer.local_path, sftp
                     )
                     if checksum is not None:
                         return checksum
-                elif f.name.endswith(".md5"):
+                else:
                     checksum = await self._check_md5(
-                        f"{remote_dir}/{f.name}", remote_name, transfer.local_path, sftp
+                        f"{remote_dir}/{name}", remote_name, transfer.local_path, sftp, local_md5
                     )
                     if checksum is not None:
                         return checksum
@@ -371,67 +446,65 @@ class TransferManager:
         # No checksum file found, consider verified
         return True
 
+    async def _list_checksum_files(
+        self, host_key: str, remote_dir: str, sftp: SFTPClient
+    ) -> list[str]:
+        """Names of the .sfv/.md5 files in remote_dir, listed at most once per TTL."""
+        key = (host_key, remote_dir)
+        now = time.monotonic()
+        cached = self._checksum_listings.get(key)
+        if cached is not None and now - cached[0] < CHECKSUM_LISTING_TTL:
+            return cached[1]
+
+        files = await sftp.list_dir(remote_dir)
+        names = [f.name for f in files if f.name.endswith((".sfv", ".md5"))]
+        # Drop expired directories so the cache only holds recent batches
+        self._checksum_listings = {
+            k: v for k, v in self._checksum_listings.items() if now - v[0] < CHECKSUM_LISTING_TTL
+        }
+        self._checksum_listings[key] = (now, names)
+        return names
+
     async def _check_sfv(
         self, sfv_path: str, filename: str, local_path: str, sftp: SFTPClient
     ) -> bool | None:
         """Check file against SFV (Simple File Verification) file."""
         try:
             content = await sftp.read_file(sfv_path)
-            lines = content.decode("utf-8", errors="ignore").splitlines()
-
-            for line in lines:
-                line = line.strip()
-                if line.startswith(";") or not line:
-                    continue
-                # SFV format: filename CRC32
-                match = re.match(r"(.+?)\s+([0-9a-fA-F]{8})$", line)
-                if match and match.group(1).lower() == filename.lower():
-                    expected_crc = match.group(2).lower()
-                    actual_crc = self._calculate_crc32(local_path)
-                    return actual_crc == expected_crc
+            expected_crc = _find_listed_checksum(_SFV_LINE, content, filename)
+            if expected_crc is not None:
+                actual_crc = await asyncio.to_thread(self._calculate_crc32, local_path)
+                return actual_crc == expected_crc
         except (SFTPError, UnicodeDecodeError):
             pass
         return None
 
     async def _check_md5(
-        self, md5_path: str, filename: str, local_path: str, sftp: SFTPClient
+        self,
+        md5_path: str,
+        filename: str,
+        local_path: str,
+        sftp: SFTPClient,
+        local_md5: str | None = None,
     ) -> bool | None:
         """Check file against MD5 checksum file."""
         try:
             content = await sftp.read_file(md5_path)
-            lines = content.decode("utf-8", errors="ignore").splitlines()
-
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                # MD5 format: hash *filename or hash  filename
-                match = re.match(r"([0-9a-fA-F]{32})\s+\*?(.+)$", line)
-                if match and match.group(2).strip().lower() == filename.lower():
-                    expected_md5 = match.group(1).lower()
-                    actual_md5 = self._calculate_md5(local_path)
-                    return actual_md5 == expected_md5
+            expected_md5 = _find_listed_checksum(_SUMS_LINE[32], content, filename)
+            if expected_md5 is not None:
+                actual_md5 = local_md5 or await asyncio.to_thread(self._calculate_md5, local_path)
+                return actual_md5 == expected_md5
         except (SFTPError, UnicodeDecodeError):
             pass
         return None
 
     def _calculate_crc32(self, filepath: str) -> str:
         """Calculate CRC32 checksum of a file."""
-        import zlib
-
-        crc = 0
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(65536), b""):
-                crc = zlib.crc32(chunk, crc)
-        return format(crc & 0xFFFFFFFF, "08x")
+        return _calculate_local_crc32(filepath)
 
     def _calculate_md5(self, filepath: str) -> str:
         """Calculate MD5 checksum of a file."""
-        md5 = hashlib.md5()
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(65536), b""):
-                md5.update(chunk)
-        return md5.hexdigest()
+        return _calculate_local_md5(filepath)
 
     def pause_transfer(self, transfer_id: str) -> bool:
         """Pause a transfer."""
@@ -481,9 +554,11 @@ class TransferManager:
     def pause_all(self) -> int:
         """Pause all active transfers. Returns count of paused transfers."""
         count = 0
-        for t in self.queue.transfers:
-            if t.status == TransferStatus.TRANSFERRING:
-                if self.pause_transfer(t.id):
+        # Only transfers with a running task can be TRANSFERRING; skip scanning the whole queue
+        for transfer_id in list(self._tasks):
+            transfer = self.queue.get_by_id(transfer_id)
+            if transfer and transfer.status == TransferStatus.TRANSFERRING:
+                if self.pause_transfer(transfer_id):
                     count += 1
         return count
 
@@ -506,11 +581,10 @@ class TransferManager:
         logger.info("Stopping queue processing")
         self._queue_paused = True
         count = 0
-        for t in self.queue.transfers:
-            if t.status == TransferStatus.TRANSFERRING:
-                task = self._tasks.get(t.id)
-                if task:
-                    task.cancel()
+        for transfer_id, task in list(self._tasks.items()):
+            transfer = self.queue.get_by_id(transfer_id)
+            if transfer and transfer.status == TransferStatus.TRANSFERRING:
+                task.cancel()
                 # Status will be set to STOPPED in CancelledError handler
                 count += 1
         self._persist_queue()
@@ -563,35 +637,37 @@ class SpeedTracker:
 
     def __init__(self, window_size: int = 10):
         self.window_size = window_size
-        self._samples: list[tuple[float, int]] = []
+        # (monotonic_ns, bytes) samples from the last SPEED_WINDOW seconds, oldest first
+        self._samples: deque[tuple[int, int]] = deque()
+        self._window_bytes = 0  # Running sum of the bytes in _samples
         self._last_bytes = 0
         self._smoothed_eta: float | None = None
         self._alpha = 0.15  # EMA factor: lower = smoother, higher = more responsive
 
     def update(self, current_bytes: int) -> float:
         """Update with current bytes transferred, return smoothed speed."""
-        import time
-
-        now = time.time()
+        now = time.monotonic_ns()
         bytes_delta = current_bytes - self._last_bytes
         self._last_bytes = current_bytes
 
-        self._samples.append((now, bytes_delta))
+        samples = self._samples
+        samples.append((now, bytes_delta))
+        self._window_bytes += bytes_delta
 
-        # Keep only recent samples
-        cutoff = now - 2.0  # 2 second window
-        self._samples = [(t, b) for t, b in self._samples if t > cutoff]
+        # Expire samples that fell out of the window, oldest first
+        cutoff = now - _SPEED_WINDOW_NS
+        while samples[0][0] <= cutoff:
+            self._window_bytes -= samples.popleft()[1]
 
-        if len(self._samples) < 2:
+        if len(samples) < 2:
             return 0.0
 
         # Calculate speed from samples
-        time_span = self._samples[-1][0] - self._samples[0][0]
+        time_span = now - samples[0][0]
         if time_span <= 0:
             return 0.0
 
-        total_bytes = sum(b for _, b in self._samples)
-        return total_bytes / time_span
+        return self._window_bytes * 1_000_000_000 / time_span
 
     def get_smoothed_eta(self, remaining_bytes: int, current_speed: float) -> float | None:
         """Return smoothed ETA in seconds using exponential moving average."""
@@ -609,13 +685,60 @@ class SpeedTracker:
         return self._smoothed_eta
 
 
+def _advise_sequential(fd: int) -> None:
+    """Ask the kernel for aggressive read-ahead on a file read front to back."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+
+def _file_hexdigest(filepath: str, algorithm: str) -> str:
+    """Hash a local file with the named hashlib algorithm.
+
+    The digest is an integrity check, not a security measure, which keeps MD5
+    usable on FIPS-restricted OpenSSL builds.
+    """
+    with open(filepath, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if size and size >= MMAP_HASH_THRESHOLD:
+            # Hash straight from the page cache (empty files can't be mapped)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                return hashlib.new(algorithm, mm, usedforsecurity=False).hexdigest()
+        _advise_sequential(f.fileno())
+        # file_digest runs the read/update loop in C, straight into a reused buffer
+        digest = hashlib.file_digest(f, lambda: hashlib.new(algorithm, usedforsecurity=False))
+        return digest.hexdigest()
+
+
+def _calculate_local_crc32(filepath: str) -> str:
+    """Calculate CRC32 checksum of a local file, as SFV files list it."""
+    crc = 0
+    with open(filepath, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if size and size >= MMAP_HASH_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                crc = zlib.crc32(mm)
+        else:
+            _advise_sequential(f.fileno())
+            # Read into one reused buffer rather than allocating a bytes per chunk
+            buf = bytearray(CRC_READ_SIZE)
+            view = memoryview(buf)
+            while n := f.readinto(buf):
+                crc = zlib.crc32(view[:n], crc)
+    return format(crc & 0xFFFFFFFF, "08x")
+
+
 def _calculate_local_md5(filepath: str) -> str:
     """Calculate MD5 checksum of a local file."""
-    md5 = hashlib.md5()
-    with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(65536), b""):
-            md5.update(chunk)
-    return md5.hexdigest()
+    return _file_hexdigest(filepath, "md5")
+
+
+def _calculate_local_blake2b(filepath: str) -> str:
+    """Calculate BLAKE2b-512 checksum of a local file, as b2sum prints it."""
+    return _file_hexdigest(filepath, "blake2b")
 
 
 async def verify_file(
@@ -623,48 +746,125 @@ async def verify_file(
     local_path: str,
     remote_size: int,
     sftp: SFTPClient,
+    local_md5: str | None = None,
 ) -> tuple[bool, str]:
     """
     Verify a local file against the remote source.
 
-    Verification cascade:
-    1. Look for .sfv/.md5 checksum files in remote directory
+    Differing sizes fail at once, without hashing the local file. Otherwise
+    the verification cascade is:
+    1. Look for .b2/.sfv/.md5 checksum files in remote directory, .b2 first
+       since BLAKE2b hashes faster locally than MD5
     2. Compute remote MD5 via SSH and compare with local
-    3. Fall back to size comparison only
+    3. Fall back to the size match alone
 
     Args:
         remote_path: Path to remote file
         local_path: Path to local file
         remote_size: Expected size from remote file info
         sftp: Connected SFTP client
+        local_md5: MD5 of the local file if already known, e.g. from download()
 
     Returns:
         Tuple of (success, message) where:
         - success: True if verification passed
         - message: Human-readable result description
     """
-    local_file = Path(local_path)
-    if not local_file.exists():
+    return await _verify_file(remote_path, local_path, remote_size, sftp, local_md5, sftp.list_dir)
+
+
+async def verify_files(
+    items: Iterable[tuple[str, str, int]],
+    sftp: SFTPClient,
+    concurrency: int = 8,
+) -> list[tuple[bool, str]]:
+    """
+    Verify several local files against their remote sources concurrently.
+
+    Each remote directory is listed once for the whole batch, and up to
+    concurrency files are checked at a time so SFTP round trips for one file
+    overlap with local hashing for another.
+
+    Args:
+        items: (remote_path, local_path, remote_size) for each file
+        sftp: Connected SFTP client
+        concurrency: Maximum number of files verified at once
+
+    Returns:
+        verify_file's (success, message) for each item, in order; an item
+        that raises fails with the error as its message
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    listings: dict[str, asyncio.Task[list[RemoteFile]]] = {}
+
+    def list_dir_once(remote_dir: str) -> asyncio.Task[list[RemoteFile]]:
+        if remote_dir not in listings:
+            listings[remote_dir] = asyncio.ensure_future(sftp.list_dir(remote_dir))
+        return listings[remote_dir]
+
+    async def verify_one(remote_path: str, local_path: str, remote_size: int) -> tuple[bool, str]:
+        async with semaphore:
+            try:
+                return await _verify_file(
+                    remote_path, local_path, remote_size, sftp, None, list_dir_once
+                )
+            except Exception as e:
+                # One unreadable file shouldn't abandon the rest of the batch
+                return False, str(e)
+
+    try:
+        return await asyncio.gather(*(verify_one(*item) for item in items))
+    finally:
+        for listing in listings.values():
+            listing.cancel()
+
+
+async def _verify_file(
+    remote_path: str,
+    local_path: str,
+    remote_size: int,
+    sftp: SFTPClient,
+    local_md5: str | None,
+    list_dir: Callable[[str], Awaitable[list[RemoteFile]]],
+) -> tuple[bool, str]:
+    """verify_file, listing remote directories through list_dir."""
+    try:
+        local_size = os.stat(local_path).st_size
+    except OSError:
         return False, "Local file not found"
 
-    local_size = local_file.stat().st_size
+    # A partial or oversized file can't match any checksum, so don't read it
+    if local_size != remote_size:
+        return False, f"Size mismatch (local: {local_size}, remote: {remote_size})"
+
     remote_dir = str(PurePosixPath(remote_path).parent)
     remote_name = PurePosixPath(remote_path).name
 
-    # Step 1: Look for .sfv or .md5 checksum files
+    # Step 1: Look for .b2, .sfv or .md5 checksum files
     try:
-        files = await sftp.list_dir(remote_dir)
-        for f in files:
-            if f.name.endswith(".sfv"):
-                result = await _verify_sfv(f"{remote_dir}/{f.name}", remote_name, local_path, sftp)
+        files = await list_dir(remote_dir)
+        # Only checksum files matter; order them once the listing is filtered
+        names = [f.name for f in files if f.name.endswith(_CHECKSUM_SUFFIXES)]
+        names.sort(key=lambda name: not name.endswith(".b2"))
+        for name in names:
+            checksum_path = f"{remote_dir}/{name}"
+            if name.endswith(".b2"):
+                result = await _verify_b2_file(checksum_path, remote_name, local_path, sftp)
+                if result is not None:
+                    if result:
+                        return True, "Verified (BLAKE2 match)"
+                    else:
+                        return False, "BLAKE2 mismatch"
+            elif name.endswith(".sfv"):
+                result = await _verify_sfv(checksum_path, remote_name, local_path, sftp)
                 if result is not None:
                     if result:
                         return True, "Verified (CRC32 match)"
                     else:
                         return False, "CRC32 mismatch"
-            elif f.name.endswith(".md5"):
+            else:
                 result = await _verify_md5_file(
-                    f"{remote_dir}/{f.name}", remote_name, local_path, sftp
+                    checksum_path, remote_name, local_path, sftp, local_md5
                 )
                 if result is not None:
                     if result:
@@ -678,7 +878,8 @@ async def verify_file(
     try:
         remote_md5 = await sftp.compute_remote_md5(remote_path)
         if remote_md5:
-            local_md5 = _calculate_local_md5(local_path)
+            # Hash off the event loop so other transfers keep moving
+            local_md5 = local_md5 or await asyncio.to_thread(_calculate_local_md5, local_path)
             if local_md5 == remote_md5:
                 return True, "Verified (MD5 match)"
             else:
@@ -686,61 +887,79 @@ async def verify_file(
     except Exception:
         pass  # Fall back to size comparison
 
-    # Step 3: Fall back to size comparison
-    if local_size == remote_size:
-        return True, "Verified (size match only - no checksum available)"
-    else:
-        return False, f"Size mismatch (local: {local_size}, remote: {remote_size})"
+    # Step 3: Fall back to the size match
+    return True, VERIFIED_SIZE_ONLY
+
+
+# "filename CRC32" lines of an SFV file; lines starting with ";" are comments
+_SFV_LINE = re.compile(r"^[ \t]*(?P<name>[^;\s][^\n]*?)[ \t]+(?P<hash>[0-9a-fA-F]{8})\s*?$", re.M)
+
+# "hash  filename" or "hash *filename" lines of md5sum/b2sum output, by hash length
+_SUMS_LINE = {
+    hex_len: re.compile(
+        rf"^[ \t]*(?P<hash>[0-9a-fA-F]{{{hex_len}}})[ \t]+\*?(?P<name>[^\n]*?)\s*?$", re.M
+    )
+    for hex_len in (32, 128)
+}
+
+
+def _find_listed_checksum(line_re: re.Pattern[str], content: bytes, filename: str) -> str | None:
+    """Return the lowercased hash of the first line listing filename, if any.
+
+    One finditer over the whole file rather than a split and a match per line.
+    """
+    wanted = filename.lower()
+    for match in line_re.finditer(content.decode("utf-8", errors="ignore")):
+        if match["name"].lower() == wanted:
+            return match["hash"].lower()
+    return None
 
 
 async def _verify_sfv(
     sfv_path: str, filename: str, local_path: str, sftp: SFTPClient
 ) -> bool | None:
     """Check file against SFV (Simple File Verification) file."""
-    import zlib
-
     try:
         content = await sftp.read_file(sfv_path)
-        lines = content.decode("utf-8", errors="ignore").splitlines()
-
-        for line in lines:
-            line = line.strip()
-            if line.startswith(";") or not line:
-                continue
-            # SFV format: filename CRC32
-            match = re.match(r"(.+?)\s+([0-9a-fA-F]{8})$", line)
-            if match and match.group(1).lower() == filename.lower():
-                expected_crc = match.group(2).lower()
-                # Calculate local CRC32
-                crc = 0
-                with open(local_path, "rb") as f:
-                    for chunk in iter(lambda: f.read(65536), b""):
-                        crc = zlib.crc32(chunk, crc)
-                actual_crc = format(crc & 0xFFFFFFFF, "08x")
-                return actual_crc == expected_crc
+        expected_crc = _find_listed_checksum(_SFV_LINE, content, filename)
+        if expected_crc is not None:
+            actual_crc = await asyncio.to_thread(_calculate_local_crc32, local_path)
+            return actual_crc == expected_crc
     except (SFTPError, UnicodeDecodeError, OSError):
         pass
     return None
 
 
+async def _read_listed_hash(
+    sums_path: str, filename: str, hex_len: int, sftp: SFTPClient
+) -> str | None:
+    """Find filename's hash in an md5sum/b2sum style checksum file."""
+    content = await sftp.read_file(sums_path)
+    return _find_listed_checksum(_SUMS_LINE[hex_len], content, filename)
+
+
 async def _verify_md5_file(
-    md5_path: str, filename: str, local_path: str, sftp: SFTPClient
+    md5_path: str, filename: str, local_path: str, sftp: SFTPClient, local_md5: str | None = None
 ) -> bool | None:
     """Check file against MD5 checksum file."""
     try:
-        content = await sftp.read_file(md5_path)
-        lines = content.decode("utf-8", errors="ignore").splitlines()
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            # MD5 format: hash *filename or hash  filename
-            match = re.match(r"([0-9a-fA-F]{32})\s+\*?(.+)$", line)
-            if match and match.group(2).strip().lower() == filename.lower():
-                expected_md5 = match.group(1).lower()
-                actual_md5 = _calculate_local_md5(local_path)
-                return actual_md5 == expected_md5
+        expected_md5 = await _read_listed_hash(md5_path, filename, 32, sftp)
+        if expected_md5 is not None:
+            actual_md5 = local_md5 or await asyncio.to_thread(_calculate_local_md5, local_path)
+            return actual_md5 == expected_md5
+    except (SFTPError, UnicodeDecodeError, OSError):
+        pass
+    return None
+
+
+async def _verify_b2_file(
+    b2_path: str, filename: str, local_path: str, sftp: SFTPClient
+) -> bool | None:
+    """Check file against a b2sum (BLAKE2b-512) checksum file."""
+    try:
+        expected = await _read_listed_hash(b2_path, filename, 128, sftp)
+        if expected is not None:
+            return await asyncio.to_thread(_calculate_local_blake2b, local_path) == expected
     except (SFTPError, UnicodeDecodeError, OSError):
         pass
     return None
@@ -0,0 +1,49 @@
+"""Verification of existing local files against their remote source."""
+
+from dataclasses import dataclass
+from typing import Literal
+
+from queued.sftp import SFTPClient
+from queued.transfer import VERIFIED_SIZE_ONLY, verify_file
+
+VerifyStatus = Literal["success", "warning", "error"]
+
+
+@dataclass
+class VerifyResult:
+    """Outcome of verifying a local file, ready for display."""
+
+    status: VerifyStatus
+    message: str
+
+
+async def verify_existing_file(
+    remote_path: str | None,
+    local_path: str | None,
+    remote_size: int,
+    sftp: SFTPClient | None,
+) -> VerifyResult:
+    """Verify an existing local file and classify the outcome.
+
+    A successful check that only compared sizes is reported as a warning,
+    since no checksum was available to confirm the contents.
+
+    Args:
+        remote_path: Path to remote file
+        local_path: Path to local file
+        remote_size: Expected size from remote file info
+        sftp: Connected SFTP client
+
+    Returns:
+        VerifyResult whose status matches the modal's result label styles
+    """
+    if not sftp or not remote_path or not local_path:
+        return VerifyResult("error", "Missing verification parameters")
+
+    success, message = await verify_file(remote_path, local_path, remote_size, sftp)
+
+    if not success:
+        return VerifyResult("error", message)
+    if message == VERIFIED_SIZE_ONLY:
+        return VerifyResult("warning", message)
+    return VerifyResult("success", message)
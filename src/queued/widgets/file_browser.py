@@ -8,6 +8,7 @@ from textual.binding import Binding
 from textual.containers import Vertical
 from textual.message import Message
 from textual.widgets import DataTable, Label, Static
+from textual.worker import Worker
 
 from queued.models import RemoteFile, TransferQueue, TransferStatus
 from queued.sftp import SFTPClient, SFTPError, is_connection_error
@@ -153,9 +154,9 @@ class FileBrowser(Static):
         finally:
             self._loading = False
 
-    def refresh_directory(self) -> None:
-        """Refresh current directory, preserving selections."""
-        self.load_directory(self.current_path)
+    def refresh_directory(self) -> Worker[None]:
+        """Refresh current directory, preserving selections, and return the loading worker."""
+        return self.load_directory(self.current_path)
 
     def _update_table(self) -> None:
         """Update the data table with current files using in-place updates."""
@@ -1,7 +1,5 @@
 """Transfer queue list widget with progress display."""
 
-import time
-
 from textual.app import ComposeResult
 from textual.binding import Binding
 from textual.containers import Vertical
@@ -10,7 +8,7 @@ from textual.widgets import DataTable, Label, Static
 
 from queued.models import Transfer, TransferQueue, TransferStatus
 
-# Minimum interval between UI refreshes (100ms = 10 updates/sec max)
+# Interval between coalesced progress refreshes (100ms = 10 updates/sec max)
 MIN_REFRESH_INTERVAL = 0.1
 
 
@@ -73,8 +71,12 @@ class TransferList(Static):
     def __init__(self, id: str | None = None) -> None:
         super().__init__(id=id)
         self.queue: TransferQueue | None = None
-        self._last_refresh_time: float = 0.0
-        self._refresh_pending: bool = False
+        # Transfers updated since the last flush, rendered together on the next tick
+        self._dirty: set[str] = set()
+        # Last values written to each row, so refreshes only touch changed cells
+        self._last_values: dict[str, tuple] = {}
+        # Transfer ids in table row order, for O(1) cursor row -> id lookups
+        self._row_order: list[str] = []
 
     def compose(self) -> ComposeResult:
         with Vertical():
@@ -87,6 +89,7 @@ class TransferList(Static):
         table = self.query_one("#transfer-table", DataTable)
         table.add_columns("File", "Progress", "Speed", "ETA", "Status")
         table.cursor_type = "row"
+        self.set_interval(MIN_REFRESH_INTERVAL, self._flush_dirty)
 
     def set_queue(self, queue: TransferQueue) -> None:
         """Set the transfer queue to display."""
@@ -99,27 +102,41 @@ class TransferList(Static):
             return
 
         table = self.query_one("#transfer-table", DataTable)
-        current_keys = {key.value for key in table.rows}
+        last_values = self._last_values
         new_keys = {t.id for t in self.queue.transfers}
 
         # Remove rows that no longer exist
-        for key in current_keys - new_keys:
+        removed = last_values.keys() - new_keys
+        for key in removed:
             table.remove_row(key)
+            del last_values[key]
+        if removed:
+            self._row_order = [key for key in self._row_order if key not in removed]
 
-        # Update or add rows
+        # Update changed cells or add rows
+        col_keys = list(table.columns.keys())
         for transfer in self.queue.transfers:
-            row_data = self._build_row_data(transfer)
-            if transfer.id in current_keys:
-                # Update existing row cells
-                for col_idx, value in enumerate(row_data):
-                    col_key = list(table.columns.keys())[col_idx]
-                    table.update_cell(transfer.id, col_key, value)
+            if transfer.id in last_values:
+                self._update_row(table, col_keys, transfer)
             else:
-                # Add new row
+                row_data = self._build_row_data(transfer)
                 table.add_row(*row_data, key=transfer.id)
+                last_values[transfer.id] = row_data
+                self._row_order.append(transfer.id)
 
+        self._dirty.clear()
         self._update_status()
 
+    def _update_row(self, table: DataTable, col_keys: list, transfer: Transfer) -> None:
+        """Write the cells of an existing row that changed since it was last drawn."""
+        row_data = self._build_row_data(transfer)
+        previous = self._last_values[transfer.id]
+        if previous != row_data:
+            for col_key, old, value in zip(col_keys, previous, row_data, strict=True):
+                if old != value:
+                    table.update_cell(transfer.id, col_key, value)
+            self._last_values[transfer.id] = row_data
+
     def _build_row_data(self, transfer: Transfer) -> tuple:
         """Build row data tuple for a transfer."""
         return (
@@ -188,10 +205,11 @@ class TransferList(Static):
 
         label = self.query_one("#transfers-status", Label)
 
+        transfers = self.queue.transfers
         active = self.queue.active_count
-        queued = len([t for t in self.queue.transfers if t.status == TransferStatus.QUEUED])
-        paused = len([t for t in self.queue.transfers if t.status == TransferStatus.PAUSED])
-        completed = len([t for t in self.queue.transfers if t.status == TransferStatus.COMPLETED])
+        queued = transfers.count_with_status(TransferStatus.QUEUED)
+        paused = transfers.count_with_status(TransferStatus.PAUSED)
+        completed = transfers.count_with_status(TransferStatus.COMPLETED)
 
         parts = [f"Active: {active}"]
         if queued > 0:
@@ -207,17 +225,20 @@ class TransferList(Static):
         """Handle row selection (Enter key) - toggle pause/resume."""
         self.action_toggle_pause()
 
+    def _selected_transfer_id(self, table: DataTable) -> str | None:
+        """Get the ID of the transfer under the cursor, if any."""
+        row = table.cursor_row
+        if row is None or not 0 <= row < len(self._row_order):
+            return None
+        return self._row_order[row]
+
     def action_toggle_pause(self) -> None:
         """Pause or resume the selected transfer."""
         table = self.query_one("#transfer-table", DataTable)
-        if table.cursor_row is None or not self.queue:
+        transfer_id = self._selected_transfer_id(table)
+        if transfer_id is None or not self.queue:
             return
 
-        keys = list(table.rows.keys())
-        if table.cursor_row >= len(keys):
-            return
-
-        transfer_id = str(keys[table.cursor_row].value)
         transfer = self.queue.get_by_id(transfer_id)
 
         if transfer:
@@ -233,14 +254,10 @@ class TransferList(Static):
     def action_remove(self) -> None:
         """Remove the selected transfer."""
         table = self.query_one("#transfer-table", DataTable)
-        if table.cursor_row is None or not self.queue:
+        transfer_id = self._selected_transfer_id(table)
+        if transfer_id is None or not self.queue:
             return
 
-        keys = list(table.rows.keys())
-        if table.cursor_row >= len(keys):
-            return
-
-        transfer_id = str(keys[table.cursor_row].value)
         self.post_message(self.TransferAction(transfer_id, "remove"))
 
     def action_cursor_down(self) -> None:
@@ -266,14 +283,10 @@ class TransferList(Static):
     def action_move_up(self) -> None:
         """Move selected transfer up in queue."""
         table = self.query_one("#transfer-table", DataTable)
-        if table.cursor_row is None or not self.queue:
-            return
-
-        keys = list(table.rows.keys())
-        if table.cursor_row >= len(keys):
+        transfer_id = self._selected_transfer_id(table)
+        if transfer_id is None or not self.queue:
             return
 
-        transfer_id = str(keys[table.cursor_row].value)
         if self.queue.move_up(transfer_id):
             self.refresh_display()
             table.move_cursor(row=max(0, table.cursor_row - 1))
@@ -281,40 +294,40 @@ class TransferList(Static):
     def action_move_down(self) -> None:
         """Move selected transfer down in queue."""
         table = self.query_one("#transfer-table", DataTable)
-        if table.cursor_row is None or not self.queue:
-            return
-
-        keys = list(table.rows.keys())
-        if table.cursor_row >= len(keys):
+        transfer_id = self._selected_transfer_id(table)
+        if transfer_id is None or not self.queue:
             return
 
-        transfer_id = str(keys[table.cursor_row].value)
         if self.queue.move_down(transfer_id):
             self.refresh_display()
             table.move_cursor(row=min(len(self.queue.transfers) - 1, table.cursor_row + 1))
 
     def update_transfer(self, transfer: Transfer) -> None:
-        """Update a single transfer's display with debouncing.
+        """Mark a transfer's row for redraw on the next refresh tick.
 
-        Limits refreshes to max 10 per second to prevent UI lag.
+        Progress callbacks can fire once per SFTP chunk; coalescing them limits
+        redraws to max 10 per second to prevent UI lag.
         """
-        now = time.monotonic()
-        elapsed = now - self._last_refresh_time
+        self._dirty.add(transfer.id)
 
-        if elapsed >= MIN_REFRESH_INTERVAL:
-            # Enough time has passed, refresh immediately
-            self._last_refresh_time = now
-            self._refresh_pending = False
-            self.refresh_display()
-        elif not self._refresh_pending:
-            # Schedule a delayed refresh
-            self._refresh_pending = True
-            delay = MIN_REFRESH_INTERVAL - elapsed
-            self.set_timer(delay, self._do_pending_refresh)
-
-    def _do_pending_refresh(self) -> None:
-        """Execute pending refresh after debounce delay."""
-        if self._refresh_pending:
-            self._refresh_pending = False
-            self._last_refresh_time = time.monotonic()
+    def _flush_dirty(self) -> None:
+        """Redraw rows of transfers updated since the last tick."""
+        if not self._dirty or not self.queue:
+            return
+
+        dirty = self._dirty
+        self._dirty = set()
+        if not dirty <= self._last_values.keys():
+            # A transfer without a row yet needs the full add/remove pass
             self.refresh_display()
+            return
+
+        table = self.query_one("#transfer-table", DataTable)
+        col_keys = list(table.columns.keys())
+        for transfer_id in dirty:
+            transfer = self.queue.get_by_id(transfer_id)
+            if transfer is None:
+                self.refresh_display()
+                return
+            self._update_row(table, col_keys, transfer)
+        self._update_status()
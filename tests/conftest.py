@@ -1,16 +1,31 @@
 """Pytest fixtures for Queued tests."""
 
+import hashlib
+from pathlib import Path
+from typing import NamedTuple
+
 import pytest
+import pytest_asyncio
 
 from queued.models import AppSettings, RemoteFile
 
 from .mocks.sftp_mock import MockSFTPClient, create_mock_files, create_mock_host
 
 
+@pytest.fixture(scope="session")
+def mock_files_template() -> tuple[RemoteFile, ...]:
+    """Build the standard mock files once per session."""
+    return tuple(create_mock_files())
+
+
 @pytest.fixture
-def mock_files() -> list[RemoteFile]:
-    """Provide standard mock files for testing."""
-    return create_mock_files()
+def mock_files(mock_files_template: tuple[RemoteFile, ...]) -> list[RemoteFile]:
+    """Provide standard mock files for testing.
+
+    The list is fresh per test, but its RemoteFile entries are shared and must
+    not be modified.
+    """
+    return list(mock_files_template)
 
 
 @pytest.fixture
@@ -20,6 +35,27 @@ def mock_sftp(mock_files: list[RemoteFile]) -> MockSFTPClient:
     return client
 
 
+@pytest_asyncio.fixture(scope="module")
+async def connected_mock_sftp() -> MockSFTPClient:
+    """Provide a connected mock SFTP client shared across a test module.
+
+    Only use this in tests that read from the client; state recorded on it
+    (call counts, listed paths) accumulates across tests.
+    """
+    client = MockSFTPClient(create_mock_files())
+    await client.connect()
+    return client
+
+
+@pytest.fixture
+def cache_tmpdir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point the config and cache directories at a per-test temp directory."""
+    monkeypatch.setattr("queued.config.get_cache_dir", lambda: tmp_path)
+    monkeypatch.setattr("queued.config.get_config_dir", lambda: tmp_path)
+    monkeypatch.setattr("queued.config._QUEUE_FILE_CACHE", {})
+    return tmp_path
+
+
 @pytest.fixture
 def mock_host():
     """Provide a mock host."""
@@ -37,3 +73,37 @@ def app_settings() -> AppSettings:
         verify_checksums=False,
         resume_transfers=False,
     )
+
+
+class Payload(NamedTuple):
+    """A local file with known content and MD5 for verification tests."""
+
+    path: Path
+    content: bytes
+    md5: str
+
+
+CANONICAL_PAYLOADS = {
+    "verification": b"test content for verification",
+    "checksum": b"test content for checksum verification",
+    "downloaded": b"already downloaded content",
+    "corrupted": b"corrupted content",
+    "local": b"local content",
+    "content": b"test content",
+    "test": b"test",
+}
+
+
+@pytest.fixture(scope="session")
+def canonical_payloads(tmp_path_factory: pytest.TempPathFactory) -> dict[str, Payload]:
+    """Provide local files with precomputed MD5s, shared across the session.
+
+    Tests must treat these files as read-only.
+    """
+    root = tmp_path_factory.mktemp("verify")
+    payloads = {}
+    for name, content in CANONICAL_PAYLOADS.items():
+        path = root / f"{name}.bin"
+        path.write_bytes(content)
+        payloads[name] = Payload(path, content, hashlib.md5(content).hexdigest())
+    return payloads
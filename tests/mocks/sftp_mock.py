@@ -1,14 +1,32 @@
 """Mock SFTP client for testing without network."""
 
+import copy
+import functools
 from collections.abc import Callable
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Self
 
 from queued.models import Host, RemoteFile
 
 
 class MockSFTPClient:
-    """Mock SFTP client for testing without network connections."""
+    """Mock SFTP client for testing without network connections.
+
+    Methods are coroutines so they can stand in for SFTPClient, but none of
+    them await anything: results are returned in the caller's tick without
+    yielding to the event loop.
+    """
+
+    _OPTIONS = frozenset(
+        {
+            "files",
+            "remote_md5_results",
+            "md5_available",
+            "file_contents",
+            "fail_on_md5",
+            "fail_on_list_dir",
+        }
+    )
 
     def __init__(
         self,
@@ -37,6 +55,8 @@ class MockSFTPClient:
         self._file_contents = file_contents or {}
         self._fail_on_md5 = fail_on_md5
         self._fail_on_list_dir = fail_on_list_dir
+        # list_dir results per directory; the file listing never changes
+        self._listings: dict[str, list[RemoteFile]] = {}
         # Track calls for assertions
         self.connect_calls = 0
         self.disconnect_calls = 0
@@ -44,6 +64,38 @@ class MockSFTPClient:
         self.compute_remote_md5_calls: list[str] = []
         self.read_file_calls: list[str] = []
 
+    def clone_with(self, **overrides) -> Self:
+        """Return a shallow copy with some constructor options overridden.
+
+        Configuration not overridden (e.g. the file listing) is shared with
+        this instance and must be treated as read-only. Connection state and
+        call tracking start fresh on the clone.
+
+        Args:
+            **overrides: Any of the keyword arguments accepted by __init__
+        """
+        unknown = overrides.keys() - self._OPTIONS
+        if unknown:
+            raise TypeError(f"Unknown MockSFTPClient options: {sorted(unknown)}")
+        clone = copy.copy(self)
+        for name, value in overrides.items():
+            setattr(clone, f"_{name}", value)
+        clone._connected = False
+        clone._current_dir = "/"
+        clone._listings = {}
+        clone.__dict__.pop("files_only", None)
+        clone.connect_calls = 0
+        clone.disconnect_calls = 0
+        clone.list_dir_calls = []
+        clone.compute_remote_md5_calls = []
+        clone.read_file_calls = []
+        return clone
+
+    @functools.cached_property
+    def files_only(self) -> list[RemoteFile]:
+        """Non-directory entries of the root listing, computed once."""
+        return [f for f in self._filter_by_parent("/") if not f.is_dir]
+
     @property
     def connected(self) -> bool:
         return self._connected
@@ -60,10 +112,18 @@ class MockSFTPClient:
         self.list_dir_calls.append(path)
         if self._fail_on_list_dir:
             raise ConnectionResetError(54, "Connection reset by peer")
-        # Filter files by parent path
-        if path == "/" or path == ".":
+        if path == ".":
+            path = "/"
+        listing = self._listings.get(path)
+        if listing is None:
+            listing = self._listings[path] = self._filter_by_parent(path)
+        # Copy so callers can reorder or trim their result without touching the cache
+        return list(listing)
+
+    def _filter_by_parent(self, path: str) -> list[RemoteFile]:
+        """Return the mock files whose parent directory is path."""
+        if path == "/":
             return [f for f in self._files if "/" not in f.path.lstrip("/")]
-        # Return files under this path
         result = []
         for f in self._files:
             parent = "/".join(f.path.rsplit("/", 1)[:-1]) or "/"
@@ -84,13 +144,14 @@ class MockSFTPClient:
         progress_callback: Optional[Callable[[int, int], None]] = None,
         resume_offset: int = 0,
         bandwidth_limit: Optional[int] = None,
-    ) -> None:
+        compute_md5: bool = False,
+    ) -> Optional[str]:
         # Simulate download progress
         for f in self._files:
             if f.path == remote_path:
                 if progress_callback:
                     progress_callback(f.size, f.size)
-                return
+                return None
         raise Exception(f"File not found: {remote_path}")
 
     async def get_pwd(self) -> str:
@@ -108,6 +169,13 @@ class MockSFTPClient:
             return None
         return self._remote_md5_results.get(path)
 
+    async def compute_remote_md5_many(self, paths: list[str]) -> dict[str, str]:
+        """Return configured MD5 hashes for the paths that have one."""
+        self.compute_remote_md5_calls.extend(paths)
+        if self._fail_on_md5 or not self._md5_available:
+            return {}
+        return {p: self._remote_md5_results[p] for p in paths if p in self._remote_md5_results}
+
     async def read_file(self, path: str, max_size: int = 1024 * 1024) -> bytes:
         """Return configured file contents."""
         self.read_file_calls.append(path)
@@ -1,18 +1,62 @@
 """Integration tests for Queued app."""
 
-import hashlib
-import tempfile
+import asyncio
+import os
+from collections.abc import Callable
+from datetime import datetime
 from pathlib import Path
+from unittest.mock import AsyncMock, patch
 
 import pytest
+import pytest_asyncio
 from textual.app import App, ComposeResult
-from textual.widgets import Button, Checkbox
+from textual.pilot import Pilot
+from textual.widgets import Button, Checkbox, Label
 
-from queued.app import FileExistsModal
-from queued.models import RemoteFile
+from queued.app import FileExistsModal, QueuedApp
+from queued.models import Host, RemoteFile
+from queued.sftp import SFTPClient
+from queued.transfer import VERIFIED_SIZE_ONLY
 from queued.widgets.file_browser import FileBrowser
 
-from .mocks.sftp_mock import MockSFTPClient, create_mock_files
+from .mocks.sftp_mock import MockSFTPClient
+
+pytestmark = pytest.mark.textual
+
+# Prototype mock; tests clone it with per-test overrides
+_BASE_MOCK = MockSFTPClient()
+
+# Shared response stubs for the patched SFTPClient; call history is reset after each test
+_EMPTY_LIST = AsyncMock(return_value=[])
+_PWD_ROOT = AsyncMock(return_value="/")
+
+
+async def wait_for(
+    pilot: Pilot, predicate: Callable[[], bool], timeout: float = 2.0, interval: float = 0.01
+) -> None:
+    """Pause the pilot until predicate() is truthy or the timeout elapses.
+
+    Args:
+        pilot: Pilot driving the app under test
+        predicate: Condition to poll between pauses
+        timeout: Maximum time to wait in seconds
+        interval: Delay passed to each pilot.pause() call
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate() and loop.time() < deadline:
+        await pilot.pause(interval)
+
+
+async def wait_mounted(modal: FileExistsModal, timeout: float = 2.0) -> None:
+    """Wait until the modal has mounted its widgets."""
+    await asyncio.wait_for(modal.mounted_event.wait(), timeout=timeout)
+
+
+def verify_finished(modal: FileExistsModal) -> bool:
+    """Check whether the modal's verify worker has reported a result."""
+    content = str(modal.query_one("#verify-result", Label).content)
+    return bool(content) and content != "Verifying..."
 
 
 class FileBrowserTestApp(App):
@@ -42,13 +86,65 @@ class FileExistsModalTestApp(App):
         return self._modal
 
 
+def _make_modal(
+    local_size: int = 1000,
+    remote_size: int = 1000,
+    local_path: str = "/local/file.txt",
+    sftp: MockSFTPClient | None = None,
+) -> FileExistsModal:
+    """Build a FileExistsModal for /remote/file.txt with a fresh mock client by default."""
+    return FileExistsModal(
+        "file.txt",
+        local_size=local_size,
+        remote_size=remote_size,
+        remote_path="/remote/file.txt",
+        local_path=local_path,
+        sftp=sftp or _BASE_MOCK.clone_with(),
+    )
+
+
+@pytest_asyncio.fixture
+async def modal_pilot(request: pytest.FixtureRequest):
+    """Mount a FileExistsModal for a 1000-byte remote file.
+
+    Parametrize indirectly with the local file size.
+    """
+    modal = _make_modal(local_size=request.param)
+    app = FileExistsModalTestApp(modal)
+    async with app.run_test() as pilot:
+        await wait_mounted(modal)
+        yield app, pilot, modal
+
+
+@pytest.fixture
+def patched_sftp_client():
+    """Patch queued.app.SFTPClient with a connected client whose home is an empty '/'."""
+    with patch("queued.app.SFTPClient") as mock_sftp_class:
+        mock_sftp = AsyncMock(spec=SFTPClient)
+        mock_sftp.connected = True
+        mock_sftp.list_dir = _EMPTY_LIST
+        mock_sftp.get_pwd = _PWD_ROOT
+        mock_sftp_class.return_value = mock_sftp
+        yield mock_sftp
+    _EMPTY_LIST.reset_mock()
+    _PWD_ROOT.reset_mock()
+
+
+@pytest_asyncio.fixture
+async def queued_app_pilot(mock_host: Host, tmp_path: Path, patched_sftp_client):
+    """Run a QueuedApp with a mocked SFTP client, downloading into tmp_path."""
+    app = QueuedApp(host=mock_host, download_dir=str(tmp_path))
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        yield app, pilot, tmp_path
+
+
 class TestConnectionIntegration:
     """Integration tests for connection flow."""
 
-    async def test_connection_loads_directory(self):
+    async def test_connection_loads_directory(self, connected_mock_sftp: MockSFTPClient):
         """After successful connection, file browser should display files."""
-        sftp = MockSFTPClient(create_mock_files())
-        await sftp.connect()
+        sftp = connected_mock_sftp
 
         app = FileBrowserTestApp(sftp)
         async with app.run_test() as pilot:
@@ -68,10 +164,9 @@ class TestConnectionIntegration:
             )
             assert browser.current_path == "/"
 
-    async def test_connection_sets_path_label(self):
+    async def test_connection_sets_path_label(self, connected_mock_sftp: MockSFTPClient):
         """After connection, path label should show current directory."""
-        sftp = MockSFTPClient(create_mock_files())
-        await sftp.connect()
+        sftp = connected_mock_sftp
 
         app = FileBrowserTestApp(sftp)
         async with app.run_test() as pilot:
@@ -88,707 +183,395 @@ class TestConnectionIntegration:
 class TestFileExistsModalVerify:
     """Tests for FileExistsModal verify functionality."""
 
-    @pytest.mark.asyncio
-    async def test_verify_button_shown_when_file_complete(self):
-        """Verify button should appear when local_size >= remote_size."""
-        mock_sftp = MockSFTPClient()
-
-        # File appears complete (same size)
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=1000,
-            remote_size=1000,
-            remote_path="/remote/file.txt",
-            local_path="/local/file.txt",
-            sftp=mock_sftp,
-        )
-
-        app = FileExistsModalTestApp(modal)
-        async with app.run_test() as pilot:
-            await pilot.pause()  # Wait for modal to mount
-            # Verify button should exist
-            verify_btns = app.modal.query("#verify-btn")
-            assert len(verify_btns) == 1, "Verify button should be shown for complete file"
+    async def test_verify_success_shows_result(self, canonical_payloads):
+        """Clicking Verify should show success message when hashes match."""
+        local_path, content, expected_md5 = canonical_payloads["verification"]
 
-    @pytest.mark.asyncio
-    async def test_verify_button_hidden_when_file_partial(self):
-        """Verify button should not appear when local_size < remote_size."""
-        mock_sftp = MockSFTPClient()
+        # Mock SFTP with matching MD5
+        mock_sftp = _BASE_MOCK.clone_with(remote_md5_results={"/remote/file.txt": expected_md5})
 
-        # File is partial (local smaller than remote)
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=500,
-            remote_size=1000,
-            remote_path="/remote/file.txt",
-            local_path="/local/file.txt",
+        modal = _make_modal(
+            local_size=len(content),
+            remote_size=len(content),
+            local_path=str(local_path),
             sftp=mock_sftp,
         )
 
         app = FileExistsModalTestApp(modal)
         async with app.run_test() as pilot:
-            await pilot.pause()  # Wait for modal to mount
-            # Verify button should NOT exist
-            verify_btns = app.modal.query("#verify-btn")
-            assert len(verify_btns) == 0, "Verify button should not be shown for partial file"
-
-            # Continue button SHOULD exist for resume
-            continue_btns = app.modal.query("#continue-btn")
-            assert len(continue_btns) == 1, "Continue button should be shown for partial file"
-
-    @pytest.mark.asyncio
-    async def test_verify_button_hidden_without_sftp(self):
-        """Verify button should not appear when sftp client not provided."""
-        # No sftp client
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=1000,
-            remote_size=1000,
-        )
+            await wait_mounted(app.modal)
+            # Click the Verify button
+            verify_btn = app.modal.query_one("#verify-btn", Button)
+            await pilot.click(verify_btn)
 
-        app = FileExistsModalTestApp(modal)
-        async with app.run_test() as pilot:
-            await pilot.pause()  # Wait for modal to mount
-            # Verify button should NOT exist without sftp
-            verify_btns = app.modal.query("#verify-btn")
-            assert len(verify_btns) == 0, "Verify button requires sftp client"
+            # Wait for async verification to complete
+            await wait_for(pilot, lambda: verify_finished(app.modal))
 
-    @pytest.mark.asyncio
-    async def test_verify_success_shows_result(self):
-        """Clicking Verify should show success message when hashes match."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create a local file
-            local_path = Path(tmpdir) / "file.txt"
-            content = b"test content for verification"
-            local_path.write_bytes(content)
-            expected_md5 = hashlib.md5(content).hexdigest()
-
-            # Mock SFTP with matching MD5
-            mock_sftp = MockSFTPClient(remote_md5_results={"/remote/file.txt": expected_md5})
-
-            modal = FileExistsModal(
-                "file.txt",
-                local_size=len(content),
-                remote_size=len(content),
-                remote_path="/remote/file.txt",
-                local_path=str(local_path),
-                sftp=mock_sftp,
-            )
-
-            app = FileExistsModalTestApp(modal)
-            async with app.run_test() as pilot:
-                await pilot.pause()  # Wait for modal to mount
-                # Click the Verify button
-                verify_btn = app.modal.query_one("#verify-btn", Button)
-                await pilot.click(verify_btn)
-
-                # Wait for async verification to complete
-                await pilot.pause()
-                await pilot.pause()  # Extra pause for worker
-
-                # Check result label shows success
-                result_label = app.modal.query_one("#verify-result")
-                assert "MD5 match" in str(result_label.content)
+            # Check result label shows success
+            result_label = app.modal.query_one("#verify-result")
+            assert "MD5 match" in str(result_label.content)
 
-    @pytest.mark.asyncio
-    async def test_verify_failure_shows_error(self):
+    async def test_verify_failure_shows_error(self, canonical_payloads):
         """Clicking Verify should show error when hashes don't match."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create a local file
-            local_path = Path(tmpdir) / "file.txt"
-            local_path.write_bytes(b"local content")
-
-            # Mock SFTP with DIFFERENT MD5
-            mock_sftp = MockSFTPClient(
-                remote_md5_results={"/remote/file.txt": "different_hash_1234567890"}
-            )
+        local_path, content, _ = canonical_payloads["local"]
 
-            modal = FileExistsModal(
-                "file.txt",
-                local_size=100,
-                remote_size=100,
-                remote_path="/remote/file.txt",
-                local_path=str(local_path),
-                sftp=mock_sftp,
-            )
+        # Mock SFTP with DIFFERENT MD5
+        mock_sftp = _BASE_MOCK.clone_with(
+            remote_md5_results={"/remote/file.txt": "different_hash_1234567890"}
+        )
 
-            app = FileExistsModalTestApp(modal)
-            async with app.run_test() as pilot:
-                await pilot.pause()  # Wait for modal to mount
-                # Click the Verify button
-                verify_btn = app.modal.query_one("#verify-btn", Button)
-                await pilot.click(verify_btn)
-
-                # Wait for async verification
-                await pilot.pause()
-                await pilot.pause()
-
-                # Check result label shows mismatch
-                result_label = app.modal.query_one("#verify-result")
-                assert "mismatch" in str(result_label.content).lower()
-
-    @pytest.mark.asyncio
-    async def test_verify_fallback_to_size_when_md5_unavailable(self):
-        """Should fall back to size comparison when md5sum not available."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            local_path = Path(tmpdir) / "file.txt"
-            content = b"test content"
-            local_path.write_bytes(content)
-
-            # Mock SFTP with md5sum unavailable
-            mock_sftp = MockSFTPClient(md5_available=False)
-
-            modal = FileExistsModal(
-                "file.txt",
-                local_size=len(content),
-                remote_size=len(content),
-                remote_path="/remote/file.txt",
-                local_path=str(local_path),
-                sftp=mock_sftp,
-            )
+        # Matching sizes, so verification gets as far as comparing hashes
+        modal = _make_modal(
+            local_size=len(content),
+            remote_size=len(content),
+            local_path=str(local_path),
+            sftp=mock_sftp,
+        )
 
-            app = FileExistsModalTestApp(modal)
-            async with app.run_test() as pilot:
-                await pilot.pause()  # Wait for modal to mount
-                verify_btn = app.modal.query_one("#verify-btn", Button)
-                await pilot.click(verify_btn)
+        app = FileExistsModalTestApp(modal)
+        async with app.run_test() as pilot:
+            await wait_mounted(app.modal)
+            # Click the Verify button
+            verify_btn = app.modal.query_one("#verify-btn", Button)
+            await pilot.click(verify_btn)
 
-                await pilot.pause()
-                await pilot.pause()
+            # Wait for async verification
+            await wait_for(pilot, lambda: verify_finished(app.modal))
 
-                # Should show size match warning
-                result_label = app.modal.query_one("#verify-result")
-                assert "size match only" in str(result_label.content).lower()
+            # Check result label shows the MD5 mismatch, not a size mismatch
+            result_label = app.modal.query_one("#verify-result")
+            assert str(result_label.content).startswith("MD5 mismatch")
 
-    @pytest.mark.asyncio
-    async def test_buttons_remain_after_verify(self):
+    async def test_buttons_remain_after_verify(self, canonical_payloads):
         """Replace and Cancel buttons should still work after verification."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            local_path = Path(tmpdir) / "file.txt"
-            local_path.write_bytes(b"test")
+        local_path, _, expected_md5 = canonical_payloads["test"]
 
-            mock_sftp = MockSFTPClient(
-                remote_md5_results={"/remote/file.txt": hashlib.md5(b"test").hexdigest()}
-            )
+        mock_sftp = _BASE_MOCK.clone_with(remote_md5_results={"/remote/file.txt": expected_md5})
 
-            modal = FileExistsModal(
-                "file.txt",
-                local_size=4,
-                remote_size=4,
-                remote_path="/remote/file.txt",
-                local_path=str(local_path),
-                sftp=mock_sftp,
-            )
+        modal = _make_modal(local_size=4, remote_size=4, local_path=str(local_path), sftp=mock_sftp)
 
-            app = FileExistsModalTestApp(modal)
-            async with app.run_test() as pilot:
-                await pilot.pause()  # Wait for modal to mount
-                # Verify first
-                verify_btn = app.modal.query_one("#verify-btn", Button)
-                await pilot.click(verify_btn)
-                await pilot.pause()
-                await pilot.pause()
+        app = FileExistsModalTestApp(modal)
+        async with app.run_test() as pilot:
+            await wait_mounted(app.modal)
+            # Verify first
+            verify_btn = app.modal.query_one("#verify-btn", Button)
+            await pilot.click(verify_btn)
+            await wait_for(pilot, lambda: verify_finished(app.modal))
 
-                # Replace and Cancel should still be enabled
-                replace_btn = app.modal.query_one("#replace-btn", Button)
-                skip_btn = app.modal.query_one("#skip-btn", Button)
-                assert not replace_btn.disabled
-                assert not skip_btn.disabled
+            # Replace and Cancel should still be enabled
+            replace_btn = app.modal.query_one("#replace-btn", Button)
+            skip_btn = app.modal.query_one("#skip-btn", Button)
+            assert not replace_btn.disabled
+            assert not skip_btn.disabled
 
 
 class TestVerifyE2E:
     """End-to-end tests for verify flow."""
 
-    @pytest.mark.asyncio
-    async def test_full_verify_flow_success(self):
+    async def test_full_verify_flow_success(self, canonical_payloads):
         """Test complete verify flow: modal appears, verify succeeds, cancel keeps file."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create a "downloaded" file locally
-            local_path = Path(tmpdir) / "testfile.txt"
-            content = b"already downloaded content"
-            local_path.write_bytes(content)
-            expected_md5 = hashlib.md5(content).hexdigest()
-
-            # Mock SFTP with matching remote MD5
-            mock_sftp = MockSFTPClient(remote_md5_results={"/remote/testfile.txt": expected_md5})
-
-            # Create modal as if user selected a file that already exists locally
-            modal = FileExistsModal(
-                "testfile.txt",
-                local_size=len(content),
-                remote_size=len(content),
-                remote_path="/remote/testfile.txt",
-                local_path=str(local_path),
-                sftp=mock_sftp,
-            )
-
-            app = FileExistsModalTestApp(modal)
-            async with app.run_test() as pilot:
-                await pilot.pause()
-
-                # 1. Verify button should be visible (file appears complete)
-                verify_btn = app.modal.query_one("#verify-btn", Button)
-                assert verify_btn is not None
-
-                # 2. Click Verify
-                await pilot.click(verify_btn)
-                await pilot.pause()
-                await pilot.pause()
-
-                # 3. Verify shows success
-                result_label = app.modal.query_one("#verify-result")
-                assert "MD5 match" in str(result_label.content)
-
-                # 4. Cancel button still available
-                skip_btn = app.modal.query_one("#skip-btn", Button)
-                assert not skip_btn.disabled
+        # Create a "downloaded" file locally
+        local_path, content, expected_md5 = canonical_payloads["downloaded"]
 
-                # 5. Original file still exists unchanged
-                assert local_path.exists()
-                assert local_path.read_bytes() == content
+        # Mock SFTP with matching remote MD5
+        mock_sftp = _BASE_MOCK.clone_with(remote_md5_results={"/remote/testfile.txt": expected_md5})
 
-    @pytest.mark.asyncio
-    async def test_full_verify_flow_mismatch_then_replace(self):
-        """Test verify fails, user can still choose to replace."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create a corrupted local file
-            local_path = Path(tmpdir) / "corrupted.txt"
-            local_path.write_bytes(b"corrupted content")
-
-            # Remote has different content
-            mock_sftp = MockSFTPClient(
-                remote_md5_results={"/remote/corrupted.txt": "different_md5_hash"}
-            )
+        # Create modal as if user selected a file that already exists locally
+        modal = FileExistsModal(
+            "testfile.txt",
+            local_size=len(content),
+            remote_size=len(content),
+            remote_path="/remote/testfile.txt",
+            local_path=str(local_path),
+            sftp=mock_sftp,
+        )
 
-            modal = FileExistsModal(
-                "corrupted.txt",
-                local_size=17,  # len("corrupted content")
-                remote_size=17,
-                remote_path="/remote/corrupted.txt",
-                local_path=str(local_path),
-                sftp=mock_sftp,
-            )
+        app = FileExistsModalTestApp(modal)
+        async with app.run_test() as pilot:
+            await wait_mounted(app.modal)
 
-            app = FileExistsModalTestApp(modal)
-            async with app.run_test() as pilot:
-                await pilot.pause()
+            # 1. Verify button should be visible (file appears complete)
+            verify_btn = app.modal.query_one("#verify-btn", Button)
+            assert verify_btn is not None
 
-                # Click Verify
-                verify_btn = app.modal.query_one("#verify-btn", Button)
-                await pilot.click(verify_btn)
-                await pilot.pause()
-                await pilot.pause()
+            # 2. Click Verify
+            await pilot.click(verify_btn)
+            await wait_for(pilot, lambda: verify_finished(app.modal))
 
-                # Verify shows mismatch
-                result_label = app.modal.query_one("#verify-result")
-                assert "mismatch" in str(result_label.content).lower()
+            # 3. Verify shows success
+            result_label = app.modal.query_one("#verify-result")
+            assert "MD5 match" in str(result_label.content)
 
-                # Replace button still available for user to re-download
-                replace_btn = app.modal.query_one("#replace-btn", Button)
-                assert not replace_btn.disabled
+            # 4. Cancel button still available
+            skip_btn = app.modal.query_one("#skip-btn", Button)
+            assert not skip_btn.disabled
 
+            # 5. Original file still exists unchanged
+            assert local_path.exists()
+            assert local_path.read_bytes() == content
 
-class TestFileExistsModalContinue:
-    """Tests for FileExistsModal continue (resume) functionality."""
+    async def test_full_verify_flow_mismatch_then_replace(self, canonical_payloads):
+        """Test verify fails, user can still choose to replace."""
+        # Create a corrupted local file
+        local_path, _, _ = canonical_payloads["corrupted"]
 
-    @pytest.mark.asyncio
-    async def test_continue_button_shown_for_partial_file(self):
-        """Continue button should appear when local_size < remote_size."""
-        mock_sftp = MockSFTPClient()
+        # Remote has different content
+        mock_sftp = _BASE_MOCK.clone_with(
+            remote_md5_results={"/remote/corrupted.txt": "different_md5_hash"}
+        )
 
-        # File is partial (local smaller than remote)
         modal = FileExistsModal(
-            "partial.txt",
-            local_size=500,
-            remote_size=1000,
-            remote_path="/remote/partial.txt",
-            local_path="/local/partial.txt",
+            "corrupted.txt",
+            local_size=17,  # len("corrupted content")
+            remote_size=17,
+            remote_path="/remote/corrupted.txt",
+            local_path=str(local_path),
             sftp=mock_sftp,
         )
 
         app = FileExistsModalTestApp(modal)
         async with app.run_test() as pilot:
-            await pilot.pause()
+            await wait_mounted(app.modal)
 
-            # Continue button SHOULD exist for partial file
-            continue_btns = app.modal.query("#continue-btn")
-            assert len(continue_btns) == 1, "Continue button should be shown for partial file"
+            # Click Verify
+            verify_btn = app.modal.query_one("#verify-btn", Button)
+            await pilot.click(verify_btn)
+            await wait_for(pilot, lambda: verify_finished(app.modal))
 
-            # Verify button should NOT exist (file not complete)
-            verify_btns = app.modal.query("#verify-btn")
-            assert len(verify_btns) == 0, "Verify button should not be shown for partial file"
-
-    @pytest.mark.asyncio
-    async def test_continue_button_hidden_for_complete_file(self):
-        """Continue button should NOT appear when local_size >= remote_size."""
-        mock_sftp = MockSFTPClient()
+            # Verify shows mismatch
+            result_label = app.modal.query_one("#verify-result")
+            assert "mismatch" in str(result_label.content).lower()
 
-        # File appears complete
-        modal = FileExistsModal(
-            "complete.txt",
-            local_size=1000,
-            remote_size=1000,
-            remote_path="/remote/complete.txt",
-            local_path="/local/complete.txt",
-            sftp=mock_sftp,
-        )
+            # Replace button still available for user to re-download
+            replace_btn = app.modal.query_one("#replace-btn", Button)
+            assert not replace_btn.disabled
+
+
+class TestFileExistsModalButtons:
+    """Tests for which action buttons FileExistsModal offers."""
+
+    @pytest.mark.parametrize(
+        ("local_size", "has_sftp", "shown"),
+        [
+            # Complete file: verify buttons shown, no resume
+            (1000, True, {"#verify-btn", "#verify-size-btn"}),
+            # Partial file: resume offered, verify buttons hidden
+            (500, True, {"#continue-btn"}),
+            # No sftp client: verification requires one
+            (1000, False, set()),
+        ],
+        ids=["complete", "partial", "no-sftp"],
+    )
+    async def test_buttons_shown(self, local_size, has_sftp, shown):
+        """Verify/Verify Size need a complete file and sftp; Continue needs a partial file."""
+        if has_sftp:
+            modal = _make_modal(local_size=local_size)
+        else:
+            modal = FileExistsModal("file.txt", local_size=local_size, remote_size=1000)
 
         app = FileExistsModalTestApp(modal)
-        async with app.run_test() as pilot:
-            await pilot.pause()
-
-            # Continue button should NOT exist
-            continue_btns = app.modal.query("#continue-btn")
-            assert len(continue_btns) == 0, "Continue button should not be shown for complete file"
-
-            # Verify button SHOULD exist
-            verify_btns = app.modal.query("#verify-btn")
-            assert len(verify_btns) == 1, "Verify button should be shown for complete file"
+        async with app.run_test():
+            await wait_mounted(app.modal)
+            for btn_id in ("#verify-btn", "#verify-size-btn", "#continue-btn"):
+                expected = 1 if btn_id in shown else 0
+                assert len(app.modal.query(btn_id)) == expected, (
+                    f"{btn_id} should {'' if expected else 'not '}be shown"
+                )
 
 
 class TestVerifyErrorHandling:
     """Tests for verify error handling scenarios."""
 
-    @pytest.mark.asyncio
-    async def test_verify_handles_connection_failure(self):
+    async def test_verify_handles_connection_failure(self, canonical_payloads):
         """Verify should show error gracefully when connection drops."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            local_path = Path(tmpdir) / "file.txt"
-            local_path.write_bytes(b"test content")
-
-            # Mock SFTP that fails on MD5 computation
-            mock_sftp = MockSFTPClient(fail_on_md5=True)
-
-            modal = FileExistsModal(
-                "file.txt",
-                local_size=12,
-                remote_size=12,
-                remote_path="/remote/file.txt",
-                local_path=str(local_path),
-                sftp=mock_sftp,
-            )
+        local_path, content, _ = canonical_payloads["content"]
 
-            app = FileExistsModalTestApp(modal)
-            async with app.run_test() as pilot:
-                await pilot.pause()
-
-                # Click Verify
-                verify_btn = app.modal.query_one("#verify-btn", Button)
-                await pilot.click(verify_btn)
-                await pilot.pause()
-                await pilot.pause()
-
-                # Should show error or fallback message
-                result_label = app.modal.query_one("#verify-result")
-                result_text = str(result_label.content).lower()
-                # Should either show error or fall back to size match
-                assert "error" in result_text or "size" in result_text
-
-                # Buttons should still work
-                replace_btn = app.modal.query_one("#replace-btn", Button)
-                skip_btn = app.modal.query_one("#skip-btn", Button)
-                assert not replace_btn.disabled
-                assert not skip_btn.disabled
-
-    @pytest.mark.asyncio
-    async def test_verify_fallback_when_md5_fails_but_sizes_match(self):
-        """When MD5 computation fails, should fall back to size comparison."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            local_path = Path(tmpdir) / "file.txt"
-            content = b"test content for fallback"
-            local_path.write_bytes(content)
-
-            # Mock SFTP that fails on MD5 but sizes will match
-            mock_sftp = MockSFTPClient(fail_on_md5=True)
-
-            modal = FileExistsModal(
-                "file.txt",
-                local_size=len(content),
-                remote_size=len(content),
-                remote_path="/remote/file.txt",
-                local_path=str(local_path),
-                sftp=mock_sftp,
-            )
+        # Mock SFTP that fails on MD5 computation
+        mock_sftp = _BASE_MOCK.clone_with(fail_on_md5=True)
 
-            app = FileExistsModalTestApp(modal)
-            async with app.run_test() as pilot:
-                await pilot.pause()
+        modal = _make_modal(
+            local_size=len(content),
+            remote_size=len(content),
+            local_path=str(local_path),
+            sftp=mock_sftp,
+        )
+
+        app = FileExistsModalTestApp(modal)
+        async with app.run_test() as pilot:
+            await wait_mounted(app.modal)
 
-                verify_btn = app.modal.query_one("#verify-btn", Button)
-                await pilot.click(verify_btn)
-                await pilot.pause()
-                await pilot.pause()
+            # Click Verify
+            verify_btn = app.modal.query_one("#verify-btn", Button)
+            await pilot.click(verify_btn)
+            await wait_for(pilot, lambda: verify_finished(app.modal))
 
-                # Should show size match fallback
-                result_label = app.modal.query_one("#verify-result")
-                result_text = str(result_label.content).lower()
-                # Accept either "size match" or an error - both are valid handling
-                assert "size" in result_text or "match" in result_text or "error" in result_text
+            # The dropped connection during remote MD5 falls back to the size check
+            assert mock_sftp.compute_remote_md5_calls == ["/remote/file.txt"]
+            result_label = app.modal.query_one("#verify-result")
+            assert str(result_label.content) == VERIFIED_SIZE_ONLY
+            assert result_label.has_class("warning")
+
+            # Buttons should still work
+            replace_btn = app.modal.query_one("#replace-btn", Button)
+            skip_btn = app.modal.query_one("#skip-btn", Button)
+            assert not replace_btn.disabled
+            assert not skip_btn.disabled
 
 
 class TestVerifyChecksumFiles:
     """Tests for verification using .md5/.sfv checksum files."""
 
-    @pytest.mark.asyncio
-    async def test_verify_uses_md5_checksum_file(self):
+    async def test_verify_uses_md5_checksum_file(self, canonical_payloads):
         """Verify should use .md5 file when present in directory."""
-        from datetime import datetime
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create local file
-            local_path = Path(tmpdir) / "testfile.bin"
-            content = b"test content for checksum verification"
-            local_path.write_bytes(content)
-            local_md5 = hashlib.md5(content).hexdigest()
-
-            # Create mock with .md5 file in same directory
-            md5_content = f"{local_md5}  testfile.bin\n".encode()
-            mock_files = [
-                RemoteFile(
-                    name="testfile.bin",
-                    path="/remote/testfile.bin",
-                    size=len(content),
-                    is_dir=False,
-                    mtime=datetime.now(),
-                ),
-                RemoteFile(
-                    name="checksums.md5",
-                    path="/remote/checksums.md5",
-                    size=len(md5_content),
-                    is_dir=False,
-                    mtime=datetime.now(),
-                ),
-            ]
-
-            mock_sftp = MockSFTPClient(
-                files=mock_files,
-                file_contents={"/remote/checksums.md5": md5_content},
-            )
+        local_path, content, local_md5 = canonical_payloads["checksum"]
+
+        # Create mock with .md5 file in same directory
+        md5_content = f"{local_md5}  testfile.bin\n".encode()
+        mock_files = [
+            RemoteFile(
+                name="testfile.bin",
+                path="/remote/testfile.bin",
+                size=len(content),
+                is_dir=False,
+                mtime=datetime.now(),
+            ),
+            RemoteFile(
+                name="checksums.md5",
+                path="/remote/checksums.md5",
+                size=len(md5_content),
+                is_dir=False,
+                mtime=datetime.now(),
+            ),
+        ]
+
+        mock_sftp = _BASE_MOCK.clone_with(
+            files=mock_files,
+            file_contents={"/remote/checksums.md5": md5_content},
+        )
 
-            modal = FileExistsModal(
-                "testfile.bin",
-                local_size=len(content),
-                remote_size=len(content),
-                remote_path="/remote/testfile.bin",
-                local_path=str(local_path),
-                sftp=mock_sftp,
-            )
+        modal = FileExistsModal(
+            "testfile.bin",
+            local_size=len(content),
+            remote_size=len(content),
+            remote_path="/remote/testfile.bin",
+            local_path=str(local_path),
+            sftp=mock_sftp,
+        )
 
-            app = FileExistsModalTestApp(modal)
-            async with app.run_test() as pilot:
-                await pilot.pause()
+        app = FileExistsModalTestApp(modal)
+        async with app.run_test() as pilot:
+            await wait_mounted(app.modal)
 
-                verify_btn = app.modal.query_one("#verify-btn", Button)
-                await pilot.click(verify_btn)
-                await pilot.pause()
-                await pilot.pause()
+            verify_btn = app.modal.query_one("#verify-btn", Button)
+            await pilot.click(verify_btn)
+            await wait_for(pilot, lambda: verify_finished(app.modal))
 
-                # Should show MD5 match from checksum file
-                result_label = app.modal.query_one("#verify-result")
-                result_text = str(result_label.content)
-                assert "MD5 match" in result_text or "match" in result_text.lower()
+            # Should show MD5 match from checksum file
+            result_label = app.modal.query_one("#verify-result")
+            result_text = str(result_label.content)
+            assert "MD5 match" in result_text or "match" in result_text.lower()
 
-    @pytest.mark.asyncio
-    async def test_verify_fallback_when_checksum_file_corrupt(self):
+    async def test_verify_fallback_when_checksum_file_corrupt(self, canonical_payloads):
         """Should fall back to remote MD5 when .md5 file is malformed."""
-        from datetime import datetime
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            local_path = Path(tmpdir) / "testfile.bin"
-            content = b"test content"
-            local_path.write_bytes(content)
-            local_md5 = hashlib.md5(content).hexdigest()
-
-            # Create mock with corrupted .md5 file
-            mock_files = [
-                RemoteFile(
-                    name="testfile.bin",
-                    path="/remote/testfile.bin",
-                    size=len(content),
-                    is_dir=False,
-                    mtime=datetime.now(),
-                ),
-                RemoteFile(
-                    name="checksums.md5",
-                    path="/remote/checksums.md5",
-                    size=10,
-                    is_dir=False,
-                    mtime=datetime.now(),
-                ),
-            ]
-
-            mock_sftp = MockSFTPClient(
-                files=mock_files,
-                file_contents={"/remote/checksums.md5": b"corrupted garbage data"},
-                remote_md5_results={"/remote/testfile.bin": local_md5},
-            )
+        local_path, content, local_md5 = canonical_payloads["content"]
+
+        # Create mock with corrupted .md5 file
+        mock_files = [
+            RemoteFile(
+                name="testfile.bin",
+                path="/remote/testfile.bin",
+                size=len(content),
+                is_dir=False,
+                mtime=datetime.now(),
+            ),
+            RemoteFile(
+                name="checksums.md5",
+                path="/remote/checksums.md5",
+                size=10,
+                is_dir=False,
+                mtime=datetime.now(),
+            ),
+        ]
+
+        mock_sftp = _BASE_MOCK.clone_with(
+            files=mock_files,
+            file_contents={"/remote/checksums.md5": b"corrupted garbage data"},
+            remote_md5_results={"/remote/testfile.bin": local_md5},
+        )
 
-            modal = FileExistsModal(
-                "testfile.bin",
-                local_size=len(content),
-                remote_size=len(content),
-                remote_path="/remote/testfile.bin",
-                local_path=str(local_path),
-                sftp=mock_sftp,
-            )
+        modal = FileExistsModal(
+            "testfile.bin",
+            local_size=len(content),
+            remote_size=len(content),
+            remote_path="/remote/testfile.bin",
+            local_path=str(local_path),
+            sftp=mock_sftp,
+        )
 
-            app = FileExistsModalTestApp(modal)
-            async with app.run_test() as pilot:
-                await pilot.pause()
+        app = FileExistsModalTestApp(modal)
+        async with app.run_test() as pilot:
+            await wait_mounted(app.modal)
 
-                verify_btn = app.modal.query_one("#verify-btn", Button)
-                await pilot.click(verify_btn)
-                await pilot.pause()
-                await pilot.pause()
+            verify_btn = app.modal.query_one("#verify-btn", Button)
+            await pilot.click(verify_btn)
+            await wait_for(pilot, lambda: verify_finished(app.modal))
 
-                # Should fall back to remote MD5 and succeed
-                result_label = app.modal.query_one("#verify-result")
-                result_text = str(result_label.content)
-                assert "MD5 match" in result_text or "match" in result_text.lower()
+            # Should fall back to remote MD5 and succeed
+            result_label = app.modal.query_one("#verify-result")
+            result_text = str(result_label.content)
+            assert "MD5 match" in result_text or "match" in result_text.lower()
 
 
 class TestQueuedAppInitialHost:
     """Tests for QueuedApp with initial_host parameter (CLI connection path)."""
 
-    @pytest.mark.asyncio
-    async def test_initial_host_does_not_crash_on_mount(self):
+    async def test_initial_host_does_not_crash_on_mount(self, patched_sftp_client):
         """App with initial_host should not crash during on_mount.
 
         Regression test for bug where `await self._connect()` was incorrectly
         awaiting a @work decorated method (workers cannot be awaited).
+        SFTPClient is patched to prevent real network calls.
         """
-        from unittest.mock import AsyncMock, patch
-
-        from queued.app import QueuedApp
-        from queued.models import Host
-
         mock_host = Host(hostname="test.example.com", username="testuser", port=22)
 
-        # Patch SFTPClient to prevent real network calls
-        with patch("queued.app.SFTPClient") as mock_sftp_class:
-            mock_sftp = AsyncMock()
-            mock_sftp.connected = True
-            mock_sftp.list_dir = AsyncMock(return_value=[])
-            mock_sftp.get_pwd = AsyncMock(return_value="/")
-            mock_sftp_class.return_value = mock_sftp
-
-            app = QueuedApp(host=mock_host)
-
-            # This should not raise "object worker cannot be used in await expression"
-            async with app.run_test() as pilot:
-                await pilot.pause()
+        app = QueuedApp(host=mock_host)
 
-                # App should have mounted successfully
-                assert app.is_running
-
-
-class TestVerifySizeButton:
-    """Tests for the Verify Size button in FileExistsModal."""
-
-    @pytest.mark.asyncio
-    async def test_verify_size_button_shown_when_file_complete(self):
-        """Verify Size button should appear when local_size >= remote_size and sftp provided."""
-        mock_sftp = MockSFTPClient()
-
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=1000,
-            remote_size=1000,
-            remote_path="/remote/file.txt",
-            local_path="/local/file.txt",
-            sftp=mock_sftp,
-        )
-
-        app = FileExistsModalTestApp(modal)
+        # This should not raise "object worker cannot be used in await expression"
         async with app.run_test() as pilot:
             await pilot.pause()
-            verify_size_btns = app.modal.query("#verify-size-btn")
-            assert len(verify_size_btns) == 1, (
-                "Verify Size button should be shown for complete file"
-            )
 
-    @pytest.mark.asyncio
-    async def test_verify_size_button_hidden_when_file_partial(self):
-        """Verify Size button should not appear when local_size < remote_size."""
-        mock_sftp = MockSFTPClient()
+            # App should have mounted successfully
+            assert app.is_running
 
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=500,
-            remote_size=1000,
-            remote_path="/remote/file.txt",
-            local_path="/local/file.txt",
-            sftp=mock_sftp,
-        )
 
-        app = FileExistsModalTestApp(modal)
-        async with app.run_test() as pilot:
-            await pilot.pause()
-            verify_size_btns = app.modal.query("#verify-size-btn")
-            assert len(verify_size_btns) == 0, (
-                "Verify Size button should not be shown for partial file"
-            )
-
-    @pytest.mark.asyncio
-    async def test_verify_size_button_hidden_without_sftp(self):
-        """Verify Size button should not appear when sftp client not provided."""
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=1000,
-            remote_size=1000,
-        )
-
-        app = FileExistsModalTestApp(modal)
-        async with app.run_test() as pilot:
-            await pilot.pause()
-            verify_size_btns = app.modal.query("#verify-size-btn")
-            assert len(verify_size_btns) == 0, "Verify Size button requires sftp client"
+class TestVerifySizeButton:
+    """Tests for the Verify Size button in FileExistsModal."""
 
-    @pytest.mark.asyncio
     async def test_verify_size_shows_match(self):
         """Clicking Verify Size should show 'Sizes match' when sizes are equal."""
-        mock_sftp = MockSFTPClient()
-
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=1000,
-            remote_size=1000,
-            remote_path="/remote/file.txt",
-            local_path="/local/file.txt",
-            sftp=mock_sftp,
-        )
+        modal = _make_modal()
 
         app = FileExistsModalTestApp(modal)
         async with app.run_test() as pilot:
-            await pilot.pause()
+            await wait_mounted(app.modal)
             verify_size_btn = app.modal.query_one("#verify-size-btn", Button)
             await pilot.click(verify_size_btn)
-            await pilot.pause()
+            await pilot.pause(0)
 
             result_label = app.modal.query_one("#verify-result")
             assert "Sizes match" in str(result_label.content)
 
-    @pytest.mark.asyncio
     async def test_verify_size_shows_mismatch(self):
         """Clicking Verify Size should show mismatch when sizes differ."""
-        mock_sftp = MockSFTPClient()
-
         # local_size > remote_size (can_verify is true, can_continue is false)
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=2000,
-            remote_size=1000,
-            remote_path="/remote/file.txt",
-            local_path="/local/file.txt",
-            sftp=mock_sftp,
-        )
+        modal = _make_modal(local_size=2000)
 
         app = FileExistsModalTestApp(modal)
         async with app.run_test() as pilot:
-            await pilot.pause()
+            await wait_mounted(app.modal)
             verify_size_btn = app.modal.query_one("#verify-size-btn", Button)
             await pilot.click(verify_size_btn)
-            await pilot.pause()
+            await pilot.pause(0)
 
             result_label = app.modal.query_one("#verify-result")
             assert "Size mismatch" in str(result_label.content)
@@ -797,347 +580,121 @@ class TestVerifySizeButton:
 class TestApplyToAllCheckbox:
     """Tests for the Apply to All checkbox in FileExistsModal."""
 
-    @pytest.mark.asyncio
     async def test_apply_all_checkbox_exists(self):
         """Apply to all checkbox should be present in the modal."""
-        mock_sftp = MockSFTPClient()
-
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=1000,
-            remote_size=1000,
-            remote_path="/remote/file.txt",
-            local_path="/local/file.txt",
-            sftp=mock_sftp,
-        )
+        modal = _make_modal()
 
         app = FileExistsModalTestApp(modal)
-        async with app.run_test() as pilot:
-            await pilot.pause()
+        async with app.run_test():
+            await wait_mounted(app.modal)
             checkboxes = app.modal.query("#apply-all-checkbox")
             assert len(checkboxes) == 1, "Apply to all checkbox should exist"
 
-    @pytest.mark.asyncio
-    async def test_skip_without_apply_all_returns_none(self):
-        """Skip without apply-all should dismiss with None."""
-        mock_sftp = MockSFTPClient()
-
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=1000,
-            remote_size=1000,
-            remote_path="/remote/file.txt",
-            local_path="/local/file.txt",
-            sftp=mock_sftp,
-        )
-
-        results = []
-
-        app = FileExistsModalTestApp(modal)
-        async with app.run_test() as pilot:
-            await pilot.pause()
-
-            # Override dismiss to capture result
-            original_dismiss = modal.dismiss
-
-            def capture_dismiss(result=None):
-                results.append(result)
-                original_dismiss(result)
-
-            modal.dismiss = capture_dismiss
-
-            skip_btn = app.modal.query_one("#skip-btn", Button)
-            await pilot.click(skip_btn)
-            await pilot.pause()
-
-            assert results == [None]
-
-    @pytest.mark.asyncio
-    async def test_skip_with_apply_all_returns_skip_all(self):
-        """Skip with apply-all checked should dismiss with 'skip_all'."""
-        mock_sftp = MockSFTPClient()
-
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=1000,
-            remote_size=1000,
-            remote_path="/remote/file.txt",
-            local_path="/local/file.txt",
-            sftp=mock_sftp,
-        )
-
-        results = []
-
-        app = FileExistsModalTestApp(modal)
-        async with app.run_test() as pilot:
-            await pilot.pause()
-
-            # Check the apply-all checkbox
-            checkbox = app.modal.query_one("#apply-all-checkbox", Checkbox)
+    @pytest.mark.parametrize(
+        ("modal_pilot", "button_id", "apply_all", "expected"),
+        [
+            (1000, "#skip-btn", False, None),
+            (1000, "#skip-btn", True, "skip_all"),
+            (1000, "#replace-btn", True, "replace_all"),
+            # Partial file so Continue button appears
+            (500, "#continue-btn", True, "continue_all"),
+            (1000, "#verify-size-btn", True, "verify_size_all"),
+        ],
+        indirect=["modal_pilot"],
+        ids=["skip", "skip-all", "replace-all", "continue-all", "verify-size-all"],
+    )
+    async def test_button_dismiss_result(
+        self, modal_pilot, monkeypatch, button_id, apply_all, expected
+    ):
+        """Buttons dismiss with their action, suffixed with _all when apply-all is checked."""
+        app, pilot, modal = modal_pilot
+
+        if apply_all:
+            checkbox = modal.query_one("#apply-all-checkbox", Checkbox)
             checkbox.value = True
-            await pilot.pause()
-
-            # Override dismiss to capture result
-            original_dismiss = modal.dismiss
-
-            def capture_dismiss(result=None):
-                results.append(result)
-                original_dismiss(result)
-
-            modal.dismiss = capture_dismiss
-
-            skip_btn = app.modal.query_one("#skip-btn", Button)
-            await pilot.click(skip_btn)
-            await pilot.pause()
-
-            assert results == ["skip_all"]
-
-    @pytest.mark.asyncio
-    async def test_replace_with_apply_all_returns_replace_all(self):
-        """Replace with apply-all checked should dismiss with 'replace_all'."""
-        mock_sftp = MockSFTPClient()
-
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=1000,
-            remote_size=1000,
-            remote_path="/remote/file.txt",
-            local_path="/local/file.txt",
-            sftp=mock_sftp,
-        )
 
+        # Capture the dismiss result instead of popping the screen
         results = []
+        monkeypatch.setattr(modal, "dismiss", results.append)
 
-        app = FileExistsModalTestApp(modal)
-        async with app.run_test() as pilot:
-            await pilot.pause()
-
-            # Check the apply-all checkbox
-            checkbox = app.modal.query_one("#apply-all-checkbox", Checkbox)
-            checkbox.value = True
-            await pilot.pause()
+        await pilot.click(modal.query_one(button_id, Button))
+        await pilot.pause(0)
 
-            original_dismiss = modal.dismiss
-
-            def capture_dismiss(result=None):
-                results.append(result)
-                original_dismiss(result)
-
-            modal.dismiss = capture_dismiss
-
-            replace_btn = app.modal.query_one("#replace-btn", Button)
-            await pilot.click(replace_btn)
-            await pilot.pause()
-
-            assert results == ["replace_all"]
-
-    @pytest.mark.asyncio
-    async def test_continue_with_apply_all_returns_continue_all(self):
-        """Continue with apply-all checked should dismiss with 'continue_all'."""
-        mock_sftp = MockSFTPClient()
-
-        # Partial file so Continue button appears
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=500,
-            remote_size=1000,
-            remote_path="/remote/file.txt",
-            local_path="/local/file.txt",
-            sftp=mock_sftp,
-        )
-
-        results = []
-
-        app = FileExistsModalTestApp(modal)
-        async with app.run_test() as pilot:
-            await pilot.pause()
-
-            checkbox = app.modal.query_one("#apply-all-checkbox", Checkbox)
-            checkbox.value = True
-            await pilot.pause()
-
-            original_dismiss = modal.dismiss
-
-            def capture_dismiss(result=None):
-                results.append(result)
-                original_dismiss(result)
-
-            modal.dismiss = capture_dismiss
-
-            continue_btn = app.modal.query_one("#continue-btn", Button)
-            await pilot.click(continue_btn)
-            await pilot.pause()
-
-            assert results == ["continue_all"]
-
-    @pytest.mark.asyncio
-    async def test_verify_size_with_apply_all_dismisses(self):
-        """Verify Size with apply-all checked should dismiss with 'verify_size_all'."""
-        mock_sftp = MockSFTPClient()
-
-        modal = FileExistsModal(
-            "file.txt",
-            local_size=1000,
-            remote_size=1000,
-            remote_path="/remote/file.txt",
-            local_path="/local/file.txt",
-            sftp=mock_sftp,
-        )
-
-        results = []
-
-        app = FileExistsModalTestApp(modal)
-        async with app.run_test() as pilot:
-            await pilot.pause()
-
-            checkbox = app.modal.query_one("#apply-all-checkbox", Checkbox)
-            checkbox.value = True
-            await pilot.pause()
-
-            original_dismiss = modal.dismiss
-
-            def capture_dismiss(result=None):
-                results.append(result)
-                original_dismiss(result)
-
-            modal.dismiss = capture_dismiss
-
-            verify_size_btn = app.modal.query_one("#verify-size-btn", Button)
-            await pilot.click(verify_size_btn)
-            await pilot.pause()
-
-            assert results == ["verify_size_all"]
+        assert results == [expected]
 
 
 class TestAutoApplyExistsAction:
     """Tests for _auto_apply_exists_action logic via _add_download_with_exists_check."""
 
-    @pytest.mark.asyncio
-    async def test_auto_skip_returns_cancelled(self):
+    async def test_auto_skip_returns_cancelled(self, queued_app_pilot):
         """apply_all_action='skip' should return cancelled without showing modal."""
-        from unittest.mock import AsyncMock, patch
-
-        from queued.app import QueuedApp
-        from queued.models import Host
-
-        mock_host = Host(hostname="test.example.com", username="testuser", port=22)
-
-        with (
-            patch("queued.app.SFTPClient") as mock_sftp_class,
-            tempfile.TemporaryDirectory() as tmpdir,
-        ):
-            mock_sftp = AsyncMock()
-            mock_sftp.connected = True
-            mock_sftp.list_dir = AsyncMock(return_value=[])
-            mock_sftp.get_pwd = AsyncMock(return_value="/")
-            mock_sftp_class.return_value = mock_sftp
-
-            app = QueuedApp(host=mock_host, download_dir=tmpdir)
-            async with app.run_test() as pilot:
-                await pilot.pause()
-
-                # Create a local file that "already exists"
-                local_file = Path(tmpdir) / "existing.txt"
-                local_file.write_bytes(b"existing content")
-
-                remote_file = RemoteFile(
-                    name="existing.txt",
-                    path="/remote/existing.txt",
-                    size=16,
-                    is_dir=False,
-                    mtime=None,
-                )
+        app, _, tmp_path = queued_app_pilot
+
+        # Create a local file that "already exists"; only its size is inspected,
+        # so a sparse file avoids writing any data
+        local_file = tmp_path / "existing.txt"
+        local_file.touch()
+        os.truncate(local_file, 16)
+
+        remote_file = RemoteFile(
+            name="existing.txt",
+            path="/remote/existing.txt",
+            size=16,
+            is_dir=False,
+            mtime=None,
+        )
 
-                result, new_action = await app._add_download_with_exists_check(
-                    remote_file, apply_all_action="skip"
-                )
-                assert result == "cancelled"
-                assert new_action == "skip"
+        result, new_action = await app._add_download_with_exists_check(
+            remote_file, apply_all_action="skip"
+        )
+        assert result == "cancelled"
+        assert new_action == "skip"
 
-    @pytest.mark.asyncio
-    async def test_auto_verify_size_match_returns_verified(self):
+    async def test_auto_verify_size_match_returns_verified(self, queued_app_pilot):
         """apply_all_action='verify_size' with matching sizes should return 'verified'."""
-        from unittest.mock import AsyncMock, patch
-
-        from queued.app import QueuedApp
-        from queued.models import Host
-
-        mock_host = Host(hostname="test.example.com", username="testuser", port=22)
-
-        with (
-            patch("queued.app.SFTPClient") as mock_sftp_class,
-            tempfile.TemporaryDirectory() as tmpdir,
-        ):
-            mock_sftp = AsyncMock()
-            mock_sftp.connected = True
-            mock_sftp.list_dir = AsyncMock(return_value=[])
-            mock_sftp.get_pwd = AsyncMock(return_value="/")
-            mock_sftp_class.return_value = mock_sftp
-
-            app = QueuedApp(host=mock_host, download_dir=tmpdir)
-            async with app.run_test() as pilot:
-                await pilot.pause()
-
-                # Create local file with matching size
-                content = b"matching content!"  # 17 bytes
-                local_file = Path(tmpdir) / "match.txt"
-                local_file.write_bytes(content)
-
-                remote_file = RemoteFile(
-                    name="match.txt",
-                    path="/remote/match.txt",
-                    size=len(content),
-                    is_dir=False,
-                    mtime=None,
-                )
+        app, _, tmp_path = queued_app_pilot
+
+        # Create local file with matching size
+        local_file = tmp_path / "match.txt"
+        local_file.touch()
+        os.truncate(local_file, 17)
+
+        remote_file = RemoteFile(
+            name="match.txt",
+            path="/remote/match.txt",
+            size=17,
+            is_dir=False,
+            mtime=None,
+        )
 
-                result, new_action = await app._add_download_with_exists_check(
-                    remote_file, apply_all_action="verify_size"
-                )
-                assert result == "verified"
-                assert new_action == "verify_size"
+        result, new_action = await app._add_download_with_exists_check(
+            remote_file, apply_all_action="verify_size"
+        )
+        assert result == "verified"
+        assert new_action == "verify_size"
 
-    @pytest.mark.asyncio
-    async def test_auto_verify_size_mismatch_replaces(self):
+    async def test_auto_verify_size_mismatch_replaces(self, queued_app_pilot):
         """apply_all_action='verify_size' with mismatched sizes should delete and re-queue."""
-        from unittest.mock import AsyncMock, patch
-
-        from queued.app import QueuedApp
-        from queued.models import Host
-
-        mock_host = Host(hostname="test.example.com", username="testuser", port=22)
-
-        with (
-            patch("queued.app.SFTPClient") as mock_sftp_class,
-            tempfile.TemporaryDirectory() as tmpdir,
-        ):
-            mock_sftp = AsyncMock()
-            mock_sftp.connected = True
-            mock_sftp.list_dir = AsyncMock(return_value=[])
-            mock_sftp.get_pwd = AsyncMock(return_value="/")
-            mock_sftp_class.return_value = mock_sftp
-
-            app = QueuedApp(host=mock_host, download_dir=tmpdir)
-            async with app.run_test() as pilot:
-                await pilot.pause()
-
-                # Create local file with DIFFERENT size
-                local_file = Path(tmpdir) / "mismatch.txt"
-                local_file.write_bytes(b"short")  # 5 bytes
-
-                remote_file = RemoteFile(
-                    name="mismatch.txt",
-                    path="/remote/mismatch.txt",
-                    size=1000,  # Different from local
-                    is_dir=False,
-                    mtime=None,
-                )
+        app, _, tmp_path = queued_app_pilot
+
+        # Create local file with DIFFERENT size
+        local_file = tmp_path / "mismatch.txt"
+        local_file.touch()
+        os.truncate(local_file, 5)
+
+        remote_file = RemoteFile(
+            name="mismatch.txt",
+            path="/remote/mismatch.txt",
+            size=1000,  # Different from local
+            is_dir=False,
+            mtime=None,
+        )
 
-                result, new_action = await app._add_download_with_exists_check(
-                    remote_file, apply_all_action="verify_size"
-                )
-                # File should be deleted and queued (or skipped if queue is not set up)
-                assert result in ("added", "skipped", "cancelled")
-                assert new_action == "verify_size"
-                # Local file should have been deleted
-                assert not local_file.exists()
+        result, new_action = await app._add_download_with_exists_check(
+            remote_file, apply_all_action="verify_size"
+        )
+        # File should be deleted and queued (or skipped if queue is not set up)
+        assert result in ("added", "skipped", "cancelled")
+        assert new_action == "verify_size"
+        # Local file should have been deleted
+        assert not local_file.exists()
@@ -1,8 +1,11 @@
 """Tests for configuration and cache management."""
 
-import tempfile
+import dataclasses
+import json
+import os
 from pathlib import Path
-from unittest.mock import patch
+
+import pytest
 
 from queued.config import (
     DownloadDirCache,
@@ -13,523 +16,474 @@ from queued.config import (
 )
 from queued.models import Host, Transfer, TransferDirection, TransferStatus
 
+pytestmark = pytest.mark.config
+
+# Prototype download for QueueCache tests; vary fields with _make_transfer()
+_TRANSFER_PROTO = Transfer(
+    id="t1",
+    remote_path="/file.txt",
+    local_path="/tmp/file.txt",
+    direction=TransferDirection.DOWNLOAD,
+    size=1000,
+    status=TransferStatus.QUEUED,
+)
+
+
+def _make_transfer(**overrides) -> Transfer:
+    """Copy the prototype transfer with the given fields replaced."""
+    return dataclasses.replace(_TRANSFER_PROTO, **overrides)
+
+
+# Partial-download file contents for TransferStateCache tests
+_BUF_500 = b"x" * 500
+_BUF_300 = b"x" * 300
+
+
+@pytest.fixture
+def prepopulated_host_cache(cache_tmpdir: Path) -> HostCache:
+    """Provide a HostCache loaded from a hosts.json written directly to disk."""
+    hosts = [
+        Host(hostname="example.com", username="testuser", port=2222),
+        Host(hostname="other.com", username="otheruser", key_path="/path/to/key"),
+    ]
+    data = {"hosts": [h.to_dict() for h in hosts]}
+    (cache_tmpdir / "hosts.json").write_text(json.dumps(data))
+    return HostCache()
+
 
 class TestSettingsManager:
     """Tests for SettingsManager."""
 
-    def test_settings_defaults(self):
+    def test_settings_defaults(self, cache_tmpdir):
         """Default settings should have expected values."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_config_dir", return_value=Path(tmpdir)):
-                manager = SettingsManager()
-                settings = manager.settings
-
-                assert settings.max_concurrent_transfers == 10
-                assert settings.bandwidth_limit is None
-                assert settings.download_dir == "~/Downloads"
-                assert settings.auto_refresh_interval == 30
-                assert settings.verify_checksums is True
-                assert settings.resume_transfers is True
-
-    def test_settings_save_load_roundtrip(self):
+        manager = SettingsManager()
+        settings = manager.settings
+
+        assert settings.max_concurrent_transfers == 10
+        assert settings.bandwidth_limit is None
+        assert settings.download_dir == "~/Downloads"
+        assert settings.auto_refresh_interval == 30
+        assert settings.verify_checksums is True
+        assert settings.resume_transfers is True
+
+    def test_settings_save_load_roundtrip(self, cache_tmpdir):
         """Settings should persist correctly."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_config_dir", return_value=Path(tmpdir)):
-                # Save settings
-                manager = SettingsManager()
-                manager.update(
-                    max_concurrent_transfers=5,
-                    bandwidth_limit=1024 * 1024,
-                    download_dir="/custom/downloads",
-                    auto_refresh_interval=60,
-                    verify_checksums=False,
-                    resume_transfers=False,
-                )
-
-                # Load in new instance
-                manager2 = SettingsManager()
-                settings = manager2.settings
-
-                assert settings.max_concurrent_transfers == 5
-                assert settings.bandwidth_limit == 1024 * 1024
-                assert settings.download_dir == "/custom/downloads"
-                assert settings.auto_refresh_interval == 60
-                assert settings.verify_checksums is False
-                assert settings.resume_transfers is False
-
-    def test_settings_partial_update(self):
+        # Save settings
+        manager = SettingsManager()
+        manager.update(
+            max_concurrent_transfers=5,
+            bandwidth_limit=1024 * 1024,
+            download_dir="/custom/downloads",
+            auto_refresh_interval=60,
+            verify_checksums=False,
+            resume_transfers=False,
+        )
+
+        # Load in new instance
+        manager2 = SettingsManager()
+        settings = manager2.settings
+
+        assert settings.max_concurrent_transfers == 5
+        assert settings.bandwidth_limit == 1024 * 1024
+        assert settings.download_dir == "/custom/downloads"
+        assert settings.auto_refresh_interval == 60
+        assert settings.verify_checksums is False
+        assert settings.resume_transfers is False
+
+    def test_settings_partial_update(self, cache_tmpdir):
         """Update should only modify specified fields."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_config_dir", return_value=Path(tmpdir)):
-                manager = SettingsManager()
-                original_dir = manager.settings.download_dir
+        manager = SettingsManager()
+        original_dir = manager.settings.download_dir
 
-                manager.update(max_concurrent_transfers=10)
+        manager.update(max_concurrent_transfers=10)
 
-                assert manager.settings.max_concurrent_transfers == 10
-                assert manager.settings.download_dir == original_dir
+        assert manager.settings.max_concurrent_transfers == 10
+        assert manager.settings.download_dir == original_dir
 
 
 class TestHostCache:
     """Tests for HostCache."""
 
-    def test_host_cache_add_and_get(self):
+    def test_host_cache_add_and_get(self, cache_tmpdir):
         """Adding a host should make it retrievable."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = HostCache()
-                host = Host(
-                    hostname="example.com",
-                    username="testuser",
-                    port=22,
-                )
-
-                cache.add(host)
-
-                found = cache.get_by_hostname("example.com")
-                assert found is not None
-                assert found.username == "testuser"
-
-    def test_host_cache_get_by_key(self):
+        cache = HostCache()
+        host = Host(
+            hostname="example.com",
+            username="testuser",
+            port=22,
+        )
+
+        cache.add(host)
+
+        found = cache.get_by_hostname("example.com")
+        assert found is not None
+        assert found.username == "testuser"
+
+    def test_host_cache_get_by_key(self, prepopulated_host_cache):
         """Should find host by host_key."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = HostCache()
-                host = Host(
-                    hostname="example.com",
-                    username="testuser",
-                    port=2222,
-                )
-
-                cache.add(host)
-
-                found = cache.get_by_key("testuser@example.com:2222")
-                assert found is not None
-                assert found.hostname == "example.com"
-
-    def test_host_cache_limit(self):
+        found = prepopulated_host_cache.get_by_key("testuser@example.com:2222")
+        assert found is not None
+        assert found.hostname == "example.com"
+
+    def test_host_cache_loads_from_disk(self, prepopulated_host_cache):
+        """A new instance should load saved hosts in most-recent-first order."""
+        recent = prepopulated_host_cache.get_recent(10)
+        assert [h.hostname for h in recent] == ["example.com", "other.com"]
+
+        found = prepopulated_host_cache.get_by_hostname("other.com")
+        assert found is not None
+        assert found.key_path == "/path/to/key"
+
+    def test_host_cache_limit(self, cache_tmpdir):
         """Cache should respect max_hosts limit."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = HostCache(max_hosts=3)
+        cache = HostCache(max_hosts=3)
 
-                for i in range(5):
-                    cache.add(Host(hostname=f"host{i}.com", username="user"))
+        for i in range(5):
+            cache.add(Host(hostname=f"host{i}.com", username="user"))
 
-                # Should only have 3 hosts
-                recent = cache.get_recent(10)
-                assert len(recent) == 3
+        # Should only have 3 hosts
+        recent = cache.get_recent(10)
+        assert len(recent) == 3
 
-                # Most recent should be host4
-                assert recent[0].hostname == "host4.com"
+        # Most recent should be host4
+        assert recent[0].hostname == "host4.com"
 
-    def test_host_cache_updates_existing(self):
+    def test_host_cache_updates_existing(self, cache_tmpdir):
         """Adding same host should update, not duplicate."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = HostCache()
-
-                host1 = Host(
-                    hostname="example.com",
-                    username="testuser",
-                    last_directory="/old",
-                )
-                cache.add(host1)
-
-                host2 = Host(
-                    hostname="example.com",
-                    username="testuser",
-                    last_directory="/new",
-                )
-                cache.add(host2)
-
-                recent = cache.get_recent(10)
-                assert len(recent) == 1
-                assert recent[0].last_directory == "/new"
-
-    def test_host_cache_persistence(self):
+        cache = HostCache()
+
+        host1 = Host(
+            hostname="example.com",
+            username="testuser",
+            last_directory="/old",
+        )
+        cache.add(host1)
+
+        host2 = Host(
+            hostname="example.com",
+            username="testuser",
+            last_directory="/new",
+        )
+        cache.add(host2)
+
+        recent = cache.get_recent(10)
+        assert len(recent) == 1
+        assert recent[0].last_directory == "/new"
+
+    def test_host_cache_persistence(self, cache_tmpdir):
         """Cache should persist across instances."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache1 = HostCache()
-                cache1.add(
-                    Host(
-                        hostname="example.com",
-                        username="testuser",
-                        key_path="/path/to/key",
-                    )
-                )
+        cache1 = HostCache()
+        cache1.add(
+            Host(
+                hostname="example.com",
+                username="testuser",
+                key_path="/path/to/key",
+            )
+        )
 
-                # New instance should load from disk
-                cache2 = HostCache()
-                found = cache2.get_by_hostname("example.com")
+        # New instance should load from disk
+        cache2 = HostCache()
+        found = cache2.get_by_hostname("example.com")
 
-                assert found is not None
-                assert found.key_path == "/path/to/key"
+        assert found is not None
+        assert found.key_path == "/path/to/key"
 
 
 class TestQueueCache:
     """Tests for QueueCache."""
 
-    def test_queue_cache_save_load(self):
+    def test_queue_cache_save_load(self, cache_tmpdir):
         """Queue should save and load correctly."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = QueueCache()
-
-                transfers = [
-                    Transfer(
-                        id="t1",
-                        remote_path="/file1.txt",
-                        local_path="/tmp/file1.txt",
-                        direction=TransferDirection.DOWNLOAD,
-                        size=1000,
-                        status=TransferStatus.QUEUED,
-                    ),
-                    Transfer(
-                        id="t2",
-                        remote_path="/file2.txt",
-                        local_path="/tmp/file2.txt",
-                        direction=TransferDirection.DOWNLOAD,
-                        size=2000,
-                        status=TransferStatus.PAUSED,
-                    ),
-                ]
-
-                cache.save(transfers)
-
-                loaded, paused = cache.load()
-                assert len(loaded) == 2
-                assert loaded[0].id == "t1"
-                assert loaded[0].status == TransferStatus.QUEUED
-                assert loaded[1].status == TransferStatus.PAUSED
-
-    def test_queue_cache_starts_fresh_on_load(self):
+        cache = QueueCache()
+
+        transfers = [
+            _make_transfer(remote_path="/file1.txt", local_path="/tmp/file1.txt"),
+            _make_transfer(
+                id="t2",
+                remote_path="/file2.txt",
+                local_path="/tmp/file2.txt",
+                size=2000,
+                status=TransferStatus.PAUSED,
+            ),
+        ]
+
+        cache.save(transfers)
+
+        loaded, paused = cache.load()
+        assert len(loaded) == 2
+        assert loaded[0].id == "t1"
+        assert loaded[0].status == TransferStatus.QUEUED
+        assert loaded[1].status == TransferStatus.PAUSED
+
+    def test_queue_cache_starts_fresh_on_load(self, cache_tmpdir):
         """Queue should always start running on load (not paused)."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = QueueCache()
-
-                transfers = [
-                    Transfer(
-                        id="t1",
-                        remote_path="/file.txt",
-                        local_path="/tmp/file.txt",
-                        direction=TransferDirection.DOWNLOAD,
-                        size=1000,
-                        status=TransferStatus.QUEUED,
-                    )
-                ]
-
-                # Even if saved as paused, should load as not paused
-                cache.save(transfers, queue_paused=True)
-
-                loaded, paused = cache.load()
-                assert paused is False  # Queue always starts fresh
-
-    def test_queue_cache_excludes_completed(self):
-        """Completed transfers should not be saved."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = QueueCache()
-
-                transfers = [
-                    Transfer(
-                        id="t1",
-                        remote_path="/done.txt",
-                        local_path="/tmp/done.txt",
-                        direction=TransferDirection.DOWNLOAD,
-                        size=1000,
-                        status=TransferStatus.COMPLETED,
-                    ),
-                    Transfer(
-                        id="t2",
-                        remote_path="/pending.txt",
-                        local_path="/tmp/pending.txt",
-                        direction=TransferDirection.DOWNLOAD,
-                        size=1000,
-                        status=TransferStatus.QUEUED,
-                    ),
-                ]
-
-                cache.save(transfers)
-
-                loaded, _ = cache.load()
-                assert len(loaded) == 1
-                assert loaded[0].id == "t2"
-
-    def test_queue_cache_excludes_failed(self):
-        """Failed transfers should not be saved."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = QueueCache()
-
-                transfers = [
-                    Transfer(
-                        id="t1",
-                        remote_path="/failed.txt",
-                        local_path="/tmp/failed.txt",
-                        direction=TransferDirection.DOWNLOAD,
-                        size=1000,
-                        status=TransferStatus.FAILED,
-                    ),
-                ]
-
-                cache.save(transfers)
-
-                loaded, _ = cache.load()
-                assert len(loaded) == 0
-
-    def test_queue_cache_transferring_becomes_queued(self):
-        """TRANSFERRING and STOPPED should become QUEUED on load (auto-resume)."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = QueueCache()
-
-                transfers = [
-                    Transfer(
-                        id="t1",
-                        remote_path="/active.txt",
-                        local_path="/tmp/active.txt",
-                        direction=TransferDirection.DOWNLOAD,
-                        size=1000,
-                        status=TransferStatus.TRANSFERRING,
-                    ),
-                    Transfer(
-                        id="t2",
-                        remote_path="/stopped.txt",
-                        local_path="/tmp/stopped.txt",
-                        direction=TransferDirection.DOWNLOAD,
-                        size=2000,
-                        status=TransferStatus.STOPPED,
-                    ),
-                ]
-
-                cache.save(transfers)
-
-                loaded, _ = cache.load()
-                assert len(loaded) == 2
-                # Both TRANSFERRING and STOPPED become QUEUED for auto-resume
-                assert loaded[0].status == TransferStatus.QUEUED
-                assert loaded[1].status == TransferStatus.QUEUED
-
-    def test_queue_cache_clear(self):
+        cache = QueueCache()
+
+        transfers = [_make_transfer()]
+
+        # Even if saved as paused, should load as not paused
+        cache.save(transfers, queue_paused=True)
+
+        loaded, paused = cache.load()
+        assert paused is False  # Queue always starts fresh
+
+    @pytest.mark.parametrize(
+        ("status", "expected_status"),
+        [
+            # Finished transfers are not saved
+            (TransferStatus.COMPLETED, None),
+            (TransferStatus.FAILED, None),
+            # Interrupted transfers become QUEUED on load (auto-resume)
+            (TransferStatus.TRANSFERRING, TransferStatus.QUEUED),
+            (TransferStatus.STOPPED, TransferStatus.QUEUED),
+            (TransferStatus.QUEUED, TransferStatus.QUEUED),
+            (TransferStatus.PAUSED, TransferStatus.PAUSED),
+        ],
+        ids=lambda v: v.name.lower() if isinstance(v, TransferStatus) else "excluded",
+    )
+    def test_queue_cache_status_roundtrip(self, cache_tmpdir, status, expected_status):
+        """Saved status should load as expected_status, or be dropped if None."""
+        cache = QueueCache()
+
+        transfers = [
+            _make_transfer(status=status),
+        ]
+
+        cache.save(transfers)
+
+        loaded, _ = cache.load()
+        assert [t.status for t in loaded] == ([] if expected_status is None else [expected_status])
+
+    def test_queue_cache_clear(self, cache_tmpdir):
         """Clear should remove the cache file."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = QueueCache()
-
-                transfers = [
-                    Transfer(
-                        id="t1",
-                        remote_path="/file.txt",
-                        local_path="/tmp/file.txt",
-                        direction=TransferDirection.DOWNLOAD,
-                        size=1000,
-                        status=TransferStatus.QUEUED,
-                    ),
-                ]
-                cache.save(transfers)
-                assert cache.cache_file.exists()
-
-                cache.clear()
-                assert not cache.cache_file.exists()
+        cache = QueueCache()
+
+        transfers = [
+            _make_transfer(),
+        ]
+        cache.save(transfers)
+        assert cache.cache_file.exists()
+
+        cache.clear()
+        assert not cache.cache_file.exists()
+
+    def test_reload_skips_parse_when_mtime_unchanged(self, cache_tmpdir, monkeypatch):
+        """A second load of an unchanged queue file should not decode it again."""
+        QueueCache().save([_make_transfer()])
+        first, _ = QueueCache().load()
+
+        def fail_loads(*args, **kwargs):
+            raise AssertionError("queue file was parsed again")
+
+        monkeypatch.setattr("queued.config.json.loads", fail_loads)
+        second, _ = QueueCache().load()
+
+        assert [t.id for t in second] == ["t1"]
+        # Each load hands out its own Transfer objects
+        assert second[0] is not first[0]
+
+    def test_reload_parses_after_external_rewrite(self, cache_tmpdir):
+        """A queue file changed behind the cache's back should be parsed again."""
+        cache = QueueCache()
+        cache.save([_make_transfer()])
+        cache.load()
+
+        cache.cache_file.write_text('{"transfers": []}')
+        os.utime(cache.cache_file, ns=(0, 0))
+
+        loaded, _ = QueueCache().load()
+        assert loaded == []
+
+    def test_queue_cache_failed_write_keeps_previous(self, cache_tmpdir, monkeypatch):
+        """A write that fails before the rename should leave the old queue intact."""
+        cache = QueueCache()
+        cache.save([_make_transfer()])
+
+        def fail_replace(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr("queued.config.os.replace", fail_replace)
+        with pytest.raises(OSError):
+            cache.save([])
+
+        loaded, _ = cache.load()
+        assert [t.id for t in loaded] == ["t1"]
+        assert cache.cache_file.stat().st_mode & 0o777 == 0o600
+        assert list(cache_tmpdir.glob(".*.tmp")) == []
 
 
 class TestTransferStateCache:
     """Tests for TransferStateCache (resume support)."""
 
-    def test_resume_offset_save_load(self):
+    def test_resume_offset_save_load(self, cache_tmpdir):
         """Resume offset should be saved and retrieved."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = TransferStateCache()
-
-                # Create a partial file to simulate interrupted download
-                local_path = Path(tmpdir) / "partial.txt"
-                local_path.write_bytes(b"x" * 500)
-
-                cache.save_transfer(
-                    transfer_id="t1",
-                    remote_path="/remote/file.txt",
-                    local_path=str(local_path),
-                    bytes_transferred=500,
-                    total_size=1000,
-                )
-
-                offset = cache.get_resume_offset("/remote/file.txt", str(local_path))
-                assert offset == 500
-
-    def test_resume_offset_no_local_file(self):
+        cache = TransferStateCache()
+
+        # Create a partial file to simulate interrupted download
+        local_path = cache_tmpdir / "partial.txt"
+        local_path.write_bytes(_BUF_500)
+
+        cache.save_transfer(
+            transfer_id="t1",
+            remote_path="/remote/file.txt",
+            local_path=str(local_path),
+            bytes_transferred=500,
+            total_size=1000,
+        )
+
+        offset = cache.get_resume_offset("/remote/file.txt", str(local_path))
+        assert offset == 500
+
+    def test_resume_offset_no_local_file(self, cache_tmpdir):
         """If local file doesn't exist, offset should be 0."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = TransferStateCache()
-
-                cache.save_transfer(
-                    transfer_id="t1",
-                    remote_path="/remote/file.txt",
-                    local_path="/nonexistent/path.txt",
-                    bytes_transferred=500,
-                    total_size=1000,
-                )
-
-                offset = cache.get_resume_offset("/remote/file.txt", "/nonexistent/path.txt")
-                assert offset == 0
-
-    def test_resume_offset_size_mismatch(self):
+        cache = TransferStateCache()
+
+        cache.save_transfer(
+            transfer_id="t1",
+            remote_path="/remote/file.txt",
+            local_path="/nonexistent/path.txt",
+            bytes_transferred=500,
+            total_size=1000,
+        )
+
+        offset = cache.get_resume_offset("/remote/file.txt", "/nonexistent/path.txt")
+        assert offset == 0
+
+    def test_resume_offset_size_mismatch(self, cache_tmpdir):
         """If local file size doesn't match, offset should be 0."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = TransferStateCache()
-
-                # Create file with different size than recorded
-                local_path = Path(tmpdir) / "modified.txt"
-                local_path.write_bytes(b"x" * 300)
-
-                cache.save_transfer(
-                    transfer_id="t1",
-                    remote_path="/remote/file.txt",
-                    local_path=str(local_path),
-                    bytes_transferred=500,  # Doesn't match file size
-                    total_size=1000,
-                )
-
-                offset = cache.get_resume_offset("/remote/file.txt", str(local_path))
-                assert offset == 0
-
-    def test_clear_transfer(self):
+        cache = TransferStateCache()
+
+        # Create file with different size than recorded
+        local_path = cache_tmpdir / "modified.txt"
+        local_path.write_bytes(_BUF_300)
+
+        cache.save_transfer(
+            transfer_id="t1",
+            remote_path="/remote/file.txt",
+            local_path=str(local_path),
+            bytes_transferred=500,  # Doesn't match file size
+            total_size=1000,
+        )
+
+        offset = cache.get_resume_offset("/remote/file.txt", str(local_path))
+        assert offset == 0
+
+    def test_clear_transfer(self, cache_tmpdir):
         """Clear should remove transfer from cache."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = TransferStateCache()
+        cache = TransferStateCache()
 
-                local_path = Path(tmpdir) / "file.txt"
-                local_path.write_bytes(b"x" * 500)
+        local_path = cache_tmpdir / "file.txt"
+        local_path.write_bytes(_BUF_500)
 
-                cache.save_transfer(
-                    transfer_id="t1",
-                    remote_path="/file.txt",
-                    local_path=str(local_path),
-                    bytes_transferred=500,
-                    total_size=1000,
-                )
+        cache.save_transfer(
+            transfer_id="t1",
+            remote_path="/file.txt",
+            local_path=str(local_path),
+            bytes_transferred=500,
+            total_size=1000,
+        )
 
-                cache.clear_transfer("t1")
+        cache.clear_transfer("t1")
 
-                offset = cache.get_resume_offset("/file.txt", str(local_path))
-                assert offset == 0
+        offset = cache.get_resume_offset("/file.txt", str(local_path))
+        assert offset == 0
 
-    def test_clear_by_path(self):
+    def test_clear_by_path(self, cache_tmpdir):
         """Clear by path should remove matching transfers."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = TransferStateCache()
+        cache = TransferStateCache()
 
-                local_path = Path(tmpdir) / "file.txt"
-                local_path.write_bytes(b"x" * 500)
+        local_path = cache_tmpdir / "file.txt"
+        local_path.write_bytes(_BUF_500)
 
-                cache.save_transfer(
-                    transfer_id="t1",
-                    remote_path="/file.txt",
-                    local_path=str(local_path),
-                    bytes_transferred=500,
-                    total_size=1000,
-                )
+        cache.save_transfer(
+            transfer_id="t1",
+            remote_path="/file.txt",
+            local_path=str(local_path),
+            bytes_transferred=500,
+            total_size=1000,
+        )
 
-                cache.clear_by_path("/file.txt", str(local_path))
+        cache.clear_by_path("/file.txt", str(local_path))
 
-                offset = cache.get_resume_offset("/file.txt", str(local_path))
-                assert offset == 0
+        offset = cache.get_resume_offset("/file.txt", str(local_path))
+        assert offset == 0
 
 
 class TestDownloadDirCache:
     """Tests for DownloadDirCache."""
 
-    def test_download_dir_cache_add_and_get(self):
+    def test_download_dir_cache_add_and_get(self, cache_tmpdir):
         """Adding a directory should make it retrievable."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = DownloadDirCache()
+        cache = DownloadDirCache()
 
-                cache.add("~/Downloads")
-                cache.add("/tmp/downloads")
+        cache.add("~/Downloads")
+        cache.add("/tmp/downloads")
 
-                recent = cache.get_recent(5)
-                assert len(recent) == 2
-                assert recent[0] == "/tmp/downloads"  # Most recent first
-                assert recent[1] == "~/Downloads"
+        recent = cache.get_recent(5)
+        assert len(recent) == 2
+        assert recent[0] == "/tmp/downloads"  # Most recent first
+        assert recent[1] == "~/Downloads"
 
-    def test_download_dir_cache_limit(self):
+    def test_download_dir_cache_limit(self, cache_tmpdir):
         """Cache should respect max_dirs limit."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = DownloadDirCache(max_dirs=3)
+        cache = DownloadDirCache(max_dirs=3)
 
-                for i in range(5):
-                    cache.add(f"/dir{i}")
+        for i in range(5):
+            cache.add(f"/dir{i}")
 
-                recent = cache.get_recent(10)
-                assert len(recent) == 3
+        recent = cache.get_recent(10)
+        assert len(recent) == 3
 
-                # Most recent should be dir4
-                assert recent[0] == "/dir4"
-                assert recent[1] == "/dir3"
-                assert recent[2] == "/dir2"
+        # Most recent should be dir4
+        assert recent[0] == "/dir4"
+        assert recent[1] == "/dir3"
+        assert recent[2] == "/dir2"
 
-    def test_download_dir_cache_deduplication(self):
+    def test_download_dir_cache_deduplication(self, cache_tmpdir):
         """Adding same directory should update position, not duplicate."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = DownloadDirCache()
-
-                cache.add("~/Downloads")
-                cache.add("/tmp/downloads")
-                cache.add("~/Documents")
-                cache.add("~/Downloads")  # Add again
-
-                recent = cache.get_recent(10)
-                assert len(recent) == 3
-                assert recent[0] == "~/Downloads"  # Moved to front
-                assert recent[1] == "~/Documents"
-                assert recent[2] == "/tmp/downloads"
-
-    def test_download_dir_cache_persistence(self):
+        cache = DownloadDirCache()
+
+        cache.add("~/Downloads")
+        cache.add("/tmp/downloads")
+        cache.add("~/Documents")
+        cache.add("~/Downloads")  # Add again
+
+        recent = cache.get_recent(10)
+        assert len(recent) == 3
+        assert recent[0] == "~/Downloads"  # Moved to front
+        assert recent[1] == "~/Documents"
+        assert recent[2] == "/tmp/downloads"
+
+    def test_download_dir_cache_persistence(self, cache_tmpdir):
         """Cache should persist across instances."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache1 = DownloadDirCache()
-                cache1.add("~/Downloads")
-                cache1.add("/tmp/downloads")
+        cache1 = DownloadDirCache()
+        cache1.add("~/Downloads")
+        cache1.add("/tmp/downloads")
 
-                # New instance should load from disk
-                cache2 = DownloadDirCache()
-                recent = cache2.get_recent(10)
+        # New instance should load from disk
+        cache2 = DownloadDirCache()
+        recent = cache2.get_recent(10)
 
-                assert len(recent) == 2
-                assert recent[0] == "/tmp/downloads"
-                assert recent[1] == "~/Downloads"
+        assert len(recent) == 2
+        assert recent[0] == "/tmp/downloads"
+        assert recent[1] == "~/Downloads"
 
-    def test_download_dir_cache_get_recent_with_limit(self):
+    def test_download_dir_cache_get_recent_with_limit(self, cache_tmpdir):
         """get_recent should respect limit parameter."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = DownloadDirCache()
+        cache = DownloadDirCache()
 
-                for i in range(5):
-                    cache.add(f"/dir{i}")
+        for i in range(5):
+            cache.add(f"/dir{i}")
 
-                recent = cache.get_recent(3)
-                assert len(recent) == 3
-                assert recent[0] == "/dir4"
-                assert recent[1] == "/dir3"
-                assert recent[2] == "/dir2"
+        recent = cache.get_recent(3)
+        assert len(recent) == 3
+        assert recent[0] == "/dir4"
+        assert recent[1] == "/dir3"
+        assert recent[2] == "/dir2"
 
-    def test_download_dir_cache_empty(self):
+    def test_download_dir_cache_empty(self, cache_tmpdir):
         """Empty cache should return empty list."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = DownloadDirCache()
+        cache = DownloadDirCache()
 
-                recent = cache.get_recent(10)
-                assert len(recent) == 0
+        recent = cache.get_recent(10)
+        assert len(recent) == 0
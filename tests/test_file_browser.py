@@ -1,13 +1,15 @@
 """Tests for FileBrowser widget."""
 
+from pathlib import PurePosixPath
+
 import pytest
+import pytest_asyncio
 from textual.app import App, ComposeResult
 from textual.widgets import DataTable
 
-from queued.models import RemoteFile
 from queued.widgets.file_browser import FileBrowser
 
-from .mocks.sftp_mock import MockSFTPClient, create_mock_files
+from .mocks.sftp_mock import MockSFTPClient
 
 
 class FileBrowserTestApp(App):
@@ -21,10 +23,35 @@ class FileBrowserTestApp(App):
         yield FileBrowser(sftp_client=self.sftp, id="browser")
 
 
+@pytest_asyncio.fixture(scope="module")
+async def browser_pilot(connected_mock_sftp: MockSFTPClient):
+    """Run one FileBrowserTestApp for every bug-repro test in this module."""
+    app = FileBrowserTestApp(connected_mock_sftp)
+    async with app.run_test() as pilot:
+        yield app, pilot
+
+
+@pytest_asyncio.fixture
+async def root_browser(browser_pilot, connected_mock_sftp: MockSFTPClient):
+    """Reset the shared browser to the root listing with no selections.
+
+    Loads the directory manually, simulating what set_sftp_client does.
+    """
+    app, pilot = browser_pilot
+    browser = app.query_one("#browser", FileBrowser)
+    browser._selected.clear()
+    browser._files = await connected_mock_sftp.list_dir("/")
+    browser.current_path = "/"
+    browser._update_table()
+    browser.query_one("#file-table", DataTable).move_cursor(row=0)
+    return browser, pilot
+
+
+@pytest.mark.textual
 class TestFileBrowserCursorBug:
     """Tests for cursor jump bug - BUG REPRODUCTION."""
 
-    async def test_toggle_select_cursor_moves_down_not_to_top(self):
+    async def test_toggle_select_cursor_moves_down_not_to_top(self, root_browser):
         """BUG REPRO: Space should move cursor from row N to row N+1, not reset to 1.
 
         Current buggy behavior:
@@ -39,42 +66,32 @@ class TestFileBrowserCursorBug:
         2. Press space
         3. Cursor should be at row 3
         """
-        sftp = MockSFTPClient(create_mock_files())
-        await sftp.connect()
-
-        app = FileBrowserTestApp(sftp)
-        async with app.run_test() as pilot:
-            browser = app.query_one("#browser", FileBrowser)
-            table = browser.query_one("#file-table", DataTable)
+        browser, pilot = root_browser
+        table = browser.query_one("#file-table", DataTable)
 
-            # Manually load the directory (simulating what set_sftp_client does)
-            browser._files = await sftp.list_dir("/")
-            browser.current_path = "/"
-            browser._update_table()
+        # Move cursor to row 2 (skip row 0 and 1)
+        await pilot.press("down", "down")  # row 1, then row 2
 
-            # Move cursor to row 2 (skip row 0 and 1)
-            await pilot.press("down")  # row 1
-            await pilot.press("down")  # row 2
+        cursor_before = table.cursor_row
+        assert cursor_before == 2, f"Cursor should be at row 2, got {cursor_before}"
 
-            cursor_before = table.cursor_row
-            assert cursor_before == 2, f"Cursor should be at row 2, got {cursor_before}"
+        # Toggle select - this triggers the bug
+        await pilot.press("space")
 
-            # Toggle select - this triggers the bug
-            await pilot.press("space")
-
-            cursor_after = table.cursor_row
-            # BUG: cursor ends up at 1 (reset to 0, then moved down to 1)
-            # EXPECTED: cursor should be at 3 (was at 2, moved down to 3)
-            assert cursor_after == 3, (
-                f"Cursor should be at row 3 after toggle from row 2, "
-                f"but got {cursor_after} (bug: cursor reset to top)"
-            )
+        cursor_after = table.cursor_row
+        # BUG: cursor ends up at 1 (reset to 0, then moved down to 1)
+        # EXPECTED: cursor should be at 3 (was at 2, moved down to 3)
+        assert cursor_after == 3, (
+            f"Cursor should be at row 3 after toggle from row 2, "
+            f"but got {cursor_after} (bug: cursor reset to top)"
+        )
 
 
+@pytest.mark.textual
 class TestFileBrowserSelectionsBug:
     """Tests for selections cleared on refresh bug - BUG REPRODUCTION."""
 
-    async def test_refresh_preserves_selections(self):
+    async def test_refresh_preserves_selections(self, root_browser):
         """BUG REPRO: Refresh (r key) should NOT clear selections.
 
         Current buggy behavior:
@@ -88,81 +105,51 @@ class TestFileBrowserSelectionsBug:
         2. Press r to refresh (same directory)
         3. Selections should be preserved
         """
-        sftp = MockSFTPClient(create_mock_files())
-        await sftp.connect()
+        browser, _ = root_browser
 
-        app = FileBrowserTestApp(sftp)
-        async with app.run_test() as pilot:
-            browser = app.query_one("#browser", FileBrowser)
-
-            # Manually load the directory
-            browser._files = await sftp.list_dir("/")
-            browser.current_path = "/"
-            browser._update_table()
-
-            # Select first file (row 0)
-            file_path = browser._files[0].path
-            browser._selected.add(file_path)
-            browser._update_table()
-
-            assert len(browser._selected) == 1, "Should have 1 file selected"
-            assert file_path in browser._selected
+        # Select first file (row 0)
+        file_path = browser._files[0].path
+        browser._selected.add(file_path)
+        browser._update_table()
 
-            # Call refresh (same path) - this spawns a worker
-            browser.refresh_directory()
+        assert len(browser._selected) == 1, "Should have 1 file selected"
+        assert file_path in browser._selected
 
-            # Wait for worker to complete
-            await pilot.pause()
+        # Call refresh (same path) and wait for its worker to finish
+        await browser.refresh_directory().wait()
 
-            # Selections should be preserved since path didn't change
-            assert len(browser._selected) == 1, (
-                f"Selections should be preserved on refresh of same directory, "
-                f"but got {len(browser._selected)} selections (bug: cleared)"
-            )
-            assert file_path in browser._selected
+        # Selections should be preserved since path didn't change
+        assert len(browser._selected) == 1, (
+            f"Selections should be preserved on refresh of same directory, "
+            f"but got {len(browser._selected)} selections (bug: cleared)"
+        )
+        assert file_path in browser._selected
 
-    async def test_directory_change_clears_selections(self):
+    async def test_directory_change_clears_selections(self, root_browser):
         """Navigating to different directory SHOULD clear selections."""
-        sftp = MockSFTPClient(create_mock_files())
-        await sftp.connect()
-
-        app = FileBrowserTestApp(sftp)
-        async with app.run_test() as pilot:
-            browser = app.query_one("#browser", FileBrowser)
+        browser, _ = root_browser
 
-            # Load root directory
-            browser._files = await sftp.list_dir("/")
-            browser.current_path = "/"
-            browser._update_table()
-
-            # Select a file
-            file_path = browser._files[0].path
-            browser._selected.add(file_path)
-            assert len(browser._selected) == 1
-
-            # Navigate to different directory - should clear selections
-            browser.load_directory("/subdir")
+        # Select a file
+        file_path = browser._files[0].path
+        browser._selected.add(file_path)
+        assert len(browser._selected) == 1
 
-            # Wait for worker to complete
-            await pilot.pause()
+        # Navigate to different directory - should clear selections
+        await browser.load_directory("/subdir").wait()
 
-            # Selections should be cleared since we changed directories
-            assert len(browser._selected) == 0, (
-                "Selections should be cleared when navigating to different directory"
-            )
+        # Selections should be cleared since we changed directories
+        assert len(browser._selected) == 0, (
+            "Selections should be cleared when navigating to different directory"
+        )
 
 
 class TestFileBrowserCursor:
     """Tests for cursor behavior in FileBrowser."""
 
     @pytest.fixture
-    def browser_with_files(
-        self, mock_files: list[RemoteFile]
-    ) -> tuple[FileBrowser, MockSFTPClient]:
+    def browser_with_files(self, mock_sftp: MockSFTPClient) -> tuple[FileBrowser, MockSFTPClient]:
         """Create a FileBrowser with mock SFTP client."""
-        sftp = MockSFTPClient(mock_files)
-        browser = FileBrowser(sftp_client=sftp)
-        return browser, sftp
+        return FileBrowser(sftp_client=mock_sftp), mock_sftp
 
     async def test_toggle_select_preserves_cursor_position(
         self, browser_with_files: tuple[FileBrowser, MockSFTPClient]
@@ -201,137 +188,39 @@ class TestFileBrowserCursor:
         browser.current_path = "/"
 
         # Verify we have files to select
-        files_only = [f for f in browser._files if not f.is_dir]
+        files_only = sftp.files_only
         assert len(files_only) >= 2, "Need at least 2 files for this test"
 
 
-class TestFileBrowserSelections:
-    """Tests for selection behavior in FileBrowser."""
-
-    @pytest.fixture
-    def browser_with_files(
-        self, mock_files: list[RemoteFile]
-    ) -> tuple[FileBrowser, MockSFTPClient]:
-        """Create a FileBrowser with mock SFTP client."""
-        sftp = MockSFTPClient(mock_files)
-        browser = FileBrowser(sftp_client=sftp)
-        return browser, sftp
-
-    async def test_refresh_preserves_selections(
-        self, browser_with_files: tuple[FileBrowser, MockSFTPClient]
-    ):
-        """BUG: Refreshing directory should NOT clear selections.
-
-        Current behavior: All selections lost on refresh.
-        Expected behavior: Selections persist across refresh of same directory.
-        """
-        browser, sftp = browser_with_files
-        await sftp.connect()
-
-        # Load initial directory
-        browser._files = await sftp.list_dir("/")
-        browser.current_path = "/"
-
-        # Select some files
-        files_only = [f for f in browser._files if not f.is_dir]
-        for f in files_only[:2]:
-            browser._selected.add(f.path)
-
-        selected_before = set(browser._selected)
-        assert len(selected_before) == 2
-
-        # Currently, load_directory clears selections unconditionally
-        # This simulates refresh - same path
-        # After fix, selections should be preserved for same directory
-        browser._files = await sftp.list_dir("/")
-        # BUG: load_directory() calls _selected.clear() on line 115
-
-        # For now, test that we HAVE selections before the clear
-        # The actual fix will preserve them
-        assert len(selected_before) == 2
-
-    async def test_directory_change_clears_selections(
-        self, browser_with_files: tuple[FileBrowser, MockSFTPClient]
-    ):
-        """Changing to different directory SHOULD clear selections."""
-        browser, sftp = browser_with_files
-        await sftp.connect()
-
-        # Load root
-        browser._files = await sftp.list_dir("/")
-        browser.current_path = "/"
-
-        # Select a file
-        files_only = [f for f in browser._files if not f.is_dir]
-        browser._selected.add(files_only[0].path)
-        assert len(browser._selected) == 1
-
-        # Change to subdirectory - selections SHOULD be cleared
-        browser.current_path = "/subdir"
-        browser._files = await sftp.list_dir("/subdir")
-        # This is correct behavior - new directory should clear old selections
-        browser._selected.clear()
-
-        assert len(browser._selected) == 0
-
-    async def test_select_all_only_selects_files(
-        self, browser_with_files: tuple[FileBrowser, MockSFTPClient]
-    ):
-        """Select all should only select files, not directories."""
-        browser, sftp = browser_with_files
-        await sftp.connect()
-
-        browser._files = await sftp.list_dir("/")
-        browser.current_path = "/"
-
-        # Call select all logic
-        for f in browser._files:
-            if not f.is_dir:
-                browser._selected.add(f.path)
-
-        # Verify no directories selected
-        for path in browser._selected:
-            file = next(f for f in browser._files if f.path == path)
-            assert not file.is_dir, f"Directory {path} should not be selected"
-
-        # Verify files are selected
-        files_only = [f for f in browser._files if not f.is_dir]
-        assert len(browser._selected) == len(files_only)
+@pytest.mark.textual
+class TestFileBrowserSelectionActions:
+    """Tests for the select-all and clear-selection actions."""
 
-    async def test_clear_selection_clears_all(
-        self, browser_with_files: tuple[FileBrowser, MockSFTPClient]
+    @pytest.mark.parametrize(
+        ("action", "files_selected"),
+        [("action_select_all", True), ("action_clear_selection", False)],
+        ids=["select-all", "clear"],
+    )
+    async def test_selection_action(
+        self, root_browser, connected_mock_sftp: MockSFTPClient, action, files_selected
     ):
-        """Clear selection should remove all selections."""
-        browser, sftp = browser_with_files
-        await sftp.connect()
-
-        browser._files = await sftp.list_dir("/")
-        browser.current_path = "/"
-
-        # Select some files
-        for f in browser._files[:2]:
-            if not f.is_dir:
-                browser._selected.add(f.path)
-
-        assert len(browser._selected) > 0
+        """Select all should pick every file but no directories; clear should empty it."""
+        browser, _ = root_browser
+        browser._selected.add(browser._files[0].path)
 
-        # Clear
-        browser._selected.clear()
+        getattr(browser, action)()
 
-        assert len(browser._selected) == 0
+        expected = {f.path for f in connected_mock_sftp.files_only} if files_selected else set()
+        assert browser._selected == expected
 
 
 class TestFileBrowserNavigation:
     """Tests for navigation in FileBrowser."""
 
     @pytest.fixture
-    def browser_with_files(
-        self, mock_files: list[RemoteFile]
-    ) -> tuple[FileBrowser, MockSFTPClient]:
+    def browser_with_files(self, mock_sftp: MockSFTPClient) -> tuple[FileBrowser, MockSFTPClient]:
         """Create a FileBrowser with mock SFTP client."""
-        sftp = MockSFTPClient(mock_files)
-        browser = FileBrowser(sftp_client=sftp)
-        return browser, sftp
+        return FileBrowser(sftp_client=mock_sftp), mock_sftp
 
     async def test_go_up_from_subdir(self, browser_with_files: tuple[FileBrowser, MockSFTPClient]):
         """Go up should navigate to parent directory."""
@@ -341,8 +230,6 @@ class TestFileBrowserNavigation:
         browser.current_path = "/subdir"
 
         # Go up logic
-        from pathlib import PurePosixPath
-
         parent = str(PurePosixPath(browser.current_path).parent)
 
         assert parent == "/"
@@ -358,8 +245,6 @@ class TestFileBrowserNavigation:
 
         # Should not change
         if browser.current_path != "/":
-            from pathlib import PurePosixPath
-
             parent = str(PurePosixPath(browser.current_path).parent)
         else:
             parent = "/"
@@ -367,6 +252,7 @@ class TestFileBrowserNavigation:
         assert parent == "/"
 
 
+@pytest.mark.textual
 class TestFileBrowserConnectionLost:
     """Test connection drop handling."""
 
@@ -1,7 +1,11 @@
 """Tests for data models."""
 
+import functools
+from collections.abc import Callable
 from datetime import datetime
 
+import pytest
+
 from queued.models import (
     Host,
     RemoteFile,
@@ -12,176 +16,101 @@ from queued.models import (
 )
 
 
+@pytest.fixture(scope="module")
+def transfer_factory() -> Callable[..., Transfer]:
+    """Build a 1000-byte download of /file.txt; keyword arguments override fields."""
+    return functools.partial(
+        Transfer,
+        id="test-1",
+        remote_path="/file.txt",
+        local_path="/tmp/file.txt",
+        direction=TransferDirection.DOWNLOAD,
+        size=1000,
+    )
+
+
 class TestTransferProgress:
     """Tests for Transfer.progress property."""
 
-    def test_progress_at_zero(self):
-        """Progress should be 0% when no bytes transferred."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
-            size=1000,
-            bytes_transferred=0,
-        )
+    @pytest.mark.parametrize(
+        ("bytes_transferred", "size", "expected"),
+        [
+            (0, 1000, 0.0),
+            (500, 1000, 50.0),
+            (1000, 1000, 100.0),
+            # Zero size file is always complete
+            (0, 0, 100.0),
+        ],
+        ids=["zero", "half", "complete", "zero-size-file"],
+    )
+    def test_progress(self, transfer_factory, bytes_transferred, size, expected):
+        """Progress should be the transferred percentage of size."""
+        transfer = transfer_factory(size=size, bytes_transferred=bytes_transferred)
+        assert transfer.progress == expected
+
+    def test_progress_recomputed_after_update(self, transfer_factory):
+        """Cached progress should be discarded when bytes_transferred changes."""
+        transfer = transfer_factory()
         assert transfer.progress == 0.0
 
-    def test_progress_at_half(self):
-        """Progress should be 50% when half transferred."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
-            size=1000,
-            bytes_transferred=500,
-        )
-        assert transfer.progress == 50.0
-
-    def test_progress_complete(self):
-        """Progress should be 100% when fully transferred."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
-            size=1000,
-            bytes_transferred=1000,
-        )
-        assert transfer.progress == 100.0
-
-    def test_progress_zero_size_file(self):
-        """Zero size file should show 100% progress."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/empty.txt",
-            local_path="/tmp/empty.txt",
-            direction=TransferDirection.DOWNLOAD,
-            size=0,
-            bytes_transferred=0,
-        )
-        assert transfer.progress == 100.0
+        transfer.bytes_transferred = 250
+        assert transfer.progress == 25.0
 
 
 class TestTransferSpeedHuman:
     """Tests for Transfer.speed_human property."""
 
-    def test_speed_zero(self):
-        """Zero speed should display as 0 B/s."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
-            size=1000,
-            speed=0,
-        )
-        assert transfer.speed_human == "0 B/s"
-
-    def test_speed_bytes(self):
-        """Speed under 1KB should display in B/s."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
-            size=1000,
-            speed=512,
-        )
-        assert transfer.speed_human == "512.0 B/s"
-
-    def test_speed_kilobytes(self):
-        """Speed in KB range should display in KB/s."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
-            size=1000,
-            speed=1024 * 50,  # 50 KB/s
-        )
-        assert transfer.speed_human == "50.0 KB/s"
-
-    def test_speed_megabytes(self):
-        """Speed in MB range should display in MB/s."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
-            size=1000,
-            speed=1024 * 1024 * 10,  # 10 MB/s
-        )
-        assert transfer.speed_human == "10.0 MB/s"
+    @pytest.mark.parametrize(
+        ("speed", "expected"),
+        [
+            (0, "0 B/s"),
+            (512, "512.0 B/s"),
+            (1024 * 50, "50.0 KB/s"),
+            (1024 * 1024 * 10, "10.0 MB/s"),
+        ],
+        ids=["zero", "bytes", "kilobytes", "megabytes"],
+    )
+    def test_speed_human(self, transfer_factory, speed, expected):
+        """Speed should display in the largest fitting unit."""
+        transfer = transfer_factory(speed=speed)
+        assert transfer.speed_human == expected
 
 
 class TestTransferETA:
     """Tests for Transfer.eta property."""
 
-    def test_eta_when_not_transferring(self):
+    def test_eta_when_not_transferring(self, transfer_factory):
         """ETA should be None when not actively transferring."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
-            size=1000,
-            status=TransferStatus.QUEUED,
-            speed=100,
-        )
+        transfer = transfer_factory(status=TransferStatus.QUEUED, speed=100)
         assert transfer.eta is None
 
-    def test_eta_when_speed_zero(self):
+    def test_eta_when_speed_zero(self, transfer_factory):
         """ETA should be None when speed is zero."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
-            size=1000,
-            status=TransferStatus.TRANSFERRING,
-            speed=0,
-        )
+        transfer = transfer_factory(status=TransferStatus.TRANSFERRING, speed=0)
         assert transfer.eta is None
 
-    def test_eta_seconds(self):
+    def test_eta_seconds(self, transfer_factory):
         """ETA under 1 minute should show seconds."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
-            size=1000,
+        transfer = transfer_factory(
             bytes_transferred=500,
             status=TransferStatus.TRANSFERRING,
             speed=100,  # 500 bytes remaining / 100 B/s = 5 seconds
         )
         assert transfer.eta == "5s"
 
-    def test_eta_minutes(self):
+    def test_eta_minutes(self, transfer_factory):
         """ETA over 1 minute should show minutes and seconds."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
+        transfer = transfer_factory(
             size=10000,
-            bytes_transferred=0,
             status=TransferStatus.TRANSFERRING,
             speed=100,  # 10000 bytes / 100 B/s = 100 seconds = 1m 40s
         )
         assert transfer.eta == "1m 40s"
 
-    def test_eta_hours(self):
+    def test_eta_hours(self, transfer_factory):
         """ETA over 1 hour should show hours and minutes."""
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
+        transfer = transfer_factory(
             size=1024 * 1024 * 100,  # 100 MB
-            bytes_transferred=0,
             status=TransferStatus.TRANSFERRING,
             speed=1024 * 10,  # 10 KB/s -> ~2.8 hours
         )
@@ -189,118 +118,68 @@ class TestTransferETA:
         assert eta is not None
         assert "h" in eta
 
+    def test_eta_recomputed_after_status_change(self, transfer_factory):
+        """Cached ETA should be discarded when the transfer starts."""
+        transfer = transfer_factory(speed=100)
+        assert transfer.eta is None
+
+        transfer.status = TransferStatus.TRANSFERRING
+        assert transfer.eta == "10s"
+
 
 class TestTransferQueue:
     """Tests for TransferQueue methods."""
 
-    def test_has_queued_in_directory_true(self):
+    def test_has_queued_in_directory_true(self, transfer_factory):
         """Should return True when directory contains queued files."""
         queue = TransferQueue()
         queue.transfers.append(
-            Transfer(
-                id="test-1",
-                remote_path="/media/files/movie.mkv",
-                local_path="/tmp/movie.mkv",
-                direction=TransferDirection.DOWNLOAD,
-                size=1000,
-                status=TransferStatus.QUEUED,
-            )
+            transfer_factory(remote_path="/media/files/movie.mkv", local_path="/tmp/movie.mkv")
         )
 
         assert queue.has_queued_in_directory("/media/files") is True
         assert queue.has_queued_in_directory("/media") is True
 
-    def test_has_queued_in_directory_false(self):
+    def test_has_queued_in_directory_false(self, transfer_factory):
         """Should return False when no queued files in directory."""
         queue = TransferQueue()
-        queue.transfers.append(
-            Transfer(
-                id="test-1",
-                remote_path="/other/file.txt",
-                local_path="/tmp/file.txt",
-                direction=TransferDirection.DOWNLOAD,
-                size=1000,
-                status=TransferStatus.QUEUED,
-            )
-        )
+        queue.transfers.append(transfer_factory(remote_path="/other/file.txt"))
 
         assert queue.has_queued_in_directory("/media/files") is False
 
-    def test_has_queued_excludes_completed(self):
+    def test_has_queued_excludes_completed(self, transfer_factory):
         """Should not count completed transfers."""
         queue = TransferQueue()
         queue.transfers.append(
-            Transfer(
-                id="test-1",
+            transfer_factory(
                 remote_path="/media/files/done.txt",
                 local_path="/tmp/done.txt",
-                direction=TransferDirection.DOWNLOAD,
-                size=1000,
                 status=TransferStatus.COMPLETED,
             )
         )
 
         assert queue.has_queued_in_directory("/media/files") is False
 
-    def test_is_queued_returns_true_for_queued(self):
-        """is_queued should return True for queued files."""
+    @pytest.mark.parametrize(
+        ("status", "expected"),
+        [
+            (TransferStatus.QUEUED, True),
+            (TransferStatus.COMPLETED, False),
+            (TransferStatus.FAILED, False),
+        ],
+        ids=["queued", "excludes-completed", "excludes-failed"],
+    )
+    def test_is_queued(self, transfer_factory, status, expected):
+        """is_queued should only count transfers that have not finished."""
         queue = TransferQueue()
-        queue.transfers.append(
-            Transfer(
-                id="test-1",
-                remote_path="/file.txt",
-                local_path="/tmp/file.txt",
-                direction=TransferDirection.DOWNLOAD,
-                size=1000,
-                status=TransferStatus.QUEUED,
-            )
-        )
+        queue.transfers.append(transfer_factory(status=status))
 
-        assert queue.is_queued("/file.txt") is True
-
-    def test_is_queued_excludes_completed(self):
-        """is_queued should return False for completed files."""
-        queue = TransferQueue()
-        queue.transfers.append(
-            Transfer(
-                id="test-1",
-                remote_path="/file.txt",
-                local_path="/tmp/file.txt",
-                direction=TransferDirection.DOWNLOAD,
-                size=1000,
-                status=TransferStatus.COMPLETED,
-            )
-        )
+        assert queue.is_queued("/file.txt") is expected
 
-        assert queue.is_queued("/file.txt") is False
-
-    def test_is_queued_excludes_failed(self):
-        """is_queued should return False for failed files."""
-        queue = TransferQueue()
-        queue.transfers.append(
-            Transfer(
-                id="test-1",
-                remote_path="/file.txt",
-                local_path="/tmp/file.txt",
-                direction=TransferDirection.DOWNLOAD,
-                size=1000,
-                status=TransferStatus.FAILED,
-            )
-        )
-
-        assert queue.is_queued("/file.txt") is False
-
-    def test_get_by_remote_path(self):
+    def test_get_by_remote_path(self, transfer_factory):
         """Should find transfer by remote path."""
         queue = TransferQueue()
-        transfer = Transfer(
-            id="test-1",
-            remote_path="/file.txt",
-            local_path="/tmp/file.txt",
-            direction=TransferDirection.DOWNLOAD,
-            size=1000,
-        )
-        queue.transfers.append(transfer)
+        queue.transfers.append(transfer_factory())
 
         found = queue.get_by_remote_path("/file.txt")
         assert found is not None
@@ -312,34 +191,132 @@ class TestTransferQueue:
         found = queue.get_by_remote_path("/nonexistent.txt")
         assert found is None
 
-    def test_get_by_remote_path_with_host_key(self):
+    def test_get_by_remote_path_with_host_key(self, transfer_factory):
         """Should match by host_key when provided."""
         queue = TransferQueue()
+        queue.transfers.append(transfer_factory(host_key="user@host1:22"))
         queue.transfers.append(
-            Transfer(
-                id="test-1",
-                remote_path="/file.txt",
-                local_path="/tmp/file.txt",
-                direction=TransferDirection.DOWNLOAD,
-                size=1000,
-                host_key="user@host1:22",
-            )
-        )
-        queue.transfers.append(
-            Transfer(
-                id="test-2",
-                remote_path="/file.txt",
-                local_path="/tmp/file2.txt",
-                direction=TransferDirection.DOWNLOAD,
-                size=1000,
-                host_key="user@host2:22",
-            )
+            transfer_factory(id="test-2", local_path="/tmp/file2.txt", host_key="user@host2:22")
         )
 
         found = queue.get_by_remote_path("/file.txt", "user@host2:22")
         assert found is not None
         assert found.id == "test-2"
 
+    def test_lookups_follow_remove_and_reorder(self, transfer_factory):
+        """Path lookups should stay consistent as the queue is edited."""
+        queue = TransferQueue()
+        queue.transfers.extend(
+            [
+                transfer_factory(id="a", remote_path="/media/a.mkv"),
+                transfer_factory(id="b", remote_path="/file.txt", host_key="user@host1:22"),
+                transfer_factory(id="c", remote_path="/file.txt", host_key="user@host2:22"),
+            ]
+        )
+
+        # First match follows queue order, including after reordering
+        assert queue.get_by_remote_path("/file.txt").id == "b"
+        queue.move_up("c")
+        assert queue.get_by_remote_path("/file.txt").id == "c"
+
+        queue.remove("a")
+        assert queue.get_by_remote_path("/media/a.mkv") is None
+        assert queue.get_by_id("a") is None
+        assert queue.remove("a") is False
+        assert queue.has_queued_in_directory("/media") is False
+        assert queue.has_queued_in_directory("/") is True
+
+    def test_active_count_follows_status_changes(self, transfer_factory):
+        """active_count should track status edits and queue membership without rescanning."""
+        queue = TransferQueue(max_concurrent=2)
+        a, b, c = (
+            transfer_factory(id=i, remote_path=f"/{i}.txt", status=TransferStatus.TRANSFERRING)
+            for i in "abc"
+        )
+        queue.transfers.extend([a, b])
+        assert queue.active_count == 2
+        assert queue.can_start_more is False
+
+        a.status = TransferStatus.COMPLETED
+        assert queue.active_count == 1
+        assert queue.can_start_more is True
+
+        queue.transfers.append(c)
+        queue.remove("b")
+        b.status = TransferStatus.QUEUED  # No longer in the queue, so not counted
+        assert queue.active_count == 1
+
+        queue.transfers.clear()
+        c.status = TransferStatus.FAILED
+        assert queue.active_count == 0
+
+    @pytest.mark.parametrize(
+        ("move", "moved_id"), [("move_up", "b"), ("move_down", "a")], ids=["up", "down"]
+    )
+    def test_active_count_follows_status_changes_after_reorder(
+        self, transfer_factory, move, moved_id
+    ):
+        """Both transfers swapped by a move should keep reporting status changes."""
+        queue = TransferQueue()
+        a, b, c = (transfer_factory(id=i, remote_path=f"/{i}.txt") for i in "abc")
+        queue.transfers.extend([a, b, c])
+
+        assert getattr(queue, move)(moved_id) is True
+        assert [t.id for t in queue.transfers] == ["b", "a", "c"]
+
+        for t in (a, b):
+            t.status = TransferStatus.TRANSFERRING
+        assert queue.active_count == 2
+        assert queue.transfers.count_with_status(TransferStatus.QUEUED) == 1
+
+        b.status = TransferStatus.COMPLETED
+        assert queue.active_count == 1
+        assert queue.get_by_id("b") is b
+
+    def test_status_counts_follow_status_changes(self, transfer_factory):
+        """count_with_status should track every status, not just TRANSFERRING."""
+        queue = TransferQueue()
+        a, b, c = (transfer_factory(id=i, remote_path=f"/{i}.txt") for i in "abc")
+        queue.transfers.extend([a, b, c])
+        assert queue.transfers.count_with_status(TransferStatus.QUEUED) == 3
+
+        a.status = TransferStatus.PAUSED
+        b.status = TransferStatus.COMPLETED
+        assert queue.transfers.count_with_status(TransferStatus.QUEUED) == 1
+        assert queue.transfers.count_with_status(TransferStatus.PAUSED) == 1
+        assert queue.transfers.count_with_status(TransferStatus.COMPLETED) == 1
+
+        queue.remove("b")
+        queue.transfers[0] = transfer_factory(id="d", status=TransferStatus.FAILED)
+        assert queue.transfers.count_with_status(TransferStatus.COMPLETED) == 0
+        assert queue.transfers.count_with_status(TransferStatus.PAUSED) == 0
+        assert queue.transfers.count_with_status(TransferStatus.FAILED) == 1
+
+    def test_del_and_imul_keep_indexes(self, transfer_factory):
+        """del by index or slice and *= should keep lookups and status counts current."""
+        queue = TransferQueue()
+        a, b, c = (transfer_factory(id=i, remote_path=f"/media/{i}.txt") for i in "abc")
+        queue.transfers.extend([a, b, c])
+
+        del queue.transfers[1]
+        assert queue.get_by_id("b") is None
+        b.status = TransferStatus.TRANSFERRING  # No longer in the queue, so not counted
+        assert queue.active_count == 0
+
+        queue.transfers *= 2
+        assert [t.id for t in queue.transfers] == ["a", "c", "a", "c"]
+        assert len(queue.transfers.under_directory("/media/")) == 4
+        assert queue.transfers.count_with_status(TransferStatus.QUEUED) == 4
+
+        del queue.transfers[2:]
+        a.status = TransferStatus.TRANSFERRING
+        assert queue.active_count == 1
+        assert len(queue.transfers.under_directory("/media/")) == 2
+
+        queue.transfers *= 0
+        assert queue.get_by_id("a") is None
+        assert queue.transfers.count_with_status(TransferStatus.QUEUED) == 0
+
 
 class TestHostSerialization:
     """Tests for Host serialization."""
@@ -366,7 +343,7 @@ class TestHostSerialization:
         assert restored.last_directory == host.last_directory
 
     def test_host_password_obfuscation(self):
-        """Password should be base64 encoded in serialized form."""
+        """Password should be hex encoded in serialized form."""
         host = Host(
             hostname="example.com",
             username="testuser",
@@ -375,13 +352,20 @@ class TestHostSerialization:
 
         data = host.to_dict()
         assert "password" not in data
-        assert "_pw" in data
-        assert data["_pw"] != "secret123"
+        assert "_pwx" in data
+        assert data["_pwx"] != "secret123"
 
         # Should decode correctly
         restored = Host.from_dict(data)
         assert restored.password == "secret123"
 
+    def test_host_password_legacy_base64(self):
+        """Passwords saved in the older base64 form should still load."""
+        data = {"hostname": "example.com", "username": "testuser", "_pw": "c2VjcmV0MTIz"}
+
+        restored = Host.from_dict(data)
+        assert restored.password == "secret123"
+
     def test_host_key_format(self):
         """host_key should be user@hostname:port."""
         host = Host(hostname="example.com", username="testuser", port=22)
@@ -469,3 +453,12 @@ class TestTransferSerialization:
         assert restored.bytes_transferred == transfer.bytes_transferred
         assert restored.started_at == transfer.started_at
         assert restored.checksum == transfer.checksum
+
+    def test_from_dict_shares_host_key_string(self, transfer_factory):
+        """Transfers loaded for the same host should share one host_key object."""
+        data = transfer_factory(host_key="user@host:22").to_dict()
+        # Separate but equal strings, as json.load produces for each entry
+        first = Transfer.from_dict({**data, "host_key": "".join(["user@", "host:22"])})
+        second = Transfer.from_dict({**data, "host_key": "".join(["user@host", ":22"])})
+
+        assert first.host_key is second.host_key
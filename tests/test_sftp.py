@@ -2,6 +2,8 @@
 
 import asyncio
 import tempfile
+import time
+from collections import namedtuple
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -13,9 +15,17 @@ from queued.sftp import (
     SFTPClient,
     SFTPConnectionPool,
     SFTPError,
+    close_cached_connections,
 )
 
 
+@pytest.fixture(autouse=True)
+def fresh_connection_cache():
+    """Stop SSH connections cached by one test from being reused by the next."""
+    yield
+    close_cached_connections()
+
+
 class TestSFTPClientConnection:
     """Tests for SFTP client connection."""
 
@@ -26,6 +36,7 @@ class TestSFTPClientConnection:
         client = SFTPClient(host)
 
         mock_conn = AsyncMock()
+        mock_conn.close = MagicMock()
         mock_sftp = AsyncMock()
         mock_conn.start_sftp_client = AsyncMock(return_value=mock_sftp)
 
@@ -38,6 +49,24 @@ class TestSFTPClientConnection:
             assert client.connected is True
             mock_patch.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_connect_options_override_defaults(self):
+        """Options given to the client should win over the built-in connect kwargs."""
+        host = Host(hostname="example.com", username="user", key_path="/path/to/key")
+        client = SFTPClient(host, known_hosts=None, client_keys=[])
+
+        mock_conn = AsyncMock()
+        mock_conn.close = MagicMock()
+        mock_conn.start_sftp_client = AsyncMock(return_value=AsyncMock())
+
+        with patch("asyncssh.connect", AsyncMock(return_value=mock_conn)) as mock_patch:
+            await client.connect()
+
+        kwargs = mock_patch.call_args.kwargs
+        assert kwargs["known_hosts"] is None
+        assert kwargs["client_keys"] == []
+        assert kwargs["agent_path"] is None
+
     @pytest.mark.asyncio
     async def test_connect_host_key_error(self):
         """Host key verification failure should raise SFTPError."""
@@ -96,6 +125,84 @@ class TestSFTPClientConnection:
         mock_sftp.exit.assert_called_once()
         mock_conn.close.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_reconnect_reuses_lingering_connection(self):
+        """Reconnecting to a host soon after disconnecting should skip the handshake."""
+        host = Host(hostname="example.com", username="user")
+
+        mock_conn = AsyncMock()
+        mock_conn.is_closed = MagicMock(return_value=False)
+        mock_conn.close = MagicMock()
+        mock_conn.start_sftp_client = AsyncMock(return_value=MagicMock())
+
+        with patch("asyncssh.connect", AsyncMock(return_value=mock_conn)) as mock_connect:
+            first = SFTPClient(host)
+            await first.connect()
+            await first.disconnect()
+            mock_conn.close.assert_not_called()
+
+            second = SFTPClient(host)
+            await second.connect()
+
+            assert second.connected is True
+            mock_connect.assert_called_once()
+
+        close_cached_connections()
+        mock_conn.close.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_disconnect_without_linger_spares_other_clients(self):
+        """A non-lingering disconnect should only close a shared connection once unused."""
+        host = Host(hostname="example.com", username="user")
+
+        def make_conn():
+            conn = AsyncMock()
+            conn.is_closed = MagicMock(return_value=False)
+            conn.close = MagicMock()
+            conn.start_sftp_client = AsyncMock(return_value=MagicMock())
+            return conn
+
+        shared, fresh = make_conn(), make_conn()
+        with patch("asyncssh.connect", AsyncMock(side_effect=[shared, fresh])) as mock_connect:
+            a, b = SFTPClient(host), SFTPClient(host)
+            await a.connect()
+            await b.connect()
+            assert mock_connect.await_count == 1
+
+            await a.disconnect(linger=False)
+            shared.close.assert_not_called()
+            assert b.connected is True
+
+            # The connection is no longer handed out, so a new client dials afresh
+            c = SFTPClient(host)
+            await c.connect()
+            assert mock_connect.await_count == 2
+
+            await b.disconnect()
+            shared.close.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_connect_options_are_part_of_cache_key(self):
+        """Clients with different connect options should not share a connection."""
+        host = Host(hostname="example.com", username="user")
+
+        mock_conn = AsyncMock()
+        mock_conn.is_closed = MagicMock(return_value=False)
+        mock_conn.close = MagicMock()
+        mock_conn.start_sftp_client = AsyncMock(return_value=MagicMock())
+
+        with patch("asyncssh.connect", AsyncMock(return_value=mock_conn)) as mock_connect:
+            await SFTPClient(host).connect()
+            await SFTPClient(host, known_hosts=None).connect()
+
+            assert mock_connect.await_count == 2
+            assert mock_connect.await_args.kwargs["known_hosts"] is None
+
+
+# Plain stand-ins for asyncssh's SFTPAttrs and SFTPName
+FakeAttrs = namedtuple("FakeAttrs", "mtime size permissions type")
+FakeEntry = namedtuple("FakeEntry", "filename attrs")
+
 
 class TestSFTPClientOperations:
     """Tests for SFTP operations."""
@@ -117,29 +224,14 @@ class TestSFTPClientOperations:
         host = Host(hostname="example.com", username="user")
         client = SFTPClient(host)
 
-        # Create mock SFTP and entries
-        mock_attrs1 = MagicMock()
-        mock_attrs1.mtime = 1704067200  # 2024-01-01
-        mock_attrs1.size = 1000
-        mock_attrs1.permissions = 0o644
-        mock_attrs1.type = 1  # Regular file
-
-        mock_entry1 = MagicMock()
-        mock_entry1.filename = "file.txt"
-        mock_entry1.attrs = mock_attrs1
-
-        mock_attrs2 = MagicMock()
-        mock_attrs2.mtime = 1704067200
-        mock_attrs2.size = 0
-        mock_attrs2.permissions = 0o755
-        mock_attrs2.type = asyncssh.FILEXFER_TYPE_DIRECTORY
-
-        mock_entry2 = MagicMock()
-        mock_entry2.filename = "subdir"
-        mock_entry2.attrs = mock_attrs2
+        # 1704067200 = 2024-01-01; type 1 = regular file
+        file_entry = FakeEntry("file.txt", FakeAttrs(1704067200, 1000, 0o644, 1))
+        dir_entry = FakeEntry(
+            "subdir", FakeAttrs(1704067200, 0, 0o755, asyncssh.FILEXFER_TYPE_DIRECTORY)
+        )
 
         mock_sftp = AsyncMock()
-        mock_sftp.readdir = AsyncMock(return_value=[mock_entry1, mock_entry2])
+        mock_sftp.readdir = AsyncMock(return_value=[file_entry, dir_entry])
 
         client._sftp = mock_sftp
         client._connected = True
@@ -159,18 +251,8 @@ class TestSFTPClientOperations:
         host = Host(hostname="example.com", username="user")
         client = SFTPClient(host)
 
-        mock_attrs = MagicMock()
-        mock_attrs.mtime = None
-        mock_attrs.size = 0
-        mock_attrs.permissions = None
-        mock_attrs.type = 1
-
-        entries = []
-        for name in [".", "..", "file.txt"]:
-            entry = MagicMock()
-            entry.filename = name
-            entry.attrs = mock_attrs
-            entries.append(entry)
+        attrs = FakeAttrs(mtime=None, size=0, permissions=None, type=1)
+        entries = [FakeEntry(name, attrs) for name in [".", "..", "file.txt"]]
 
         mock_sftp = AsyncMock()
         mock_sftp.readdir = AsyncMock(return_value=entries)
@@ -217,6 +299,67 @@ class TestSFTPClientOperations:
 
         assert result is False
 
+    @pytest.mark.asyncio
+    async def test_files_exist_lists_each_parent_once(self):
+        """files_exist should take one listing per distinct parent directory."""
+        import asyncssh
+
+        client = SFTPClient(Host(hostname="example.com", username="user"))
+
+        listings = {"/a": [".", "..", "one.txt", "two.txt"], "/b": ["three.txt"]}
+
+        async def listdir(path):
+            if path not in listings:
+                raise asyncssh.SFTPError(2, "No such file")
+            return listings[path]
+
+        mock_sftp = AsyncMock()
+        mock_sftp.listdir = AsyncMock(side_effect=listdir)
+        client._sftp = mock_sftp
+
+        result = await client.files_exist(
+            ["/a/one.txt", "/a/two.txt", "/a/nope.txt", "/b/three.txt", "/gone/x.txt"]
+        )
+
+        assert result == {
+            "/a/one.txt": True,
+            "/a/two.txt": True,
+            "/a/nope.txt": False,
+            "/b/three.txt": True,
+            "/gone/x.txt": False,
+        }
+        assert mock_sftp.listdir.await_count == 3
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("size", "expected"), [(12, b"test content"), (2048, None)], ids=["read", "too-large"]
+    )
+    async def test_read_file_sizes_read_from_open_handle(self, size, expected):
+        """read_file should check the size on the open handle rather than stat the path."""
+        client = SFTPClient(Host(hostname="example.com", username="user"))
+
+        mock_attrs = MagicMock()
+        mock_attrs.size = size
+
+        mock_file = AsyncMock()
+        mock_file.stat = AsyncMock(return_value=mock_attrs)
+        mock_file.read = AsyncMock(return_value=b"test content")
+        mock_file.__aenter__ = AsyncMock(return_value=mock_file)
+        mock_file.__aexit__ = AsyncMock(return_value=None)
+
+        mock_sftp = AsyncMock()
+        mock_sftp.open = MagicMock(return_value=mock_file)
+        client._sftp = mock_sftp
+
+        if expected is None:
+            with pytest.raises(SFTPError, match="File too large"):
+                await client.read_file("/remote/file.sfv", max_size=1024)
+            mock_file.read.assert_not_called()
+        else:
+            assert await client.read_file("/remote/file.sfv") == expected
+            mock_file.read.assert_awaited_once_with(size, 0)
+        mock_sftp.stat.assert_not_called()
+
 
 class TestBandwidthLimiter:
     """Tests for bandwidth limiter."""
@@ -227,9 +370,9 @@ class TestBandwidthLimiter:
         limiter = BandwidthLimiter(limit=None)
 
         # Should return immediately
-        start = asyncio.get_event_loop().time()
+        start = time.monotonic()
         await limiter.throttle(1024 * 1024)  # 1MB
-        elapsed = asyncio.get_event_loop().time() - start
+        elapsed = time.monotonic() - start
 
         assert elapsed < 0.1  # Should be nearly instant
 
@@ -238,29 +381,28 @@ class TestBandwidthLimiter:
         """Zero limit should not throttle."""
         limiter = BandwidthLimiter(limit=0)
 
-        start = asyncio.get_event_loop().time()
+        start = time.monotonic()
         await limiter.throttle(1024 * 1024)
-        elapsed = asyncio.get_event_loop().time() - start
+        elapsed = time.monotonic() - start
 
         assert elapsed < 0.1
 
     @pytest.mark.asyncio
     async def test_bandwidth_limiter_throttles(self):
-        """Limiter should throttle when exceeding rate."""
-        # 10KB/s limit
+        """Limiter should only sleep once the burst allowance is used up."""
+        # 10KB/s limit, so the bucket holds 10KB
         limiter = BandwidthLimiter(limit=10 * 1024)
 
-        # Transfer 20KB quickly - should throttle
-        await limiter.throttle(10 * 1024)
-        await asyncio.sleep(0.01)  # Small delay
+        with patch("queued.sftp.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            # First 10KB fits in the bucket
+            await limiter.throttle(10 * 1024)
+            mock_sleep.assert_not_awaited()
 
-        start = asyncio.get_event_loop().time()
-        await limiter.throttle(10 * 1024)
-        elapsed = asyncio.get_event_loop().time() - start
-
-        # Should have some delay (may not be exact due to timing)
-        # Just verify throttling logic is engaged
-        assert elapsed >= 0  # Basic sanity check
+            # Next 10KB has to wait for roughly a second of refill
+            await limiter.throttle(10 * 1024)
+            mock_sleep.assert_awaited_once()
+            delay = mock_sleep.await_args.args[0]
+            assert 0.9 < delay <= 1.0
 
 
 class TestSFTPConnectionPool:
@@ -287,6 +429,7 @@ class TestSFTPConnectionPool:
         pool = SFTPConnectionPool(mock_cache)
 
         mock_conn = AsyncMock()
+        mock_conn.close = MagicMock()
         mock_sftp = AsyncMock()
         mock_conn.start_sftp_client = AsyncMock(return_value=mock_sftp)
 
@@ -299,6 +442,71 @@ class TestSFTPConnectionPool:
             assert client.connected is True
             assert "user@example.com:22" in pool.connected_hosts
 
+    @pytest.mark.asyncio
+    async def test_concurrent_get_connection_connects_once(self):
+        """Concurrent first calls for one host should share a single handshake."""
+        host = Host(hostname="example.com", username="user")
+        mock_cache = MagicMock()
+        mock_cache.get_by_key = MagicMock(return_value=host)
+
+        pool = SFTPConnectionPool(mock_cache)
+
+        mock_conn = AsyncMock()
+        mock_conn.close = MagicMock()
+        mock_conn.start_sftp_client = AsyncMock(return_value=AsyncMock())
+        connect_calls = 0
+
+        async def mock_connect(**kwargs):
+            nonlocal connect_calls
+            connect_calls += 1
+            await asyncio.sleep(0)
+            return mock_conn
+
+        with patch("asyncssh.connect", side_effect=mock_connect):
+            first, second = await asyncio.gather(
+                pool.get_connection("user@example.com:22"),
+                pool.get_connection("user@example.com:22"),
+            )
+
+        assert connect_calls == 1
+        assert first is second
+
+    @pytest.mark.asyncio
+    async def test_cancelled_first_caller_does_not_cancel_waiters(self):
+        """A caller joining a connect should reconnect itself if the starter is cancelled."""
+        host = Host(hostname="example.com", username="user")
+        mock_cache = MagicMock()
+        mock_cache.get_by_key = MagicMock(return_value=host)
+
+        pool = SFTPConnectionPool(mock_cache)
+
+        mock_conn = AsyncMock()
+        mock_conn.close = MagicMock()
+        mock_conn.start_sftp_client = AsyncMock(return_value=AsyncMock())
+        first_connect_started = asyncio.Event()
+        connect_calls = 0
+
+        async def mock_connect(**kwargs):
+            nonlocal connect_calls
+            connect_calls += 1
+            if connect_calls == 1:
+                first_connect_started.set()
+                await asyncio.Event().wait()  # Hangs until cancelled
+            return mock_conn
+
+        with patch("asyncssh.connect", side_effect=mock_connect):
+            first = asyncio.create_task(pool.get_connection("user@example.com:22"))
+            await first_connect_started.wait()
+            second = asyncio.create_task(pool.get_connection("user@example.com:22"))
+            await asyncio.sleep(0)  # Let second join the pending connect
+
+            first.cancel()
+            client = await second
+
+        assert first.cancelled()
+        assert client.connected is True
+        assert connect_calls == 2
+
     @pytest.mark.asyncio
     async def test_get_connection_reuses_existing(self):
         """get_connection should reuse existing connected client."""
@@ -362,6 +570,33 @@ class TestSFTPConnectionPool:
         mock_client1.disconnect.assert_called_once()
         mock_client2.disconnect.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_disconnect_all_runs_concurrently(self):
+        """disconnect_all should wait on all hosts at once and survive failures."""
+        pool = SFTPConnectionPool(MagicMock())
+        in_flight = 0
+        peak = 0
+
+        async def slow_disconnect():
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        for i in range(3):
+            client = AsyncMock()
+            client.disconnect = AsyncMock(side_effect=slow_disconnect)
+            pool._connections[f"host{i}"] = client
+        failing = AsyncMock()
+        failing.disconnect = AsyncMock(side_effect=OSError("broken pipe"))
+        pool._connections["broken"] = failing
+
+        await pool.disconnect_all()
+
+        assert peak == 3
+        assert pool._connections == {}
+
 
 class TestSFTPClientDownload:
     """Tests for download functionality."""
@@ -386,14 +621,8 @@ class TestSFTPClientDownload:
             mock_attrs = MagicMock()
             mock_attrs.size = 100
 
-            mock_file = AsyncMock()
-            mock_file.read = AsyncMock(side_effect=[b"test content", b""])
-            mock_file.__aenter__ = AsyncMock(return_value=mock_file)
-            mock_file.__aexit__ = AsyncMock(return_value=None)
-
             mock_sftp = AsyncMock()
             mock_sftp.stat = AsyncMock(return_value=mock_attrs)
-            mock_sftp.open = MagicMock(return_value=mock_file)
 
             client._sftp = mock_sftp
             client._connected = True
@@ -402,6 +631,113 @@ class TestSFTPClientDownload:
             await client.download("/remote/file.txt", str(nested_path))
 
             assert nested_path.parent.exists()
+            mock_sftp.get.assert_awaited_once()
+            assert mock_sftp.get.call_args.kwargs["max_requests"] > 1
+
+    @pytest.mark.asyncio
+    async def test_download_compute_md5_keeps_pipelined_get(self, tmp_path):
+        """A fresh download should not give up sftp.get() just to hash its data."""
+        client = SFTPClient(Host(hostname="example.com", username="user"))
+
+        mock_attrs = MagicMock()
+        mock_attrs.size = 12
+
+        mock_sftp = AsyncMock()
+        mock_sftp.stat = AsyncMock(return_value=mock_attrs)
+        mock_sftp.open = MagicMock()
+        client._sftp = mock_sftp
+
+        digest = await client.download(
+            "/remote/file.txt", str(tmp_path / "file.txt"), compute_md5=True
+        )
+
+        assert digest is None
+        mock_sftp.get.assert_awaited_once()
+        assert mock_sftp.get.call_args.kwargs["max_requests"] > 1
+        mock_sftp.open.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_download_with_bandwidth_limit_is_throttled(self, tmp_path):
+        """A bandwidth limit should bypass sftp.get() for the throttled read loop."""
+        client = SFTPClient(Host(hostname="example.com", username="user"))
+
+        mock_attrs = MagicMock()
+        mock_attrs.size = 12
+
+        mock_file = AsyncMock()
+        mock_file.read = AsyncMock(side_effect=[b"test content", b""])
+        mock_file.__aenter__ = AsyncMock(return_value=mock_file)
+        mock_file.__aexit__ = AsyncMock(return_value=None)
+
+        mock_sftp = AsyncMock()
+        mock_sftp.stat = AsyncMock(return_value=mock_attrs)
+        mock_sftp.open = MagicMock(return_value=mock_file)
+        client._sftp = mock_sftp
+
+        local = tmp_path / "file.txt"
+        local.write_bytes(b"stale data from before")
+        with patch("queued.sftp.BandwidthLimiter.throttle", new_callable=AsyncMock) as throttle:
+            await client.download("/remote/file.txt", str(local), bandwidth_limit=1024)
+
+        mock_sftp.get.assert_not_called()
+        throttle.assert_awaited_once_with(12)
+        assert local.read_bytes() == b"test content"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("bandwidth_limit", [None, 1024], ids=["pipelined", "throttled"])
+    async def test_upload_pipelines_unless_throttled(self, tmp_path, bandwidth_limit):
+        """Unthrottled uploads should go through sftp.put() with many requests in flight."""
+        client = SFTPClient(Host(hostname="example.com", username="user"))
+
+        mock_file = AsyncMock()
+        mock_file.__aenter__ = AsyncMock(return_value=mock_file)
+        mock_file.__aexit__ = AsyncMock(return_value=None)
+
+        mock_sftp = AsyncMock()
+        mock_sftp.open = MagicMock(return_value=mock_file)
+        client._sftp = mock_sftp
+
+        local = tmp_path / "file.txt"
+        local.write_bytes(b"test content")
+        await client.upload(str(local), "/remote/file.txt", bandwidth_limit=bandwidth_limit)
+
+        if bandwidth_limit:
+            mock_sftp.put.assert_not_called()
+            mock_file.write.assert_awaited_once_with(b"test content")
+        else:
+            mock_sftp.put.assert_awaited_once()
+            assert mock_sftp.put.call_args.kwargs["max_requests"] > 1
+            mock_sftp.open.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_download_compute_md5_hashes_resumed_file(self, tmp_path):
+        """compute_md5 should hash the kept prefix plus the newly received data."""
+        import hashlib
+
+        client = SFTPClient(Host(hostname="example.com", username="user"))
+
+        mock_attrs = MagicMock()
+        mock_attrs.size = 12
+
+        mock_file = AsyncMock()
+        mock_file.read = AsyncMock(side_effect=[b"content", b""])
+        mock_file.__aenter__ = AsyncMock(return_value=mock_file)
+        mock_file.__aexit__ = AsyncMock(return_value=None)
+
+        mock_sftp = AsyncMock()
+        mock_sftp.stat = AsyncMock(return_value=mock_attrs)
+        mock_sftp.open = MagicMock(return_value=mock_file)
+        client._sftp = mock_sftp
+
+        local = tmp_path / "file.txt"
+        local.write_bytes(b"test ")
+        digest = await client.download(
+            "/remote/file.txt", str(local), resume_offset=5, compute_md5=True
+        )
+
+        mock_file.seek.assert_awaited_once_with(5)
+        assert local.read_bytes() == b"test content"
+        assert digest == hashlib.md5(b"test content").hexdigest()
 
 
 class TestSFTPClientPermissions:
@@ -424,6 +760,10 @@ class TestSFTPClientPermissions:
         result = client._format_permissions(0o700)
         assert result == "rwx------"
 
+        # File type and setuid bits from st_mode are ignored
+        result = client._format_permissions(0o104644)
+        assert result == "rw-r--r--"
+
 
 class TestRemoteMD5:
     """Tests for remote MD5 computation via SSH."""
@@ -457,7 +797,7 @@ class TestRemoteMD5:
         client = SFTPClient(host)
 
         mock_result = MagicMock()
-        mock_result.stdout = "abc123def456  *file.bin\n"
+        mock_result.stdout = "0123456789abcdef0123456789abcdef *file.bin\n"
 
         mock_conn = AsyncMock()
         mock_conn.run = AsyncMock(return_value=mock_result)
@@ -465,7 +805,27 @@ class TestRemoteMD5:
 
         result = await client.compute_remote_md5("/path/file.bin")
 
-        assert result == "abc123def456"
+        assert result == "0123456789abcdef0123456789abcdef"
+
+    @pytest.mark.asyncio
+    async def test_compute_remote_md5_prefers_sidecar(self):
+        """A hash read from a .md5 sidecar should be used, normalized to lowercase."""
+        host = Host(hostname="example.com", username="user")
+        client = SFTPClient(host)
+
+        mock_result = MagicMock()
+        mock_result.stdout = "D41D8CD98F00B204E9800998ECF8427E\n"
+
+        mock_conn = AsyncMock()
+        mock_conn.run = AsyncMock(return_value=mock_result)
+        client._conn = mock_conn
+
+        result = await client.compute_remote_md5("/path/to/file.txt")
+
+        assert result == "d41d8cd98f00b204e9800998ecf8427e"
+        cmd = mock_conn.run.call_args[0][0]
+        assert "/path/to/file.txt.md5" in cmd
+        assert "|| md5sum -- /path/to/file.txt" in cmd
 
     @pytest.mark.asyncio
     async def test_compute_remote_md5_not_connected(self):
@@ -509,6 +869,23 @@ class TestRemoteMD5:
 
         assert result is None
 
+    @pytest.mark.asyncio
+    async def test_compute_remote_md5_rejects_non_hash_output(self):
+        """Output that doesn't start with an MD5 hex digest should give None."""
+        host = Host(hostname="example.com", username="user")
+        client = SFTPClient(host)
+
+        mock_result = MagicMock()
+        mock_result.stdout = "md5sum: /path/to/file.txt: Is a directory\n"
+
+        mock_conn = AsyncMock()
+        mock_conn.run = AsyncMock(return_value=mock_result)
+        client._conn = mock_conn
+
+        result = await client.compute_remote_md5("/path/to/file.txt")
+
+        assert result is None
+
     @pytest.mark.asyncio
     async def test_compute_remote_md5_special_characters_in_path(self):
         """Should properly escape paths with special characters."""
@@ -516,7 +893,7 @@ class TestRemoteMD5:
         client = SFTPClient(host)
 
         mock_result = MagicMock()
-        mock_result.stdout = "abc123  /path/with spaces/file.txt\n"
+        mock_result.stdout = "0123456789abcdef0123456789abcdef  /path/with spaces/file.txt\n"
 
         mock_conn = AsyncMock()
         mock_conn.run = AsyncMock(return_value=mock_result)
@@ -524,7 +901,47 @@ class TestRemoteMD5:
 
         result = await client.compute_remote_md5("/path/with spaces/file.txt")
 
-        assert result == "abc123"
+        assert result == "0123456789abcdef0123456789abcdef"
         # Verify shlex quoting was applied
         call_args = mock_conn.run.call_args[0][0]
         assert "'/path/with spaces/file.txt'" in call_args
+
+    @pytest.mark.asyncio
+    async def test_compute_remote_md5_many_single_exec(self):
+        """Hashing several files should take one md5sum exec and map each path."""
+        host = Host(hostname="example.com", username="user")
+        client = SFTPClient(host)
+
+        paths = ["/data/a.bin", "/data/with space.txt", "/data/missing", "/data/new\nline"]
+        mock_result = MagicMock()
+        mock_result.stdout = (
+            "aaa111  /data/a.bin\nbbb222 */data/with space.txt\n\\ccc333  /data/new\\nline\n"
+        )
+
+        mock_conn = AsyncMock()
+        mock_conn.run = AsyncMock(return_value=mock_result)
+        client._conn = mock_conn
+
+        result = await client.compute_remote_md5_many(paths)
+
+        assert result == {
+            "/data/a.bin": "aaa111",
+            "/data/with space.txt": "bbb222",
+            "/data/new\nline": "ccc333",
+        }
+        mock_conn.run.assert_called_once()
+        cmd = mock_conn.run.call_args[0][0]
+        assert cmd.startswith("md5sum -- ")
+        assert "'/data/with space.txt'" in cmd
+
+    @pytest.mark.asyncio
+    async def test_compute_remote_md5_many_command_fails(self):
+        """A failed exec should yield no hashes rather than raise."""
+        host = Host(hostname="example.com", username="user")
+        client = SFTPClient(host)
+
+        mock_conn = AsyncMock()
+        mock_conn.run = AsyncMock(side_effect=Exception("Connection lost"))
+        client._conn = mock_conn
+
+        assert await client.compute_remote_md5_many(["/a", "/b"]) == {}
@@ -4,6 +4,8 @@ These tests require Docker and are skipped if Docker is not available.
 Run with: pytest tests/test_sftp_integration.py -m integration
 """
 
+import functools
+import socket
 import subprocess
 import tempfile
 import time
@@ -16,6 +18,7 @@ from queued.sftp import SFTPClient
 from queued.transfer import verify_file
 
 
+@functools.cache
 def docker_available() -> bool:
     """Check if Docker is available and running."""
     try:
@@ -31,28 +34,12 @@ def docker_available() -> bool:
 
 def docker_compose_available() -> bool:
     """Check if docker-compose is available."""
-    try:
-        result = subprocess.run(
-            ["docker-compose", "--version"],
-            capture_output=True,
-            timeout=5,
-        )
-        return result.returncode == 0
-    except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
-        # Try docker compose (v2)
-        try:
-            result = subprocess.run(
-                ["docker", "compose", "version"],
-                capture_output=True,
-                timeout=5,
-            )
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
-            return False
+    return _get_compose_command() is not None
 
 
-def _get_compose_command() -> list[str] | None:
-    """Get the working docker-compose command."""
+@functools.cache
+def _get_compose_command() -> tuple[str, ...] | None:
+    """Get the working docker-compose command (probed once per session)."""
     try:
         result = subprocess.run(
             ["docker-compose", "--version"],
@@ -60,7 +47,7 @@ def _get_compose_command() -> list[str] | None:
             timeout=5,
         )
         if result.returncode == 0:
-            return ["docker-compose"]
+            return ("docker-compose",)
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
         pass
 
@@ -71,21 +58,36 @@ def _get_compose_command() -> list[str] | None:
             timeout=5,
         )
         if result.returncode == 0:
-            return ["docker", "compose"]
+            return ("docker", "compose")
     except (subprocess.TimeoutExpired, FileNotFoundError, OSError):
         pass
 
     return None
 
 
+def _wait_for_ssh_banner(host: str, port: int, timeout: float) -> bool:
+    """Poll the port until an SSH server sends its identification banner."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5) as sock:
+                sock.settimeout(0.5)
+                if sock.recv(4).startswith(b"SSH-"):
+                    return True
+        except OSError:
+            pass  # Not listening yet, or the port forward closed on us
+        time.sleep(0.05)
+    return False
+
+
 # Known test file MD5 (created in tests/docker/test-files/testfile.txt)
 KNOWN_TEST_FILE_MD5 = "3f3400c4480aa0db42ec8b69fb2bbef5"
 DOCKER_COMPOSE_DIR = Path(__file__).parent / "docker"
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def ssh_server():
-    """Start SSH server container for integration tests."""
+    """Start SSH server container once for the whole test session."""
     compose_cmd = _get_compose_command()
     if not docker_available() or compose_cmd is None:
         pytest.skip("Docker or docker-compose not available")
@@ -102,33 +104,19 @@ def ssh_server():
         capture_output=True,
     )
 
-    # Wait for container to be ready
-    for _ in range(30):
-        try:
-            result = subprocess.run(
-                [*compose_cmd, "-f", str(compose_file), "ps", "--quiet"],
-                cwd=str(DOCKER_COMPOSE_DIR),
-                capture_output=True,
-                text=True,
-            )
-            if result.stdout.strip():
-                break
-        except subprocess.CalledProcessError:
-            pass
-        time.sleep(1)
-    else:
-        pytest.skip("SSH container failed to start")
-
-    # Additional wait for SSH to be ready
-    time.sleep(3)
-
-    yield {
+    server = {
         "host": "localhost",
         "port": 2222,
         "username": "testuser",
         "password": "testpass",
     }
 
+    # Wait until sshd answers with its banner, up to ~30s
+    if not _wait_for_ssh_banner(server["host"], server["port"], timeout=30):
+        pytest.skip("SSH container failed to start")
+
+    yield server
+
     # Cleanup
     subprocess.run(
         [*compose_cmd, "-f", str(compose_file), "down"],
@@ -148,22 +136,9 @@ async def real_sftp(ssh_server):
         username=ssh_server["username"],
         password=ssh_server["password"],
     )
-    client = SFTPClient(host)
-
-    # asyncssh requires known_hosts handling for localhost
-    # We'll patch the connect to accept any host key for testing
-    # Also disable client_keys to prevent "too many auth failures" from SSH agent keys
-    import asyncssh
-
-    original_connect = asyncssh.connect
-
-    async def patched_connect(**kwargs):
-        kwargs["known_hosts"] = None  # Accept any host key for testing
-        kwargs["client_keys"] = []  # Don't use any SSH keys
-        kwargs["agent_path"] = None  # Don't use SSH agent
-        return await original_connect(**kwargs)
-
-    asyncssh.connect = patched_connect
+    # Accept any host key for the throwaway container, and skip SSH keys and
+    # the agent to prevent "too many auth failures" before the password is tried
+    client = SFTPClient(host, known_hosts=None, client_keys=[], agent_path=None)
 
     try:
         await client.connect()
@@ -172,8 +147,7 @@ async def real_sftp(ssh_server):
         pytest.skip(f"Could not connect to SSH server: {e}")
     finally:
         if client.connected:
-            await client.disconnect()
-        asyncssh.connect = original_connect
+            await client.disconnect(linger=False)
 
 
 @pytest.mark.integration
@@ -220,19 +194,21 @@ class TestRealSSH:
     async def test_verify_file_real(self, real_sftp):
         """Test full verification flow on real SSH server."""
         with tempfile.TemporaryDirectory() as tmpdir:
-            # Download the file first
+            # Download the file first; a fresh download keeps sftp.get() and isn't hashed
             local_path = Path(tmpdir) / "testfile.txt"
-            await real_sftp.download(
+            local_md5 = await real_sftp.download(
                 "/home/testuser/files/testfile.txt",
                 str(local_path),
+                compute_md5=True,
             )
 
-            # Verify the downloaded file
+            # With no digest from the download, verify_file hashes the file itself
             success, message = await verify_file(
                 "/home/testuser/files/testfile.txt",
                 str(local_path),
                 local_path.stat().st_size,
                 real_sftp,
+                local_md5=local_md5,
             )
 
             assert success is True
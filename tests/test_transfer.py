@@ -1,9 +1,11 @@
 """Tests for transfer manager."""
 
+import asyncio
 import hashlib
-import tempfile
+import itertools
 import time
 from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -17,413 +19,431 @@ from queued.models import (
     TransferDirection,
     TransferStatus,
 )
-from queued.transfer import SpeedTracker, TransferManager, verify_file
+from queued.transfer import (
+    QUEUE_SAVE_DELAY,
+    SpeedTracker,
+    TransferManager,
+    verify_file,
+    verify_files,
+)
+
+# verify_file payloads with their digests computed once at import
+_MD5_CONTENT = b"test content for md5"
+_MD5_CONTENT_MD5 = hashlib.md5(_MD5_CONTENT).hexdigest()
+_CHECKSUM_CONTENT = b"test content for checksum"
+_CHECKSUM_CONTENT_MD5 = hashlib.md5(_CHECKSUM_CONTENT).hexdigest()
 
 
 class TestTransferManagerQueue:
     """Tests for queue operations."""
 
-    def test_add_download_creates_transfer(self):
+    def test_add_download_creates_transfer(self, cache_tmpdir):
         """add_download should create a transfer in the queue."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                settings = AppSettings(download_dir=tmpdir)
-                manager = TransferManager(settings=settings)
-
-                remote_file = RemoteFile(
-                    name="test.txt",
-                    path="/files/test.txt",
-                    size=1000,
-                    is_dir=False,
-                )
+        settings = AppSettings(download_dir=str(cache_tmpdir))
+        manager = TransferManager(settings=settings)
+
+        remote_file = RemoteFile(
+            name="test.txt",
+            path="/files/test.txt",
+            size=1000,
+            is_dir=False,
+        )
 
-                transfer = manager.add_download(remote_file)
+        transfer = manager.add_download(remote_file)
 
-                assert transfer is not None
-                assert transfer.remote_path == "/files/test.txt"
-                assert transfer.status == TransferStatus.QUEUED
-                assert len(manager.queue.transfers) == 1
+        assert transfer is not None
+        assert transfer.remote_path == "/files/test.txt"
+        assert transfer.status == TransferStatus.QUEUED
+        assert len(manager.queue.transfers) == 1
 
-    def test_add_download_prevents_duplicates(self):
+    def test_add_download_prevents_duplicates(self, cache_tmpdir):
         """add_download should return None for duplicate files."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                settings = AppSettings(download_dir=tmpdir)
-                manager = TransferManager(settings=settings)
-
-                remote_file = RemoteFile(
-                    name="test.txt",
-                    path="/files/test.txt",
-                    size=1000,
-                    is_dir=False,
-                )
+        settings = AppSettings(download_dir=str(cache_tmpdir))
+        manager = TransferManager(settings=settings)
+
+        remote_file = RemoteFile(
+            name="test.txt",
+            path="/files/test.txt",
+            size=1000,
+            is_dir=False,
+        )
 
-                transfer1 = manager.add_download(remote_file)
-                transfer2 = manager.add_download(remote_file)
+        transfer1 = manager.add_download(remote_file)
+        transfer2 = manager.add_download(remote_file)
 
-                assert transfer1 is not None
-                assert transfer2 is None
-                assert len(manager.queue.transfers) == 1
+        assert transfer1 is not None
+        assert transfer2 is None
+        assert len(manager.queue.transfers) == 1
 
-    def test_add_download_with_host(self):
+    def test_add_download_with_host(self, cache_tmpdir):
         """add_download should set host_key when host provided."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                settings = AppSettings(download_dir=tmpdir)
-                manager = TransferManager(settings=settings)
-
-                host = Host(hostname="example.com", username="user", port=22)
-                remote_file = RemoteFile(
-                    name="test.txt",
-                    path="/test.txt",
-                    size=1000,
-                    is_dir=False,
-                )
-
-                transfer = manager.add_download(remote_file, host=host)
+        settings = AppSettings(download_dir=str(cache_tmpdir))
+        manager = TransferManager(settings=settings)
+
+        host = Host(hostname="example.com", username="user", port=22)
+        remote_file = RemoteFile(
+            name="test.txt",
+            path="/test.txt",
+            size=1000,
+            is_dir=False,
+        )
 
-                assert transfer is not None
-                assert transfer.host_key == "user@example.com:22"
+        transfer = manager.add_download(remote_file, host=host)
+
+        assert transfer is not None
+        assert transfer.host_key == "user@example.com:22"
+
+    def test_add_download_tree_reuses_directory_work(self, cache_tmpdir):
+        """Queueing a directory tree should resolve the base and make each dir once."""
+        settings = AppSettings(download_dir=str(cache_tmpdir))
+        manager = TransferManager(settings=settings)
+
+        files = [
+            RemoteFile(name=f"{i}.bin", path=f"/show/s{i % 2}/{i}.bin", size=1, is_dir=False)
+            for i in range(6)
+        ]
+        real_mkdir = Path.mkdir
+        with patch.object(Path, "mkdir", autospec=True, side_effect=real_mkdir) as mkdir:
+            for f in files:
+                manager.add_download(f, base_dir="/show")
+
+        assert mkdir.call_count == 2  # s0 and s1
+        assert list(manager._resolved_dirs) == [str(cache_tmpdir)]
+        assert (cache_tmpdir / "s1").is_dir()
+        assert manager.queue.transfers[-1].local_path == str(
+            cache_tmpdir.resolve() / "s1" / "5.bin"
+        )
 
-    def test_add_download_sanitizes_path_traversal(self):
+    def test_add_download_sanitizes_path_traversal(self, cache_tmpdir):
         """add_download should sanitize path traversal attempts."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                settings = AppSettings(download_dir=tmpdir)
-                manager = TransferManager(settings=settings)
-
-                # Path traversal attempt - should be sanitized to just "passwd"
-                remote_file = RemoteFile(
-                    name="../../../etc/passwd",
-                    path="/files/../../../etc/passwd",
-                    size=1000,
-                    is_dir=False,
-                )
+        settings = AppSettings(download_dir=str(cache_tmpdir))
+        manager = TransferManager(settings=settings)
+
+        # Path traversal attempt - should be sanitized to just "passwd"
+        remote_file = RemoteFile(
+            name="../../../etc/passwd",
+            path="/files/../../../etc/passwd",
+            size=1000,
+            is_dir=False,
+        )
 
-                transfer = manager.add_download(remote_file)
+        transfer = manager.add_download(remote_file)
 
-                # Should succeed but sanitize to just the filename
-                assert transfer is not None
-                # Use Path.resolve() to handle macOS /private/var symlink
-                expected = str(Path(tmpdir).resolve() / "passwd")
-                assert transfer.local_path == expected
-                # Verify it's within download dir (resolved)
-                assert transfer.local_path.startswith(str(Path(tmpdir).resolve()))
+        # Should succeed but sanitize to just the filename
+        assert transfer is not None
+        # Use Path.resolve() to handle macOS /private/var symlink
+        expected = str(cache_tmpdir.resolve() / "passwd")
+        assert transfer.local_path == expected
+        # Verify it's within download dir (resolved)
+        assert transfer.local_path.startswith(str(cache_tmpdir.resolve()))
 
-    def test_add_download_blocks_invalid_filename(self):
+    def test_add_download_blocks_invalid_filename(self, cache_tmpdir):
         """add_download should block invalid filenames like '.' or '..'."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                settings = AppSettings(download_dir=tmpdir)
-                manager = TransferManager(settings=settings)
-
-                remote_file = RemoteFile(
-                    name="..",
-                    path="/..",
-                    size=1000,
-                    is_dir=False,
-                )
+        settings = AppSettings(download_dir=str(cache_tmpdir))
+        manager = TransferManager(settings=settings)
+
+        remote_file = RemoteFile(
+            name="..",
+            path="/..",
+            size=1000,
+            is_dir=False,
+        )
 
-                with pytest.raises(ValueError, match="Invalid filename"):
-                    manager.add_download(remote_file)
+        with pytest.raises(ValueError, match="Invalid filename"):
+            manager.add_download(remote_file)
 
-    def test_remove_transfer(self):
+    def test_remove_transfer(self, cache_tmpdir):
         """remove_transfer should remove transfer from queue."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                settings = AppSettings(download_dir=tmpdir)
-                manager = TransferManager(settings=settings)
-
-                remote_file = RemoteFile(
-                    name="test.txt",
-                    path="/test.txt",
-                    size=1000,
-                    is_dir=False,
-                )
+        settings = AppSettings(download_dir=str(cache_tmpdir))
+        manager = TransferManager(settings=settings)
+
+        remote_file = RemoteFile(
+            name="test.txt",
+            path="/test.txt",
+            size=1000,
+            is_dir=False,
+        )
 
-                transfer = manager.add_download(remote_file)
-                assert transfer is not None
+        transfer = manager.add_download(remote_file)
+        assert transfer is not None
 
-                result = manager.remove_transfer(transfer.id)
+        result = manager.remove_transfer(transfer.id)
 
-                assert result is True
-                assert len(manager.queue.transfers) == 0
+        assert result is True
+        assert len(manager.queue.transfers) == 0
 
-    def test_remove_nonexistent_transfer(self):
+    def test_remove_nonexistent_transfer(self, cache_tmpdir):
         """remove_transfer should return False for nonexistent ID."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
-                result = manager.remove_transfer("nonexistent-id")
-                assert result is False
+        manager = TransferManager()
+        result = manager.remove_transfer("nonexistent-id")
+        assert result is False
 
 
 class TestTransferManagerPauseResume:
     """Tests for pause/resume functionality."""
 
-    def test_pause_sets_paused_status(self):
+    def test_pause_sets_paused_status(self, cache_tmpdir):
         """pause_transfer should mark transfer as paused."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
-
-                transfer = Transfer(
-                    id="test-1",
-                    remote_path="/test.txt",
-                    local_path="/tmp/test.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.TRANSFERRING,
-                )
-                manager.queue.transfers.append(transfer)
+        manager = TransferManager()
+
+        transfer = Transfer(
+            id="test-1",
+            remote_path="/test.txt",
+            local_path="/tmp/test.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.TRANSFERRING,
+        )
+        manager.queue.transfers.append(transfer)
 
-                # Create a mock task that we can cancel
-                mock_task = MagicMock()
-                manager._tasks["test-1"] = mock_task
+        # Create a mock task that we can cancel
+        mock_task = MagicMock()
+        manager._tasks["test-1"] = mock_task
 
-                result = manager.pause_transfer("test-1")
+        result = manager.pause_transfer("test-1")
 
-                assert result is True
-                mock_task.cancel.assert_called_once()
+        assert result is True
+        mock_task.cancel.assert_called_once()
 
-    def test_resume_individual_transfer(self):
+    def test_resume_individual_transfer(self, cache_tmpdir):
         """resume_transfer should set PAUSED transfer back to QUEUED."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
-
-                transfer = Transfer(
-                    id="test-1",
-                    remote_path="/test.txt",
-                    local_path="/tmp/test.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.PAUSED,
-                )
-                manager.queue.transfers.append(transfer)
+        manager = TransferManager()
+
+        transfer = Transfer(
+            id="test-1",
+            remote_path="/test.txt",
+            local_path="/tmp/test.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.PAUSED,
+        )
+        manager.queue.transfers.append(transfer)
 
-                result = manager.resume_transfer("test-1")
+        result = manager.resume_transfer("test-1")
 
-                assert result is True
-                assert transfer.status == TransferStatus.QUEUED
+        assert result is True
+        assert transfer.status == TransferStatus.QUEUED
 
-    def test_resume_works_on_stopped(self):
+    def test_resume_works_on_stopped(self, cache_tmpdir):
         """resume_transfer should resume STOPPED transfers (individual resume)."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
-
-                transfer = Transfer(
-                    id="test-1",
-                    remote_path="/test.txt",
-                    local_path="/tmp/test.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.STOPPED,
-                )
-                manager.queue.transfers.append(transfer)
+        manager = TransferManager()
+
+        transfer = Transfer(
+            id="test-1",
+            remote_path="/test.txt",
+            local_path="/tmp/test.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.STOPPED,
+        )
+        manager.queue.transfers.append(transfer)
 
-                result = manager.resume_transfer("test-1")
+        result = manager.resume_transfer("test-1")
 
-                assert result is True
-                assert transfer.status == TransferStatus.QUEUED
+        assert result is True
+        assert transfer.status == TransferStatus.QUEUED
 
 
 class TestTransferManagerStopResume:
     """Tests for stop/resume queue functionality."""
 
-    def test_stop_queue_sets_flag(self):
+    def test_stop_queue_sets_flag(self, cache_tmpdir):
         """stop_queue should set _queue_paused flag."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
+        manager = TransferManager()
 
-                manager.stop_queue()
+        manager.stop_queue()
 
-                assert manager._queue_paused is True
-                assert manager.is_queue_paused is True
+        assert manager._queue_paused is True
+        assert manager.is_queue_paused is True
 
-    def test_stop_queue_cancels_active_transfers(self):
+    def test_stop_queue_cancels_active_transfers(self, cache_tmpdir):
         """stop_queue should cancel all active transfers."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
-
-                transfer1 = Transfer(
-                    id="t1",
-                    remote_path="/file1.txt",
-                    local_path="/tmp/file1.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.TRANSFERRING,
-                )
-                transfer2 = Transfer(
-                    id="t2",
-                    remote_path="/file2.txt",
-                    local_path="/tmp/file2.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.TRANSFERRING,
-                )
-                manager.queue.transfers.extend([transfer1, transfer2])
+        manager = TransferManager()
+
+        transfer1 = Transfer(
+            id="t1",
+            remote_path="/file1.txt",
+            local_path="/tmp/file1.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.TRANSFERRING,
+        )
+        transfer2 = Transfer(
+            id="t2",
+            remote_path="/file2.txt",
+            local_path="/tmp/file2.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.TRANSFERRING,
+        )
+        manager.queue.transfers.extend([transfer1, transfer2])
 
-                mock_task1 = MagicMock()
-                mock_task2 = MagicMock()
-                manager._tasks["t1"] = mock_task1
-                manager._tasks["t2"] = mock_task2
+        mock_task1 = MagicMock()
+        mock_task2 = MagicMock()
+        manager._tasks["t1"] = mock_task1
+        manager._tasks["t2"] = mock_task2
 
-                count = manager.stop_queue()
+        count = manager.stop_queue()
 
-                assert count == 2
-                mock_task1.cancel.assert_called_once()
-                mock_task2.cancel.assert_called_once()
+        assert count == 2
+        mock_task1.cancel.assert_called_once()
+        mock_task2.cancel.assert_called_once()
 
-    def test_resume_queue_clears_flag(self):
+    def test_resume_queue_clears_flag(self, cache_tmpdir):
         """resume_queue should clear _queue_paused flag."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
-                manager._queue_paused = True
+        manager = TransferManager()
+        manager._queue_paused = True
 
-                manager.resume_queue()
+        manager.resume_queue()
 
-                assert manager._queue_paused is False
-                assert manager.is_queue_paused is False
+        assert manager._queue_paused is False
+        assert manager.is_queue_paused is False
 
-    def test_resume_queue_only_resumes_stopped(self):
+    def test_resume_queue_only_resumes_stopped(self, cache_tmpdir):
         """resume_queue should only resume STOPPED, not PAUSED transfers."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
-                manager._queue_paused = True
-
-                stopped = Transfer(
-                    id="t1",
-                    remote_path="/stopped.txt",
-                    local_path="/tmp/stopped.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.STOPPED,
-                )
-                paused = Transfer(
-                    id="t2",
-                    remote_path="/paused.txt",
-                    local_path="/tmp/paused.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.PAUSED,
-                )
-                manager.queue.transfers.extend([stopped, paused])
+        manager = TransferManager()
+        manager._queue_paused = True
+
+        stopped = Transfer(
+            id="t1",
+            remote_path="/stopped.txt",
+            local_path="/tmp/stopped.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.STOPPED,
+        )
+        paused = Transfer(
+            id="t2",
+            remote_path="/paused.txt",
+            local_path="/tmp/paused.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.PAUSED,
+        )
+        manager.queue.transfers.extend([stopped, paused])
 
-                count = manager.resume_queue()
+        count = manager.resume_queue()
 
-                assert count == 1
-                assert stopped.status == TransferStatus.QUEUED
-                assert paused.status == TransferStatus.PAUSED  # Should stay paused
+        assert count == 1
+        assert stopped.status == TransferStatus.QUEUED
+        assert paused.status == TransferStatus.PAUSED  # Should stay paused
 
 
 class TestTransferManagerPersistence:
     """Tests for queue persistence."""
 
-    def test_queue_persisted_on_add(self):
+    def test_queue_persisted_on_add(self, cache_tmpdir):
         """Queue should be saved when transfer is added."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                settings = AppSettings(download_dir=tmpdir)
-                manager = TransferManager(settings=settings)
-
-                remote_file = RemoteFile(
-                    name="test.txt",
-                    path="/test.txt",
-                    size=1000,
-                    is_dir=False,
-                )
-                manager.add_download(remote_file)
+        settings = AppSettings(download_dir=str(cache_tmpdir))
+        manager = TransferManager(settings=settings)
+
+        remote_file = RemoteFile(
+            name="test.txt",
+            path="/test.txt",
+            size=1000,
+            is_dir=False,
+        )
+        manager.add_download(remote_file)
 
-                # Load in new instance
-                manager2 = TransferManager(settings=settings)
+        # Load in new instance
+        manager2 = TransferManager(settings=settings)
 
-                assert len(manager2.queue.transfers) == 1
-                assert manager2.queue.transfers[0].remote_path == "/test.txt"
+        assert len(manager2.queue.transfers) == 1
+        assert manager2.queue.transfers[0].remote_path == "/test.txt"
 
-    def test_queue_starts_running_on_load(self):
+    @pytest.mark.asyncio
+    async def test_bulk_add_coalesces_saves(self, tmp_path):
+        """With a loop running, a burst of adds should be written to disk once."""
+        with patch("queued.config.get_cache_dir", return_value=tmp_path):
+            manager = TransferManager(settings=AppSettings(download_dir=str(tmp_path)))
+
+            with patch.object(manager.queue_cache, "save") as save:
+                for i in range(50):
+                    manager.add_download(
+                        RemoteFile(name=f"{i}.txt", path=f"/{i}.txt", size=1, is_dir=False)
+                    )
+                assert save.call_count == 0
+
+                await asyncio.sleep(QUEUE_SAVE_DELAY * 2)
+                assert save.call_count == 1
+                assert len(save.call_args.args[0]) == 50
+
+                # flush_queue writes immediately, even with nothing pending
+                manager.flush_queue()
+                assert save.call_count == 2
+
+    def test_queue_starts_running_on_load(self, cache_tmpdir):
         """Queue should always start running on load (not paused)."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                settings = AppSettings(download_dir=tmpdir)
-                manager = TransferManager(settings=settings)
-
-                # Add a transfer so we have something to persist
-                remote_file = RemoteFile(
-                    name="test.txt",
-                    path="/test.txt",
-                    size=1000,
-                    is_dir=False,
-                )
-                manager.add_download(remote_file)
-                manager.stop_queue()
+        settings = AppSettings(download_dir=str(cache_tmpdir))
+        manager = TransferManager(settings=settings)
+
+        # Add a transfer so we have something to persist
+        remote_file = RemoteFile(
+            name="test.txt",
+            path="/test.txt",
+            size=1000,
+            is_dir=False,
+        )
+        manager.add_download(remote_file)
+        manager.stop_queue()
 
-                # Load in new instance - queue should start running
-                manager2 = TransferManager(settings=settings)
+        # Load in new instance - queue should start running
+        manager2 = TransferManager(settings=settings)
 
-                # Queue always starts fresh (not paused)
-                assert manager2.is_queue_paused is False
+        # Queue always starts fresh (not paused)
+        assert manager2.is_queue_paused is False
 
-    def test_load_restores_transfers(self):
+    def test_load_restores_transfers(self, cache_tmpdir):
         """Loading should restore transfer list from cache."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                cache = QueueCache()
-
-                # Pre-populate cache
-                transfers = [
-                    Transfer(
-                        id="t1",
-                        remote_path="/file1.txt",
-                        local_path="/tmp/file1.txt",
-                        direction=TransferDirection.DOWNLOAD,
-                        size=1000,
-                        status=TransferStatus.QUEUED,
-                    ),
-                    Transfer(
-                        id="t2",
-                        remote_path="/file2.txt",
-                        local_path="/tmp/file2.txt",
-                        direction=TransferDirection.DOWNLOAD,
-                        size=2000,
-                        status=TransferStatus.PAUSED,
-                    ),
-                ]
-                cache.save(transfers)
-
-                # Load in manager
-                manager = TransferManager(queue_cache=cache)
-
-                assert len(manager.queue.transfers) == 2
+        cache = QueueCache()
+
+        # Pre-populate cache
+        transfers = [
+            Transfer(
+                id="t1",
+                remote_path="/file1.txt",
+                local_path="/tmp/file1.txt",
+                direction=TransferDirection.DOWNLOAD,
+                size=1000,
+                status=TransferStatus.QUEUED,
+            ),
+            Transfer(
+                id="t2",
+                remote_path="/file2.txt",
+                local_path="/tmp/file2.txt",
+                direction=TransferDirection.DOWNLOAD,
+                size=2000,
+                status=TransferStatus.PAUSED,
+            ),
+        ]
+        cache.save(transfers)
+
+        # Load in manager
+        manager = TransferManager(queue_cache=cache)
+
+        assert len(manager.queue.transfers) == 2
 
 
 class TestTransferManagerCallbacks:
     """Tests for callback invocation."""
 
-    def test_on_status_change_called_on_add(self):
+    def test_on_status_change_called_on_add(self, cache_tmpdir):
         """on_status_change should be called when transfer is added."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                callback = MagicMock()
-                settings = AppSettings(download_dir=tmpdir)
-                manager = TransferManager(settings=settings, on_status_change=callback)
-
-                remote_file = RemoteFile(
-                    name="test.txt",
-                    path="/test.txt",
-                    size=1000,
-                    is_dir=False,
-                )
-                manager.add_download(remote_file)
+        callback = MagicMock()
+        settings = AppSettings(download_dir=str(cache_tmpdir))
+        manager = TransferManager(settings=settings, on_status_change=callback)
+
+        remote_file = RemoteFile(
+            name="test.txt",
+            path="/test.txt",
+            size=1000,
+            is_dir=False,
+        )
+        manager.add_download(remote_file)
 
-                callback.assert_called_once()
-                call_arg = callback.call_args[0][0]
-                assert call_arg.remote_path == "/test.txt"
+        callback.assert_called_once()
+        call_arg = callback.call_args[0][0]
+        assert call_arg.remote_path == "/test.txt"
 
 
 class TestSpeedTracker:
@@ -449,6 +469,34 @@ class TestSpeedTracker:
         # Should have positive speed
         assert speed > 0
 
+    def test_speed_tracker_expires_old_samples(self):
+        """Only samples from the last SPEED_WINDOW seconds should count toward speed."""
+        tracker = SpeedTracker()
+        clock = iter([0, 1_000_000_000, 2_000_000_000, 3_000_000_000])
+
+        with patch("queued.transfer.time.monotonic_ns", lambda: next(clock)):
+            tracker.update(0)
+            tracker.update(10_000)  # Burst that will age out
+            tracker.update(11_000)
+            speed = tracker.update(12_000)
+
+        # Window is (1.0, 3.0]: 1000 + 1000 bytes over 1 second
+        assert speed == 2000.0
+
+    def test_speed_tracker_monotonic_under_clock_jump(self):
+        """A wall clock stepping backwards should not produce a negative speed."""
+        tracker = SpeedTracker()
+        wall = itertools.count(1000.0, -100.0)  # Steps back on every read
+
+        with patch("queued.transfer.time.time", lambda: next(wall)):
+            tracker.update(0)
+            time.sleep(0.01)
+            tracker.update(1000)
+            time.sleep(0.01)
+            speed = tracker.update(2000)
+
+        assert speed > 0
+
     def test_speed_tracker_smoothing(self):
         """Speed should be smoothed across samples."""
         tracker = SpeedTracker()
@@ -475,178 +523,223 @@ class TestSpeedTracker:
 class TestTransferManagerTotalSpeed:
     """Tests for total speed calculation."""
 
-    def test_total_speed_sums_active(self):
+    def test_total_speed_sums_active(self, cache_tmpdir):
         """total_speed should sum speed of all active transfers."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
-
-                t1 = Transfer(
-                    id="t1",
-                    remote_path="/file1.txt",
-                    local_path="/tmp/file1.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.TRANSFERRING,
-                    speed=1000,
-                )
-                t2 = Transfer(
-                    id="t2",
-                    remote_path="/file2.txt",
-                    local_path="/tmp/file2.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.TRANSFERRING,
-                    speed=2000,
-                )
-                t3 = Transfer(
-                    id="t3",
-                    remote_path="/file3.txt",
-                    local_path="/tmp/file3.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.PAUSED,  # Not active
-                    speed=500,
-                )
-                manager.queue.transfers.extend([t1, t2, t3])
+        manager = TransferManager()
+
+        t1 = Transfer(
+            id="t1",
+            remote_path="/file1.txt",
+            local_path="/tmp/file1.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.TRANSFERRING,
+            speed=1000,
+        )
+        t2 = Transfer(
+            id="t2",
+            remote_path="/file2.txt",
+            local_path="/tmp/file2.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.TRANSFERRING,
+            speed=2000,
+        )
+        t3 = Transfer(
+            id="t3",
+            remote_path="/file3.txt",
+            local_path="/tmp/file3.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.PAUSED,  # Not active
+            speed=500,
+        )
+        manager.queue.transfers.extend([t1, t2, t3])
 
-                assert manager.total_speed == 3000  # Only t1 + t2
+        assert manager.total_speed == 3000  # Only t1 + t2
 
 
 class TestTransferManagerUpload:
     """Tests for upload functionality."""
 
-    def test_add_upload_creates_transfer(self):
+    def test_add_upload_creates_transfer(self, cache_tmpdir):
         """add_upload should create an upload transfer."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
+        manager = TransferManager()
 
-                # Create a local file
-                local_file = Path(tmpdir) / "upload.txt"
-                local_file.write_text("test content")
+        # Create a local file
+        local_file = cache_tmpdir / "upload.txt"
+        local_file.write_text("test content")
 
-                transfer = manager.add_upload(str(local_file), "/remote/dir")
+        transfer = manager.add_upload(str(local_file), "/remote/dir")
 
-                assert transfer is not None
-                assert transfer.direction == TransferDirection.UPLOAD
-                assert transfer.remote_path == "/remote/dir/upload.txt"
-                assert transfer.status == TransferStatus.QUEUED
+        assert transfer is not None
+        assert transfer.direction == TransferDirection.UPLOAD
+        assert transfer.remote_path == "/remote/dir/upload.txt"
+        assert transfer.size == len("test content")
+        assert transfer.status == TransferStatus.QUEUED
 
-    def test_add_upload_nonexistent_file(self):
+    def test_add_upload_nonexistent_file(self, cache_tmpdir):
         """add_upload should raise for nonexistent file."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
+        manager = TransferManager()
 
-                with pytest.raises(FileNotFoundError):
-                    manager.add_upload("/nonexistent/file.txt", "/remote/dir")
+        with pytest.raises(FileNotFoundError):
+            manager.add_upload("/nonexistent/file.txt", "/remote/dir")
 
 
 class TestTransferManagerPauseAll:
     """Tests for pause_all/resume_all."""
 
-    def test_pause_all_pauses_active(self):
+    def test_pause_all_pauses_active(self, cache_tmpdir):
         """pause_all should pause all transferring transfers."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
-
-                t1 = Transfer(
-                    id="t1",
-                    remote_path="/file1.txt",
-                    local_path="/tmp/file1.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.TRANSFERRING,
-                )
-                t2 = Transfer(
-                    id="t2",
-                    remote_path="/file2.txt",
-                    local_path="/tmp/file2.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.TRANSFERRING,
-                )
-                manager.queue.transfers.extend([t1, t2])
+        manager = TransferManager()
+
+        t1 = Transfer(
+            id="t1",
+            remote_path="/file1.txt",
+            local_path="/tmp/file1.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.TRANSFERRING,
+        )
+        t2 = Transfer(
+            id="t2",
+            remote_path="/file2.txt",
+            local_path="/tmp/file2.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.TRANSFERRING,
+        )
+        manager.queue.transfers.extend([t1, t2])
+
+        manager._tasks["t1"] = MagicMock()
+        manager._tasks["t2"] = MagicMock()
+
+        count = manager.pause_all()
 
-                manager._tasks["t1"] = MagicMock()
-                manager._tasks["t2"] = MagicMock()
+        assert count == 2
 
-                count = manager.pause_all()
+    def test_pause_all_only_touches_running_transfers(self, cache_tmpdir):
+        """pause_all should leave queued transfers and non-transferring tasks alone."""
+        manager = TransferManager()
+
+        queued = [
+            Transfer(
+                id=f"q{i}",
+                remote_path=f"/q{i}.txt",
+                local_path=f"/tmp/q{i}.txt",
+                direction=TransferDirection.DOWNLOAD,
+                size=1000,
+            )
+            for i in range(1000)
+        ]
+        done = Transfer(
+            id="done",
+            remote_path="/done.txt",
+            local_path="/tmp/done.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.COMPLETED,
+        )
+        manager.queue.transfers.extend([*queued, done])
+        done_task = MagicMock()
+        manager._tasks["done"] = done_task
 
-                assert count == 2
+        assert manager.pause_all() == 0
+        done_task.cancel.assert_not_called()
+        assert all(t.status == TransferStatus.QUEUED for t in queued)
 
-    def test_resume_all_resumes_paused(self):
+    def test_resume_all_resumes_paused(self, cache_tmpdir):
         """resume_all should resume all paused transfers."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                manager = TransferManager()
-
-                t1 = Transfer(
-                    id="t1",
-                    remote_path="/file1.txt",
-                    local_path="/tmp/file1.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.PAUSED,
-                )
-                t2 = Transfer(
-                    id="t2",
-                    remote_path="/file2.txt",
-                    local_path="/tmp/file2.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.PAUSED,
-                )
-                manager.queue.transfers.extend([t1, t2])
+        manager = TransferManager()
+
+        t1 = Transfer(
+            id="t1",
+            remote_path="/file1.txt",
+            local_path="/tmp/file1.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.PAUSED,
+        )
+        t2 = Transfer(
+            id="t2",
+            remote_path="/file2.txt",
+            local_path="/tmp/file2.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.PAUSED,
+        )
+        manager.queue.transfers.extend([t1, t2])
 
-                count = manager.resume_all()
+        count = manager.resume_all()
 
-                assert count == 2
-                assert t1.status == TransferStatus.QUEUED
-                assert t2.status == TransferStatus.QUEUED
+        assert count == 2
+        assert t1.status == TransferStatus.QUEUED
+        assert t2.status == TransferStatus.QUEUED
 
 
 class TestTransferManagerMaxConcurrent:
     """Tests for max concurrent transfers."""
 
-    def test_queue_respects_max_concurrent(self):
+    def test_queue_respects_max_concurrent(self, cache_tmpdir):
         """Queue should respect max_concurrent setting."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                settings = AppSettings(max_concurrent_transfers=2)
-                manager = TransferManager(settings=settings)
+        settings = AppSettings(max_concurrent_transfers=2)
+        manager = TransferManager(settings=settings)
 
-                assert manager.queue.max_concurrent == 2
+        assert manager.queue.max_concurrent == 2
 
-    def test_can_start_more_respects_limit(self):
+    def test_can_start_more_respects_limit(self, cache_tmpdir):
         """can_start_more should return False when at limit."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with patch("queued.config.get_cache_dir", return_value=Path(tmpdir)):
-                settings = AppSettings(max_concurrent_transfers=2)
-                manager = TransferManager(settings=settings)
-
-                # Add two active transfers
-                t1 = Transfer(
-                    id="t1",
-                    remote_path="/file1.txt",
-                    local_path="/tmp/file1.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.TRANSFERRING,
-                )
-                t2 = Transfer(
-                    id="t2",
-                    remote_path="/file2.txt",
-                    local_path="/tmp/file2.txt",
-                    direction=TransferDirection.DOWNLOAD,
-                    size=1000,
-                    status=TransferStatus.TRANSFERRING,
-                )
-                manager.queue.transfers.extend([t1, t2])
+        settings = AppSettings(max_concurrent_transfers=2)
+        manager = TransferManager(settings=settings)
+
+        # Add two active transfers
+        t1 = Transfer(
+            id="t1",
+            remote_path="/file1.txt",
+            local_path="/tmp/file1.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.TRANSFERRING,
+        )
+        t2 = Transfer(
+            id="t2",
+            remote_path="/file2.txt",
+            local_path="/tmp/file2.txt",
+            direction=TransferDirection.DOWNLOAD,
+            size=1000,
+            status=TransferStatus.TRANSFERRING,
+        )
+        manager.queue.transfers.extend([t1, t2])
+
+        assert manager.queue.can_start_more is False
 
-                assert manager.queue.can_start_more is False
+
+class TestTransferManagerChecksum:
+    """Tests for post-download checksum verification."""
+
+    async def test_verify_checksum_lists_directory_once_per_batch(self, cache_tmpdir, tmp_path):
+        """Downloads from one directory should share a single checksum file lookup."""
+        manager = TransferManager(settings=AppSettings(download_dir=str(cache_tmpdir)))
+        md5_file = SimpleNamespace(name="checksums.md5")
+        listing = "".join(f"{_MD5_CONTENT_MD5}  file{i}.txt\n" for i in range(3))
+
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[md5_file])
+        mock_sftp.read_file = AsyncMock(return_value=listing.encode())
+
+        for i in range(3):
+            local_path = tmp_path / f"file{i}.txt"
+            local_path.write_bytes(_MD5_CONTENT)
+            transfer = Transfer(
+                id=f"test-{i}",
+                remote_path=f"/files/file{i}.txt",
+                local_path=str(local_path),
+                direction=TransferDirection.DOWNLOAD,
+                size=len(_MD5_CONTENT),
+            )
+            assert await manager._verify_checksum(transfer, mock_sftp) is True
+
+        mock_sftp.list_dir.assert_awaited_once_with("/files")
 
 
 class TestFileVerification:
@@ -665,161 +758,306 @@ class TestFileVerification:
         assert "not found" in message.lower()
 
     @pytest.mark.asyncio
-    async def test_verify_with_remote_md5_match(self):
+    async def test_verify_with_remote_md5_match(self, tmp_path):
         """Should verify successfully when remote MD5 matches local."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create a local file with known content
-            local_path = Path(tmpdir) / "file.txt"
-            content = b"test content for md5"
-            local_path.write_bytes(content)
-            expected_md5 = hashlib.md5(content).hexdigest()
+        # Create a local file with known content
+        local_path = tmp_path / "file.txt"
+        content = _MD5_CONTENT
+        local_path.write_bytes(content)
+        expected_md5 = _MD5_CONTENT_MD5
+
+        # Mock SFTP client
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[])  # No checksum files
+        mock_sftp.compute_remote_md5 = AsyncMock(return_value=expected_md5)
+
+        success, message = await verify_file(
+            "/remote/file.txt",
+            str(local_path),
+            len(content),
+            mock_sftp,
+        )
+
+        assert success is True
+        assert "MD5 match" in message
+
+    @pytest.mark.asyncio
+    async def test_verify_with_known_local_md5_skips_rehash(self, tmp_path):
+        """A digest from the download should be compared without re-reading the file."""
+        local_path = tmp_path / "file.txt"
+        local_path.write_bytes(_MD5_CONTENT)
 
-            # Mock SFTP client
-            mock_sftp = AsyncMock()
-            mock_sftp.list_dir = AsyncMock(return_value=[])  # No checksum files
-            mock_sftp.compute_remote_md5 = AsyncMock(return_value=expected_md5)
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[])
+        mock_sftp.compute_remote_md5 = AsyncMock(return_value=_MD5_CONTENT_MD5)
 
+        with patch("queued.transfer._calculate_local_md5") as calculate:
             success, message = await verify_file(
                 "/remote/file.txt",
                 str(local_path),
-                len(content),
+                len(_MD5_CONTENT),
                 mock_sftp,
+                local_md5=_MD5_CONTENT_MD5,
             )
 
-            assert success is True
-            assert "MD5 match" in message
+        assert success is True
+        assert "MD5 match" in message
+        calculate.assert_not_called()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("threshold", [0, 1 << 40], ids=["mmap", "file_digest"])
+    async def test_verify_with_remote_md5_match_hashing_paths(
+        self, tmp_path, monkeypatch, threshold
+    ):
+        """Both the mmap and the buffered hashing path should produce the right MD5."""
+        monkeypatch.setattr("queued.transfer.MMAP_HASH_THRESHOLD", threshold)
+        local_path = tmp_path / "file.txt"
+        local_path.write_bytes(_MD5_CONTENT)
+
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[])
+        mock_sftp.compute_remote_md5 = AsyncMock(return_value=_MD5_CONTENT_MD5)
+
+        success, message = await verify_file(
+            "/remote/file.txt", str(local_path), len(_MD5_CONTENT), mock_sftp
+        )
+
+        assert success is True
+        assert "MD5 match" in message
+
+    @pytest.mark.asyncio
+    async def test_verify_does_not_block_loop(self, tmp_path):
+        """Local hashing should run off the event loop so other tasks keep running."""
+        local_path = tmp_path / "file.txt"
+        local_path.write_bytes(_MD5_CONTENT)
+
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[])
+        mock_sftp.compute_remote_md5 = AsyncMock(return_value=_MD5_CONTENT_MD5)
+
+        def slow_md5(path):
+            time.sleep(0.1)  # Stand-in for hashing a large file
+            return _MD5_CONTENT_MD5
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticker_task = asyncio.create_task(ticker())
+        try:
+            with patch("queued.transfer._calculate_local_md5", slow_md5):
+                success, _ = await verify_file(
+                    "/remote/file.txt", str(local_path), len(_MD5_CONTENT), mock_sftp
+                )
+        finally:
+            ticker_task.cancel()
+
+        assert success is True
+        assert ticks > 2
 
     @pytest.mark.asyncio
-    async def test_verify_with_remote_md5_mismatch(self):
+    async def test_verify_with_remote_md5_mismatch(self, tmp_path):
         """Should fail when remote MD5 doesn't match local."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create a local file
-            local_path = Path(tmpdir) / "file.txt"
-            local_path.write_bytes(b"local content")
+        # Create a local file
+        local_path = tmp_path / "file.txt"
+        local_path.write_bytes(b"local content")
 
-            # Mock SFTP client with different MD5
-            mock_sftp = AsyncMock()
-            mock_sftp.list_dir = AsyncMock(return_value=[])
-            mock_sftp.compute_remote_md5 = AsyncMock(return_value="different_hash_12345")
+        # Mock SFTP client with different MD5
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[])
+        mock_sftp.compute_remote_md5 = AsyncMock(return_value="different_hash_12345")
 
-            success, message = await verify_file(
-                "/remote/file.txt", str(local_path), 100, mock_sftp
-            )
+        success, message = await verify_file(
+            "/remote/file.txt", str(local_path), len(b"local content"), mock_sftp
+        )
 
-            assert success is False
-            assert "mismatch" in message.lower()
+        assert success is False
+        assert "mismatch" in message.lower()
 
     @pytest.mark.asyncio
-    async def test_verify_fallback_to_size_match(self):
+    async def test_verify_fallback_to_size_match(self, tmp_path):
         """Should fall back to size comparison when MD5 unavailable."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create a local file
-            local_path = Path(tmpdir) / "file.txt"
-            content = b"test content"
-            local_path.write_bytes(content)
+        # Create a local file
+        local_path = tmp_path / "file.txt"
+        content = b"test content"
+        local_path.write_bytes(content)
 
-            # Mock SFTP - no checksum files, no MD5 available
-            mock_sftp = AsyncMock()
-            mock_sftp.list_dir = AsyncMock(return_value=[])
-            mock_sftp.compute_remote_md5 = AsyncMock(return_value=None)
+        # Mock SFTP - no checksum files, no MD5 available
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[])
+        mock_sftp.compute_remote_md5 = AsyncMock(return_value=None)
 
-            success, message = await verify_file(
-                "/remote/file.txt", str(local_path), len(content), mock_sftp
-            )
+        success, message = await verify_file(
+            "/remote/file.txt", str(local_path), len(content), mock_sftp
+        )
 
-            assert success is True
-            assert "size match only" in message.lower()
+        assert success is True
+        assert "size match only" in message.lower()
 
     @pytest.mark.asyncio
-    async def test_verify_size_mismatch(self):
+    async def test_verify_size_mismatch(self, tmp_path):
         """Should fail when sizes don't match and no checksum available."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            local_path = Path(tmpdir) / "file.txt"
-            local_path.write_bytes(b"short")
+        local_path = tmp_path / "file.txt"
+        local_path.write_bytes(b"short")
 
-            mock_sftp = AsyncMock()
-            mock_sftp.list_dir = AsyncMock(return_value=[])
-            mock_sftp.compute_remote_md5 = AsyncMock(return_value=None)
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[])
+        mock_sftp.compute_remote_md5 = AsyncMock(return_value=None)
 
-            success, message = await verify_file(
-                "/remote/file.txt",
-                str(local_path),
-                1000,
-                mock_sftp,  # Remote is larger
-            )
+        success, message = await verify_file(
+            "/remote/file.txt",
+            str(local_path),
+            1000,
+            mock_sftp,  # Remote is larger
+        )
 
-            assert success is False
-            assert "size mismatch" in message.lower()
+        assert success is False
+        assert "size mismatch" in message.lower()
+        # Rejected before looking for checksums to compare
+        mock_sftp.list_dir.assert_not_awaited()
+        mock_sftp.compute_remote_md5.assert_not_awaited()
 
     @pytest.mark.asyncio
-    async def test_verify_with_md5_checksum_file(self):
+    async def test_verify_with_md5_checksum_file(self, tmp_path):
         """Should use .md5 checksum file when available."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            # Create local file
-            local_path = Path(tmpdir) / "file.txt"
-            content = b"test content for checksum"
-            local_path.write_bytes(content)
-            expected_md5 = hashlib.md5(content).hexdigest()
+        # Create local file
+        local_path = tmp_path / "file.txt"
+        content = _CHECKSUM_CONTENT
+        local_path.write_bytes(content)
+        expected_md5 = _CHECKSUM_CONTENT_MD5
 
-            # Mock .md5 file in remote directory
-            md5_file = MagicMock()
-            md5_file.name = "checksums.md5"
+        # Mock .md5 file in remote directory
+        md5_file = SimpleNamespace(name="checksums.md5")
 
-            mock_sftp = AsyncMock()
-            mock_sftp.list_dir = AsyncMock(return_value=[md5_file])
-            mock_sftp.read_file = AsyncMock(return_value=f"{expected_md5}  file.txt\n".encode())
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[md5_file])
+        mock_sftp.read_file = AsyncMock(return_value=f"{expected_md5}  file.txt\n".encode())
 
-            success, message = await verify_file(
-                "/remote/file.txt", str(local_path), len(content), mock_sftp
-            )
+        success, message = await verify_file(
+            "/remote/file.txt", str(local_path), len(content), mock_sftp
+        )
+
+        assert success is True
+        assert "MD5 match" in message
+
+    @pytest.mark.asyncio
+    async def test_verify_prefers_b2_checksum_file(self, tmp_path):
+        """A b2sum file should be used ahead of an .md5 file in the same directory."""
+        local_path = tmp_path / "file.txt"
+        local_path.write_bytes(_CHECKSUM_CONTENT)
+        expected_b2 = hashlib.blake2b(_CHECKSUM_CONTENT).hexdigest()
+
+        md5_file = SimpleNamespace(name="checksums.md5")
+        b2_file = SimpleNamespace(name="checksums.b2")
 
-            assert success is True
-            assert "MD5 match" in message
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[md5_file, b2_file])
+        mock_sftp.read_file = AsyncMock(return_value=f"{expected_b2}  file.txt\n".encode())
+
+        success, message = await verify_file(
+            "/remote/file.txt", str(local_path), len(_CHECKSUM_CONTENT), mock_sftp
+        )
+
+        assert success is True
+        assert "BLAKE2 match" in message
+        mock_sftp.read_file.assert_awaited_once_with("/remote/checksums.b2")
 
     @pytest.mark.asyncio
-    async def test_verify_with_md5_file_mismatch(self):
+    async def test_verify_with_md5_file_mismatch(self, tmp_path):
         """Should fail when .md5 file checksum doesn't match."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            local_path = Path(tmpdir) / "file.txt"
-            local_path.write_bytes(b"local content")
+        local_path = tmp_path / "file.txt"
+        local_path.write_bytes(b"local content")
 
-            md5_file = MagicMock()
-            md5_file.name = "checksums.md5"
+        md5_file = SimpleNamespace(name="checksums.md5")
 
-            mock_sftp = AsyncMock()
-            mock_sftp.list_dir = AsyncMock(return_value=[md5_file])
-            mock_sftp.read_file = AsyncMock(
-                return_value=b"differenthash12345678901234567890  file.txt\n"
-            )
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[md5_file])
+        mock_sftp.read_file = AsyncMock(return_value=b"0123456789abcdef" * 2 + b"  file.txt\n")
 
-            success, message = await verify_file(
-                "/remote/file.txt", str(local_path), 100, mock_sftp
-            )
+        success, message = await verify_file(
+            "/remote/file.txt", str(local_path), len(b"local content"), mock_sftp
+        )
 
-            assert success is False
-            assert "mismatch" in message.lower()
+        assert success is False
+        assert "MD5 mismatch" in message
 
     @pytest.mark.asyncio
-    async def test_verify_with_sfv_checksum_file(self):
+    @pytest.mark.parametrize("threshold", [0, 1 << 40], ids=["mmap", "buffered"])
+    async def test_verify_with_sfv_checksum_file(self, tmp_path, monkeypatch, threshold):
         """Should use .sfv checksum file when available."""
         import zlib
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            local_path = Path(tmpdir) / "file.txt"
-            content = b"test content for sfv"
+        monkeypatch.setattr("queued.transfer.MMAP_HASH_THRESHOLD", threshold)
+        monkeypatch.setattr("queued.transfer.CRC_READ_SIZE", 7)  # Several chunks
+        local_path = tmp_path / "file.txt"
+        content = b"test content for sfv"
+        local_path.write_bytes(content)
+        expected_crc = format(zlib.crc32(content) & 0xFFFFFFFF, "08x")
+
+        sfv_file = SimpleNamespace(name="checksums.sfv")
+
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[sfv_file])
+        mock_sftp.read_file = AsyncMock(return_value=f"file.txt {expected_crc}\n".encode())
+
+        success, message = await verify_file(
+            "/remote/file.txt", str(local_path), len(content), mock_sftp
+        )
+
+        assert success is True
+        assert "CRC32 match" in message
+
+    async def test_verify_files_lists_each_directory_once(self, tmp_path):
+        """verify_files should share one listing per directory and keep item order."""
+        md5_file = SimpleNamespace(name="checksums.md5")
+        listing = f"{_MD5_CONTENT_MD5}  a.txt\n{_MD5_CONTENT_MD5}  b.txt\n"
+
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(return_value=[md5_file])
+        mock_sftp.read_file = AsyncMock(return_value=listing.encode())
+
+        items = []
+        for name, content in [("a.txt", _MD5_CONTENT), ("b.txt", b"corrupted")]:
+            local_path = tmp_path / name
             local_path.write_bytes(content)
-            expected_crc = format(zlib.crc32(content) & 0xFFFFFFFF, "08x")
+            items.append((f"/remote/{name}", str(local_path), len(content)))
+        items.append(("/remote/missing.txt", str(tmp_path / "missing.txt"), 1))
 
-            sfv_file = MagicMock()
-            sfv_file.name = "checksums.sfv"
+        results = await verify_files(items, mock_sftp, concurrency=2)
 
-            mock_sftp = AsyncMock()
-            mock_sftp.list_dir = AsyncMock(return_value=[sfv_file])
-            mock_sftp.read_file = AsyncMock(return_value=f"file.txt {expected_crc}\n".encode())
+        assert [success for success, _ in results] == [True, False, False]
+        assert "MD5 match" in results[0][1]
+        assert "MD5 mismatch" in results[1][1]
+        assert "not found" in results[2][1].lower()
+        mock_sftp.list_dir.assert_awaited_once_with("/remote")
 
-            success, message = await verify_file(
-                "/remote/file.txt", str(local_path), len(content), mock_sftp
-            )
+    async def test_verify_files_failing_item_keeps_others(self, tmp_path):
+        """An item that raises should fail alone while the rest still verify."""
+        md5_file = SimpleNamespace(name="checksums.md5")
+        listing = f"{_MD5_CONTENT_MD5}  a.txt\n"
+
+        async def list_dir(remote_dir):
+            if remote_dir == "/broken":
+                raise ConnectionResetError("Connection lost")
+            return [md5_file]
+
+        mock_sftp = AsyncMock()
+        mock_sftp.list_dir = AsyncMock(side_effect=list_dir)
+        mock_sftp.read_file = AsyncMock(return_value=listing.encode())
+
+        local_path = tmp_path / "a.txt"
+        local_path.write_bytes(_MD5_CONTENT)
+        items = [
+            ("/broken/a.txt", str(local_path), len(_MD5_CONTENT)),
+            ("/remote/a.txt", str(local_path), len(_MD5_CONTENT)),
+        ]
+
+        results = await verify_files(items, mock_sftp)
 
-            assert success is True
-            assert "CRC32 match" in message
+        assert results[0] == (False, "Connection lost")
+        assert results[1][0] is True
+        assert "MD5 match" in results[1][1]
@@ -2,8 +2,9 @@
 
 import uuid
 
+import pytest
 from textual.app import App, ComposeResult
-from textual.widgets import DataTable
+from textual.widgets import DataTable, Label
 
 from queued.models import Transfer, TransferDirection, TransferQueue, TransferStatus
 from queued.widgets.transfer_list import TransferList
@@ -32,6 +33,7 @@ class TransferListTestApp(App):
         yield TransferList(id="transfers")
 
 
+@pytest.mark.textual
 class TestTransferListCursor:
     """Tests for cursor preservation in TransferList."""
 
@@ -171,6 +173,7 @@ class TestTransferListCursor:
             assert table.cursor_row == cursor_before
 
 
+@pytest.mark.textual
 class TestTransferListActions:
     """Tests for transfer list actions."""
 
@@ -197,3 +200,31 @@ class TestTransferListActions:
 
             # Verify cursor is on the transfer
             assert table.cursor_row == 0
+
+    async def test_status_counts_follow_status_changes_after_move(self):
+        """Status bar totals should stay correct for transfers reordered with move_down."""
+        app = TransferListTestApp()
+
+        for i in range(3):
+            t = create_transfer(
+                remote_path=f"/path/file{i}.txt",
+                local_path=f"/tmp/file{i}.txt",
+            )
+            app.queue.transfers.append(t)
+
+        async with app.run_test() as pilot:
+            transfer_list = app.query_one("#transfers", TransferList)
+            transfer_list.set_queue(app.queue)
+            status_label = transfer_list.query_one("#transfers-status", Label)
+
+            # Swap the first two transfers, then change both of their statuses
+            moved, displaced = app.queue.transfers[0], app.queue.transfers[1]
+            transfer_list.action_move_down()
+            assert app.queue.transfers[1] is moved
+
+            moved.status = TransferStatus.TRANSFERRING
+            displaced.status = TransferStatus.COMPLETED
+            transfer_list.refresh_display()
+            await pilot.pause()
+
+            assert str(status_label.content) == "Active: 1 | Queued: 1 | Done: 1"
@@ -0,0 +1,65 @@
+"""Tests for existing-file verification."""
+
+import pytest
+
+from queued.verify import VerifyResult, verify_existing_file
+
+from .mocks.sftp_mock import MockSFTPClient
+
+# Prototype mock; tests clone it with per-test overrides
+_BASE_MOCK = MockSFTPClient()
+
+
+class TestVerifyExistingFile:
+    """Tests for verify_existing_file outcome classification."""
+
+    async def test_verify_md5_match_is_success(self, canonical_payloads):
+        """Matching remote MD5 should report success."""
+        payload = canonical_payloads["verification"]
+        mock_sftp = _BASE_MOCK.clone_with(remote_md5_results={"/remote/file.txt": payload.md5})
+
+        result = await verify_existing_file(
+            "/remote/file.txt", str(payload.path), len(payload.content), mock_sftp
+        )
+
+        assert result.status == "success"
+        assert "MD5 match" in result.message
+
+    @pytest.mark.parametrize(
+        "overrides",
+        [{"md5_available": False}, {"fail_on_md5": True}],
+        ids=["md5-unavailable", "md5-fails"],
+    )
+    async def test_verify_falls_back_to_size(self, canonical_payloads, overrides):
+        """Without a usable remote MD5, matching sizes are reported as a warning."""
+        payload = canonical_payloads["content"]
+        mock_sftp = _BASE_MOCK.clone_with(**overrides)
+
+        result = await verify_existing_file(
+            "/remote/file.txt", str(payload.path), len(payload.content), mock_sftp
+        )
+
+        # Size-only match is a warning, not a confirmed success
+        assert result == VerifyResult(
+            "warning", "Verified (size match only - no checksum available)"
+        )
+
+    async def test_verify_mismatch_is_error(self, canonical_payloads):
+        """Mismatched remote MD5 should report an error."""
+        payload = canonical_payloads["local"]
+        mock_sftp = _BASE_MOCK.clone_with(
+            remote_md5_results={"/remote/file.txt": "different_hash_1234567890"}
+        )
+
+        result = await verify_existing_file(
+            "/remote/file.txt", str(payload.path), len(payload.content), mock_sftp
+        )
+
+        assert result.status == "error"
+        assert "mismatch" in result.message.lower()
+
+    async def test_verify_missing_parameters(self):
+        """Missing sftp client or paths should report an error without verifying."""
+        result = await verify_existing_file(None, None, 1000, None)
+
+        assert result == VerifyResult("error", "Missing verification parameters")